@@ -0,0 +1,103 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from .models import AIProvider
+
+
+class OverloadedError(Exception):
+    """Raised when a request is rejected because the wait queue is full"""
+    pass
+
+
+class _Gate:
+    """Concurrency limit with a bounded queue of waiters"""
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        if self.active >= self.limit and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise OverloadedError(
+                f"Server overloaded: {self.name} has {self.active} requests running "
+                f"and {self.waiting} queued, try again later"
+            )
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected
+        }
+
+
+class AdmissionController:
+    """Global and per-provider caps on concurrent provider calls"""
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int],
+        max_queued: int,
+        provider_limits: Dict[AIProvider, Dict[str, Optional[int]]]
+    ):
+        self._global = _Gate("server", max_concurrent, max_queued) if max_concurrent else None
+        self._providers: Dict[AIProvider, _Gate] = {}
+        for provider, config in provider_limits.items():
+            if config.get("max_concurrent"):
+                self._providers[provider] = _Gate(
+                    provider.value,
+                    config["max_concurrent"],
+                    config.get("max_queued") or max_queued
+                )
+
+    async def acquire(self, provider: AIProvider):
+        """Wait for a slot, or raise OverloadedError if the queue is full"""
+        # Always take the provider gate before the global one so waiters
+        # for a busy provider don't hold global slots
+        provider_gate = self._providers.get(provider)
+        if provider_gate:
+            await provider_gate.acquire()
+        if self._global:
+            try:
+                await self._global.acquire()
+            except BaseException:
+                if provider_gate:
+                    provider_gate.release()
+                raise
+
+    def release(self, provider: AIProvider):
+        if self._global:
+            self._global.release()
+        provider_gate = self._providers.get(provider)
+        if provider_gate:
+            provider_gate.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "global": self._global.stats() if self._global else None,
+            "providers": {
+                provider.value: gate.stats()
+                for provider, gate in self._providers.items()
+            }
+        }
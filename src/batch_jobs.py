@@ -0,0 +1,314 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from functools import partial
+from typing import Any, Dict, List
+
+from .fanout import fan_out
+from .metrics import current_tool
+from .models import AIProvider, BatchRequest
+from .providers.base import AIProviderBase
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Format of the job IDs submit() generates
+JOB_ID_PATTERN = re.compile(r"job_[0-9a-f]{16}")
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    """Write a JSON file atomically"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def batch_custom_id(index: int) -> str:
+    """ID tying a batch request to its position in the job"""
+    return f"item-{index}"
+
+
+def _index(custom_id: str) -> int:
+    return int(custom_id.rsplit("-", 1)[1])
+
+
+class BatchJobManager:
+    """Long-running batch jobs, persisted on disk.
+
+    Jobs go to the provider's batch API when it has one, which is cheaper
+    and not subject to the interactive rate limits, and otherwise run as
+    concurrent direct calls in the background. Each job is a directory with
+    job.json, requests.jsonl and results.jsonl, so jobs survive restarts:
+    provider jobs are polled again and direct jobs resume where they left off.
+    """
+
+    def __init__(
+        self,
+        provider_manager,
+        directory: str,
+        poll_interval: float = 10.0,
+        max_poll_interval: float = 120.0,
+        concurrency: int = 8,
+        timeout: float = 120.0
+    ):
+        self.provider_manager = provider_manager
+        self.directory = os.path.expanduser(directory)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Direct jobs currently running; their task updates these in place
+        self._active: Dict[str, Dict[str, Any]] = {}
+
+    def _path(self, job_id: str, name: str) -> str:
+        return os.path.join(self.directory, job_id, name)
+
+    def _load(self, job_id: str) -> Dict[str, Any]:
+        job = self._active.get(job_id)
+        if job is not None:
+            return job
+        # Job IDs come from clients; never let them escape the jobs directory
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            raise ValueError(f"Unknown batch job: {job_id}")
+        try:
+            with open(self._path(job_id, "job.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Unknown batch job: {job_id}")
+
+    def _save(self, job: Dict[str, Any]):
+        job["updated_at"] = time.time()
+        _write_json(self._path(job["id"], "job.json"), job)
+
+    def _provider(self, job: Dict[str, Any]) -> AIProviderBase:
+        provider = self.provider_manager.get_provider(AIProvider(job["provider"]))
+        if provider is None:
+            raise ValueError(f"Provider {job['provider']} is not configured")
+        return provider
+
+    async def submit(
+        self,
+        provider: AIProviderBase,
+        requests: List[BatchRequest],
+        mode: str = "auto"
+    ) -> Dict[str, Any]:
+        """Start a job; mode is 'auto', 'native' (provider batch API) or 'direct'"""
+        if mode not in ("auto", "native", "direct"):
+            raise ValueError(f"Unknown batch mode: {mode}")
+        if mode == "native" and not provider.supports_batch:
+            raise ValueError(f"{provider.provider_name.value} has no batch API")
+        native = provider.supports_batch and mode != "direct"
+
+        job_id = f"job_{uuid.uuid4().hex[:16]}"
+        job = {
+            "id": job_id,
+            "provider": provider.provider_name.value,
+            "mode": "native" if native else "direct",
+            "batch_id": None,
+            "status": "in_progress",
+            "counts": {"total": len(requests), "succeeded": 0, "failed": 0},
+            "results_ready": False,
+            "error": None,
+            "created_at": time.time(),
+            "next_poll_at": time.time() + self.poll_interval,
+            "poll_interval": self.poll_interval
+        }
+        if native:
+            job["batch_id"] = await provider.submit_batch(requests)
+
+        # Only accepted jobs get a directory
+        os.makedirs(os.path.join(self.directory, job_id), exist_ok=True)
+        with open(self._path(job_id, "requests.jsonl"), "w", encoding="utf-8") as f:
+            for request in requests:
+                f.write(request.model_dump_json() + "\n")
+        self._save(job)
+        if not native:
+            self._start_direct(job)
+        return job
+
+    async def status(self, job_id: str) -> Dict[str, Any]:
+        """Get a job's status, polling the provider when a poll is due"""
+        job = self._load(job_id)
+        if job["status"] in TERMINAL_STATUSES:
+            return job
+        if job["mode"] == "direct":
+            # Resume jobs interrupted by a restart
+            if job_id not in self._tasks:
+                self._start_direct(job)
+            return job
+
+        # Poll less often while nothing changes
+        now = time.time()
+        if now < job["next_poll_at"]:
+            return job
+        info = await self._provider(job).get_batch(job["batch_id"])
+        changed = info["status"] != job["status"] or info["counts"] != job["counts"]
+        job["poll_interval"] = (
+            self.poll_interval if changed
+            else min(job["poll_interval"] * 2, self.max_poll_interval)
+        )
+        job["next_poll_at"] = now + job["poll_interval"]
+        job["status"] = info["status"]
+        job["counts"] = info["counts"] or job["counts"]
+        self._save(job)
+        return job
+
+    async def results(self, job_id: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Get a page of results in input order.
+
+        Results of provider jobs are downloaded once the job ends; direct
+        jobs return the items finished so far.
+        """
+        job = await self.status(job_id)
+        if job["mode"] == "native" and job["status"] in TERMINAL_STATUSES and not job["results_ready"]:
+            await self._download(job)
+
+        entries = self._read_results(job_id)
+        entries.sort(key=lambda entry: entry["index"])
+        return {
+            "job": job,
+            "results": entries[offset:offset + limit],
+            "offset": offset,
+            "available": len(entries),
+            "next_offset": offset + limit if offset + limit < len(entries) else None
+        }
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a running job; finished results stay available"""
+        job = self._load(job_id)
+        if job["status"] in TERMINAL_STATUSES:
+            return job
+        if job["mode"] == "native":
+            await self._provider(job).cancel_batch(job["batch_id"])
+            job["status"] = "cancelling"
+            job["next_poll_at"] = time.time()
+        else:
+            job["status"] = "cancelled"
+            job["results_ready"] = True
+            task = self._tasks.get(job_id)
+            if task is not None:
+                task.cancel()
+        self._save(job)
+        return job
+
+    def list(self) -> List[Dict[str, Any]]:
+        """List all known jobs, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        jobs = []
+        for job_id in os.listdir(self.directory):
+            try:
+                jobs.append(self._load(job_id))
+            except (ValueError, OSError, json.JSONDecodeError):
+                continue
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def _read_results(self, job_id: str) -> List[Dict[str, Any]]:
+        try:
+            with open(self._path(job_id, "results.jsonl"), "r", encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    async def _download(self, job: Dict[str, Any]):
+        """Stream a provider job's results into results.jsonl"""
+        path = self._path(job["id"], "results.jsonl")
+        succeeded = failed = 0
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            async for result in self._provider(job).batch_results(job["batch_id"]):
+                entry = result.response.model_dump(mode="json") if result.response else {"error": result.error}
+                entry["index"] = _index(result.custom_id)
+                f.write(json.dumps(entry) + "\n")
+                if result.response:
+                    succeeded += 1
+                else:
+                    failed += 1
+        os.replace(f"{path}.tmp", path)
+        job["counts"] = {**job["counts"], "succeeded": succeeded, "failed": failed}
+        job["results_ready"] = True
+        self._save(job)
+
+    def _start_direct(self, job: Dict[str, Any]):
+        self._active[job["id"]] = job
+        task = asyncio.create_task(self._run_direct(job))
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["id"], None))
+
+    async def _run_direct(self, job: Dict[str, Any]):
+        """Run a job's remaining items as concurrent calls through the request pipeline"""
+        job_id = job["id"]
+        # Jobs resumed at startup run outside any tool call
+        current_tool.set("batch_submit")
+        try:
+            provider = self._provider(job)
+            with open(self._path(job_id, "requests.jsonl"), "r", encoding="utf-8") as f:
+                requests = [BatchRequest.model_validate_json(line) for line in f if line.strip()]
+            done = self._read_results(job_id)
+            finished = {entry["index"] for entry in done}
+            job["counts"]["succeeded"] = sum(1 for entry in done if "error" not in entry)
+            job["counts"]["failed"] = len(done) - job["counts"]["succeeded"]
+
+            pending = [
+                (index, request) for index, request in enumerate(requests)
+                if index not in finished
+            ]
+            calls = [
+                (request.model, partial(
+                    self.provider_manager.chat,
+                    provider,
+                    messages=request.messages,
+                    model=request.model,
+                    temperature=request.temperature,
+                    max_tokens=request.max_tokens
+                ))
+                for _, request in pending
+            ]
+
+            with open(self._path(job_id, "results.jsonl"), "a", encoding="utf-8") as results:
+                async def on_result(position: int, result: Dict[str, Any]):
+                    if "result" in result:
+                        entry = result["result"].model_dump(mode="json")
+                        job["counts"]["succeeded"] += 1
+                    else:
+                        entry = {"error": result["error"]}
+                        job["counts"]["failed"] += 1
+                    entry["index"] = pending[position][0]
+                    results.write(json.dumps(entry) + "\n")
+                    results.flush()
+
+                await fan_out(calls, timeout=self.timeout, concurrency=self.concurrency, on_result=on_result)
+
+            job["status"] = "completed"
+            job["results_ready"] = True
+        except asyncio.CancelledError:
+            # Cancelled by cancel(), or by shutdown, in which case the job
+            # stays in progress and resumes on the next start
+            raise
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            print(f"Batch job {job_id} failed: {str(e)}", file=sys.stderr)
+        finally:
+            self._active.pop(job_id, None)
+            self._save(job)
+
+    def resume(self):
+        """Restart direct jobs that were running when the server stopped"""
+        for job in self.list():
+            if job["mode"] == "direct" and job["status"] not in TERMINAL_STATUSES:
+                self._start_direct(job)
+
+    def stats(self) -> Dict[str, int]:
+        return {"running_direct_jobs": len(self._tasks)}
+
+    async def aclose(self):
+        """Stop running direct jobs; they resume on the next start"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
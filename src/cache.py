@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import ChatMessage, ChatResponse, AIProvider
+
+
+def make_cache_key(
+    provider: AIProvider,
+    model: str,
+    messages: List[ChatMessage],
+    temperature: float,
+    max_tokens: Optional[int]
+) -> str:
+    """Content-addressed key for a chat request"""
+    payload = json.dumps(
+        [
+            provider.value,
+            model,
+            [[msg.role, msg.content] for msg in messages],
+            round(float(temperature), 4),
+            max_tokens
+        ],
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU store bounded by total value size in bytes"""
+
+    blocking = False
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: float):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.time() + ttl, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
+
+
+class SQLiteCacheBackend:
+    """On-disk store that survives restarts, evicting least recently used entries.
+
+    Calls block on disk I/O, so ResponseCache runs them in worker threads;
+    a lock keeps them from using the connection at the same time.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires_at)"
+        )
+        # Running totals, so writes never have to scan the table
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] < now:
+                self._delete(key, row[1])
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now + ttl, now)
+            )
+            if old is None:
+                self._entries += 1
+            else:
+                self._bytes -= old[0]
+            self._bytes += size
+            if self._bytes <= self.max_bytes:
+                return
+
+            # Over budget: drop expired entries first, then the least recently used
+            expired, expired_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE expires_at < ?", (now,)
+            ).fetchone()
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            self._entries -= expired
+            self._bytes -= expired_bytes
+            while self._bytes > self.max_bytes:
+                row = self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    break
+                self._delete(row[0], row[1])
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._entries = 0
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": self._entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+    def _delete(self, key: str, size: int):
+        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._entries -= 1
+        self._bytes -= size
+
+
+class ResponseCache:
+    """TTL cache of non-streaming chat responses"""
+
+    def __init__(self, backend, ttl: float = 3600.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def _run(self, func, *args) -> Any:
+        """Call a backend method, in a worker thread if it does disk I/O"""
+        if self.backend.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def get(self, key: str) -> Optional[ChatResponse]:
+        value = await self._run(self.backend.get, key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        response = ChatResponse.model_validate_json(value)
+        response.cached = True
+        return response
+
+    async def set(self, key: str, response: ChatResponse):
+        await self._run(self.backend.set, key, response.model_dump_json(), self.ttl)
+
+    async def clear(self):
+        await self._run(self.backend.clear)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl": self.ttl,
+            **self.backend.stats()
+        }
+
+
+def create_response_cache(config: Dict[str, Any]) -> Optional[ResponseCache]:
+    """Build the configured response cache, or None if caching is off"""
+    backend_name = config["backend"]
+    if backend_name in ("", "off", "none", "false", "0"):
+        return None
+    if backend_name == "memory":
+        backend = MemoryCacheBackend(config["max_bytes"])
+    elif backend_name == "sqlite":
+        backend = SQLiteCacheBackend(config["path"], config["max_bytes"])
+    else:
+        raise ValueError(f"Unknown response cache backend: {backend_name}")
+    return ResponseCache(backend, ttl=config["ttl"])
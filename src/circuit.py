@@ -0,0 +1,138 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .retry import is_retryable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """Error-rate and slow-call circuit breaker for one provider or model.
+
+    Outcomes of the last `window` calls are kept. Once at least `min_calls`
+    are recorded and the share of failures reaches `failure_rate` (or, if
+    `slow_call_seconds` is set, the share of calls slower than that reaches
+    `slow_call_rate`), the circuit opens and calls fail fast for
+    `open_seconds`. It then lets `half_open_calls` probes
+    through: if they all succeed it closes again, any failure reopens it.
+
+    Only errors that say something about the provider's health count as
+    failures (timeouts, rate limits, 5xx); bad requests do not.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call_rate: float = 0.5,
+        slow_call_seconds: Optional[float] = None,
+        min_calls: int = 10,
+        window: int = 20,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 2
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        # (failed, slow) per call
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def allows(self) -> bool:
+        """Whether a call would currently be let through"""
+        if self.state == OPEN:
+            return time.monotonic() - self._opened_at >= self.open_seconds
+        if self.state == HALF_OPEN:
+            return self._probes < self.half_open_calls
+        return True
+
+    def before_call(self) -> bool:
+        """Admit a call or raise CircuitOpenError; returns True for half-open probes"""
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self._probes = 0
+            self._probe_successes = 0
+
+        if self.state == CLOSED:
+            return False
+        if self.state == HALF_OPEN and self._probes < self.half_open_calls:
+            self._probes += 1
+            return True
+
+        self.rejected += 1
+        retry_in = max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+        raise CircuitOpenError(
+            f"Circuit open for {self.name} after repeated failures, retry in {retry_in:.1f}s"
+        )
+
+    def record(self, error: Optional[BaseException], duration: float, probe: bool):
+        """Record a finished call admitted by before_call()"""
+        failed = error is not None and is_retryable(error)
+        # Some models are slow by nature, so slowness only counts when a
+        # threshold is configured
+        slow = self.slow_call_seconds is not None and duration >= self.slow_call_seconds
+
+        if probe:
+            if self.state != HALF_OPEN:
+                return
+            self._probes -= 1
+            if failed or slow:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_calls:
+                self.state = CLOSED
+                self._outcomes.clear()
+            return
+
+        # Late results of calls admitted before the circuit opened are ignored
+        if self.state != CLOSED:
+            return
+        self._outcomes.append((failed, slow))
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow_calls = sum(1 for _, slow in self._outcomes if slow)
+        if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+            self._open()
+
+    def abandon(self, probe: bool):
+        """Release a call that was cancelled before it finished"""
+        if probe and self.state == HALF_OPEN:
+            self._probes -= 1
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow_calls = sum(1 for _, slow in self._outcomes if slow)
+        return {
+            "state": self.state,
+            "calls": len(self._outcomes),
+            "failures": failures,
+            "slow_calls": slow_calls,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class SingleFlight:
+    """Collapse identical in-flight calls into a single execution.
+
+    The first caller for a key starts the call; callers arriving while it is
+    still running await the same task. The task is shielded so one caller
+    being cancelled does not cancel the call for everyone else, and is
+    cancelled once every caller has gone.
+    """
+
+    def __init__(self):
+        # key -> [task, callers still waiting on it]
+        self._calls: Dict[str, List[Any]] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(factory())
+            call = self._calls[key] = [task, 0]
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        task = call[0]
+        call[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            call[1] -= 1
+            if call[1] == 0 and not task.done():
+                # Nobody is waiting for the result any more
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: str, task: asyncio.Task):
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned
+        }
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from .models import AIProvider
+
+
+DEFAULT_BASE_URLS = {
+    AIProvider.OPENAI: "https://api.openai.com/v1",
+    AIProvider.GROK: "https://api.x.ai/v1",
+    AIProvider.ANTHROPIC: "https://api.anthropic.com/v1",
+    AIProvider.GOOGLE: "https://generativelanguage.googleapis.com/v1beta",
+}
+
+# OpenAI's /models also lists embedding, audio, image and moderation models
+OPENAI_CHAT_PREFIXES = ("gpt-", "chatgpt-", "o1", "o3", "o4")
+NON_CHAT_MARKERS = (
+    "embedding", "tts", "whisper", "dall-e", "transcribe", "moderation",
+    "image", "realtime", "search"
+)
+
+
+def _is_chat_model(model_id: str, prefixes: tuple = ()) -> bool:
+    if prefixes and not model_id.startswith(prefixes):
+        return False
+    return not any(marker in model_id for marker in NON_CHAT_MARKERS)
+
+
+def merge_catalogs(
+    static: Dict[AIProvider, Dict[str, dict]],
+    discovered: Dict[AIProvider, Dict[str, dict]]
+) -> Dict[AIProvider, Dict[str, dict]]:
+    """Add discovered models to the static catalogs; static metadata wins"""
+    merged = {}
+    for provider in set(static) | set(discovered):
+        models = dict(discovered.get(provider, {}))
+        models.update(static.get(provider, {}))
+        merged[provider] = models
+    return merged
+
+
+class ModelDiscovery:
+    """Fetches live model lists from provider APIs.
+
+    Lists are fetched concurrently, persisted to a JSON snapshot so the next
+    start can use them immediately, and refreshed in the background.
+    """
+
+    def __init__(
+        self,
+        provider_config: Dict[AIProvider, Dict[str, str]],
+        snapshot_path: str,
+        interval: float = 3600.0,
+        timeout: float = 10.0
+    ):
+        self.provider_config = provider_config
+        self.snapshot_path = os.path.expanduser(snapshot_path)
+        self.interval = interval
+        self.timeout = timeout
+        self.last_refresh: Optional[float] = None
+        self.last_errors: Dict[str, str] = {}
+        self.model_counts: Dict[str, int] = {}
+
+    def _base_url(self, provider: AIProvider) -> str:
+        config = self.provider_config[provider]
+        return (config.get("base_url") or DEFAULT_BASE_URLS[provider]).rstrip("/")
+
+    async def fetch_all(self) -> Dict[AIProvider, Dict[str, dict]]:
+        """Fetch every configured provider's model list concurrently"""
+        fetchers = {
+            AIProvider.OPENAI: self._fetch_openai_compatible,
+            AIProvider.GROK: self._fetch_openai_compatible,
+            AIProvider.ANTHROPIC: self._fetch_anthropic,
+            AIProvider.GOOGLE: self._fetch_gemini,
+        }
+        providers = list(self.provider_config)
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            results = await asyncio.gather(
+                *(fetchers[provider](client, provider) for provider in providers),
+                return_exceptions=True
+            )
+
+        discovered = {}
+        self.last_errors = {}
+        for provider, result in zip(providers, results):
+            if isinstance(result, Exception):
+                self.last_errors[provider.value] = str(result)
+                print(f"Model discovery failed for {provider.value}: {str(result)}", file=sys.stderr)
+            else:
+                discovered[provider] = result
+                self.model_counts[provider.value] = len(result)
+        return discovered
+
+    async def _fetch_openai_compatible(self, client: httpx.AsyncClient, provider: AIProvider) -> Dict[str, dict]:
+        response = await client.get(
+            f"{self._base_url(provider)}/models",
+            headers={"Authorization": f"Bearer {self.provider_config[provider]['api_key']}"}
+        )
+        response.raise_for_status()
+
+        prefixes = OPENAI_CHAT_PREFIXES if provider == AIProvider.OPENAI else ()
+        return {
+            item["id"]: {"name": item["id"], "features": ["chat"]}
+            for item in response.json().get("data", [])
+            if _is_chat_model(item["id"], prefixes)
+        }
+
+    async def _fetch_anthropic(self, client: httpx.AsyncClient, provider: AIProvider) -> Dict[str, dict]:
+        models = {}
+        params: Dict[str, Any] = {"limit": 1000}
+        while True:
+            response = await client.get(
+                f"{self._base_url(provider)}/models",
+                headers={
+                    "x-api-key": self.provider_config[provider]["api_key"],
+                    "anthropic-version": "2023-06-01"
+                },
+                params=params
+            )
+            response.raise_for_status()
+            data = response.json()
+            for item in data.get("data", []):
+                models[item["id"]] = {
+                    "name": item.get("display_name") or item["id"],
+                    "features": ["chat"]
+                }
+            if not data.get("has_more") or not data.get("last_id"):
+                return models
+            params["after_id"] = data["last_id"]
+
+    async def _fetch_gemini(self, client: httpx.AsyncClient, provider: AIProvider) -> Dict[str, dict]:
+        models = {}
+        params: Dict[str, Any] = {"pageSize": 1000}
+        while True:
+            response = await client.get(
+                f"{self._base_url(provider)}/models",
+                headers={"x-goog-api-key": self.provider_config[provider]["api_key"]},
+                params=params
+            )
+            response.raise_for_status()
+            data = response.json()
+            for item in data.get("models", []):
+                if "generateContent" not in item.get("supportedGenerationMethods", []):
+                    continue
+                model_id = item["name"].removeprefix("models/")
+                models[model_id] = {
+                    "name": item.get("displayName") or model_id,
+                    "context_window": item.get("inputTokenLimit"),
+                    "max_output_tokens": item.get("outputTokenLimit"),
+                    "features": ["chat"]
+                }
+            if not data.get("nextPageToken"):
+                return models
+            params["pageToken"] = data["nextPageToken"]
+
+    def load_snapshot(self) -> Dict[AIProvider, Dict[str, dict]]:
+        """Load the last persisted model lists, if any"""
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        self.last_refresh = snapshot.get("fetched_at")
+        return {
+            AIProvider(provider): models
+            for provider, models in snapshot.get("models", {}).items()
+            if provider in AIProvider._value2member_map_
+        }
+
+    def save_snapshot(self, discovered: Dict[AIProvider, Dict[str, dict]]):
+        """Persist model lists atomically for fast startup"""
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "fetched_at": self.last_refresh,
+                "models": {provider.value: models for provider, models in discovered.items()}
+            }, f)
+        os.replace(temp_path, self.snapshot_path)
+
+    async def refresh(self) -> Dict[AIProvider, Dict[str, dict]]:
+        """Fetch live model lists and persist them"""
+        discovered = await self.fetch_all()
+        if discovered:
+            # Keep previously known lists for providers that failed this time
+            previous = self.load_snapshot()
+            previous.update(discovered)
+            discovered = previous
+            self.last_refresh = time.time()
+            try:
+                self.save_snapshot(discovered)
+            except OSError as e:
+                print(f"Failed to save model snapshot: {str(e)}", file=sys.stderr)
+        return discovered
+
+    async def run(self, on_update: Callable[[Dict[AIProvider, Dict[str, dict]]], None]):
+        """Refresh forever in the background, reporting each successful refresh"""
+        # A fresh snapshot from a previous run doesn't need refetching yet
+        if self.last_refresh:
+            await asyncio.sleep(max(0.0, self.last_refresh + self.interval - time.time()))
+        while True:
+            try:
+                discovered = await self.refresh()
+                if discovered:
+                    on_update(discovered)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Model discovery failed: {str(e)}", file=sys.stderr)
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "last_refresh": self.last_refresh,
+            "interval": self.interval,
+            "models": self.model_counts,
+            "errors": self.last_errors
+        }
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when a bounded thread pool has no room for more work"""
+    pass
+
+
+class BoundedThreadPool:
+    """Dedicated thread pool with a bounded wait queue.
+
+    Work beyond max_workers running plus max_queue waiting is rejected
+    immediately instead of piling up behind other users of the loop's
+    default executor.
+    """
+
+    def __init__(self, name: str, max_workers: int = 8, max_queue: int = 64):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, func: Callable, *args: Any) -> asyncio.Future:
+        """Schedule func on the pool, rejecting it if the queue is full"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"{self.name} thread pool is saturated "
+                    f"({self.max_workers} running, {self.max_queue} queued)"
+                )
+            self._pending += 1
+
+        def call():
+            with self._lock:
+                self._active += 1
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        def done(_future):
+            # Also runs when a queued call is cancelled before it starts
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(done)
+        return asyncio.wrap_future(future)
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run func on the pool and wait for its result"""
+        return await self.submit(func, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and saturation metrics"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._pending - self._active,
+                "saturation": round(self._active / self.max_workers, 3) if self.max_workers else 0.0,
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+
+    def shutdown(self):
+        """Stop accepting work and drop anything still queued"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+async def _run_with_deadline(
+    key: str,
+    factory: Callable[[], Awaitable[Any]],
+    timeout: Optional[float]
+) -> Dict[str, Any]:
+    """Run a single call, recording its latency and outcome"""
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(factory(), timeout=timeout)
+        return {
+            "key": key,
+            "result": result,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+    except asyncio.TimeoutError:
+        return {
+            "key": key,
+            "error": f"Timed out after {timeout}s",
+            "timed_out": True,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+    except Exception as e:
+        return {
+            "key": key,
+            "error": str(e),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+
+
+async def fan_out(
+    calls: List[Tuple[str, Callable[[], Awaitable[Any]]]],
+    timeout: Optional[float] = None,
+    concurrency: Optional[int] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None
+) -> List[Dict[str, Any]]:
+    """Run calls concurrently with a per-call deadline.
+
+    Each call is a (key, factory) pair. Results come back in input order;
+    calls that miss the deadline or raise are reported as errors instead of
+    failing the whole batch. With `concurrency`, at most that many calls run
+    at once and a call's deadline starts when it does. `on_result` is
+    awaited with each call's index and result as soon as it finishes.
+    """
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def run(index: int, key: str, factory: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+        if semaphore is None:
+            result = await _run_with_deadline(key, factory, timeout)
+        else:
+            async with semaphore:
+                result = await _run_with_deadline(key, factory, timeout)
+        if on_result is not None:
+            await on_result(index, result)
+        return result
+
+    return await asyncio.gather(*(
+        run(index, key, factory)
+        for index, (key, factory) in enumerate(calls)
+    ))
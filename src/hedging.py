@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, List, Optional
+
+_END = object()
+
+
+async def _first_chunk(stream: AsyncGenerator[str, None]) -> Any:
+    """Wait for a stream's first chunk, or _END if it is empty"""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return _END
+
+
+class Hedger:
+    """Race a backup model against a slow primary.
+
+    The primary call starts alone. If it hasn't responded (or, for streams,
+    produced its first chunk) within a delay taken from a percentile of its
+    recent latencies, the same request is sent to the backup. The first
+    successful response wins and the other call is cancelled.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 0.5,
+        default_delay: float = 2.0,
+        min_samples: int = 20,
+        window: int = 200
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def delay(self, key: str) -> float:
+        """Seconds to wait on the primary before sending the backup"""
+        samples = self._latencies.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return self.default_delay
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def _record(self, key: str, index: int, hedged: bool, start: float):
+        # A losing primary is cancelled, so its latency is at least the time
+        # until the backup won; recording that keeps slow tails in the window
+        samples = self._latencies.get(key)
+        if samples is None:
+            samples = self._latencies[key] = deque(maxlen=self.window)
+        samples.append(time.perf_counter() - start)
+
+        counts = self._counts.setdefault(key, {"requests": 0, "hedged": 0, "hedge_wins": 0})
+        counts["requests"] += 1
+        if hedged:
+            counts["hedged"] += 1
+            if index == 1:
+                counts["hedge_wins"] += 1
+
+    async def _first_success(self, tasks: List[asyncio.Future]) -> int:
+        """Wait for the first task to succeed, preferring the primary on ties"""
+        pending = set(tasks)
+        while pending:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for index, task in enumerate(tasks):
+                if task.done() and task.exception() is None:
+                    return index
+        # Every call failed; report the primary's error
+        raise tasks[0].exception()
+
+    async def race(
+        self,
+        key: str,
+        primary: Callable[[], Awaitable[Any]],
+        backup: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run primary, hedging with backup once the delay passes"""
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(primary())]
+        try:
+            await asyncio.wait(tasks, timeout=self.delay(key))
+            if not tasks[0].done():
+                tasks.append(asyncio.ensure_future(backup()))
+            index = await self._first_success(tasks)
+            self._record(key, index, len(tasks) > 1, start)
+            return tasks[index].result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def race_stream(
+        self,
+        key: str,
+        primary: Callable[[], AsyncGenerator[str, None]],
+        backup: Callable[[], AsyncGenerator[str, None]],
+        on_winner: Optional[Callable[[int], None]] = None
+    ) -> AsyncGenerator[str, None]:
+        """Stream from primary, hedging with backup if its first chunk is late.
+
+        on_winner is called with 0 (primary) or 1 (backup) before the winning
+        stream's first chunk is yielded.
+        """
+        start = time.perf_counter()
+        streams = [primary()]
+        tasks = [asyncio.ensure_future(_first_chunk(streams[0]))]
+        index = None
+        try:
+            await asyncio.wait(tasks, timeout=self.delay(key))
+            if not tasks[0].done():
+                streams.append(backup())
+                tasks.append(asyncio.ensure_future(_first_chunk(streams[1])))
+            index = await self._first_success(tasks)
+            self._record(key, index, len(tasks) > 1, start)
+            if on_winner is not None:
+                on_winner(index)
+        finally:
+            for position, (stream, task) in enumerate(zip(streams, tasks)):
+                if position != index:
+                    # The generator can't be closed while a task is inside it
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    await stream.aclose()
+
+        first = tasks[index].result()
+        async with aclosing(streams[index]) as chunks:
+            if first is not _END:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            key: {**counts, "delay": round(self.delay(key), 3)}
+            for key, counts in self._counts.items()
+        }
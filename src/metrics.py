@@ -0,0 +1,238 @@
+import asyncio
+import bisect
+import sys
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from .admission import OverloadedError
+from .circuit import CircuitOpenError
+from .retry import get_status_code, is_retryable
+from .tokens import ContextLengthError
+
+# MCP tool a provider call is made for. Each tool call runs in its own
+# context, and tasks it starts (fan-out, hedges, batch jobs) inherit it.
+current_tool: ContextVar[str] = ContextVar("current_tool", default="other")
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+TOKEN_RATE_BUCKETS = (5.0, 10.0, 20.0, 40.0, 60.0, 80.0, 100.0, 150.0, 200.0, 300.0, 500.0)
+
+
+def error_class(exc: BaseException) -> str:
+    """Coarse class of a failed provider call, for error counters"""
+    if isinstance(exc, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(exc, OverloadedError):
+        return "overloaded"
+    if isinstance(exc, ContextLengthError):
+        return "context_length"
+    status = get_status_code(exc)
+    if status == 429:
+        return "rate_limit"
+    if status is not None:
+        return "server_error" if status >= 500 else "client_error"
+    if is_retryable(exc):
+        # Timeouts and dropped connections
+        return "network"
+    return "other"
+
+
+class _Metric:
+    """A metric with one series per combination of label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0.0) + amount
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{**dict(zip(self.labels, key)), "value": value} for key, value in self._series.items()]
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {value}" for key, value in self._series.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, as in the Prometheus exposition format"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # Per-bucket counts (last one is +Inf), sum, count
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def _quantile(self, counts: List[int], total: int, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket"""
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    # Beyond the last bucket all we know is the lower bound
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return 0.0
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                **dict(zip(self.labels, key)),
+                "count": total,
+                "mean": round(value_sum / total, 4) if total else 0.0,
+                "p50": round(self._quantile(counts, total, 0.5), 4),
+                "p95": round(self._quantile(counts, total, 0.95), 4),
+                "p99": round(self._quantile(counts, total, 0.99), 4)
+            }
+            for key, (counts, value_sum, total) in self._series.items()
+        ]
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, value_sum, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {value_sum}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {total}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """In-process metrics, reported by server_stats and as Prometheus text"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def _register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+_CALL_LABELS = ("provider", "model", "tool")
+REQUESTS = REGISTRY.counter("ai_api_requests_total", "Provider calls made", _CALL_LABELS)
+ERRORS = REGISTRY.counter(
+    "ai_api_errors_total", "Failed provider calls by error class", (*_CALL_LABELS, "error")
+)
+IN_FLIGHT = REGISTRY.gauge("ai_api_requests_in_flight", "Provider calls in progress", _CALL_LABELS)
+LATENCY = REGISTRY.histogram(
+    "ai_api_request_duration_seconds", "Provider call duration, until the last chunk for streams", _CALL_LABELS
+)
+TTFT = REGISTRY.histogram(
+    "ai_api_time_to_first_token_seconds", "Time until a stream's first chunk", _CALL_LABELS, TTFT_BUCKETS
+)
+TOKEN_RATE = REGISTRY.histogram(
+    "ai_api_output_tokens_per_second",
+    "Output tokens per second (after the first chunk for streams)",
+    _CALL_LABELS,
+    TOKEN_RATE_BUCKETS
+)
+RETRIES = REGISTRY.counter("ai_api_retries_total", "Provider calls retried", _CALL_LABELS)
+
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve GET /metrics; anything else is a 404"""
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+        # Skip the headers
+        while (await asyncio.wait_for(reader.readline(), timeout=5.0)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", REGISTRY.render_prometheus().encode("utf-8")
+        else:
+            status, body = "404 Not Found", b"Not Found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: Optional[int]) -> Optional[asyncio.AbstractServer]:
+    """Serve Prometheus metrics on host:port, if a port is configured"""
+    if not port:
+        return None
+    server = await asyncio.start_server(_handle_scrape, host, port)
+    print(f"Serving Prometheus metrics on http://{host}:{port}/metrics", file=sys.stderr)
+    return server
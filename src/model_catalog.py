@@ -0,0 +1,63 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .models import AIProvider, ModelInfo
+from .providers.catalog import build_model_info
+
+
+class ModelCatalog:
+    """Pre-built, versioned model listing for the configured providers.
+
+    Models are validated into ModelInfo and serialized once per catalog
+    change; listing and filtering then work on the cached dicts. The
+    version is a content hash that changes only when the catalog does.
+    """
+
+    def __init__(
+        self,
+        catalogs: Dict[AIProvider, Dict[str, dict]],
+        providers: Iterable[AIProvider]
+    ):
+        self.providers = tuple(providers)
+        self.rebuild(catalogs)
+
+    def rebuild(self, catalogs: Dict[AIProvider, Dict[str, dict]]):
+        """Rebuild the cached listing from provider catalogs"""
+        infos: List[ModelInfo] = []
+        for provider in self.providers:
+            for model_id, info in catalogs.get(provider, {}).items():
+                infos.append(build_model_info(provider, model_id, info))
+
+        entries = tuple(info.model_dump(mode="json") for info in infos)
+        by_provider: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_provider.setdefault(entry["provider"], []).append(entry)
+
+        self._infos: Tuple[ModelInfo, ...] = tuple(infos)
+        self._entries = entries
+        self._by_provider = {name: tuple(items) for name, items in by_provider.items()}
+        self.version = hashlib.sha256(
+            json.dumps(entries, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def models(self) -> List[ModelInfo]:
+        """Get all models as ModelInfo objects"""
+        return list(self._infos)
+
+    def list(
+        self,
+        provider: Optional[str] = None,
+        feature: Optional[str] = None,
+        min_context_window: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Get serialized models, optionally filtered"""
+        entries = self._by_provider.get(provider, ()) if provider else self._entries
+        if feature:
+            entries = [e for e in entries if feature in e["supported_features"]]
+        if min_context_window:
+            entries = [
+                e for e in entries
+                if e["context_window"] and e["context_window"] >= min_context_window
+            ]
+        return list(entries)
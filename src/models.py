@@ -29,6 +29,33 @@ class ChatResponse(BaseModel):
     model: str
     provider: AIProvider
     usage: Optional[Dict[str, int]] = None
+    cached: bool = False
+    # ID of the response stored by the provider, for chaining the next turn
+    response_id: Optional[str] = None
+    # max_tokens sent, if preflight lowered the caller's
+    clamped_max_tokens: Optional[int] = None
+    
+
+class ResponseChain(BaseModel):
+    """A conversation's state stored on the provider's side"""
+    # Stored response to continue from; None starts a new chain
+    response_id: Optional[str] = None
+    # Number of leading messages the stored response already holds
+    message_count: int = 0
+    
+
+class BatchRequest(BaseModel):
+    custom_id: str
+    messages: List[ChatMessage]
+    model: str
+    temperature: float = 0.7
+    max_tokens: Optional[int] = None
+
+
+class BatchResult(BaseModel):
+    custom_id: str
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
     
 
 class ModelInfo(BaseModel):
@@ -1,11 +1,67 @@
-from typing import Dict, List, Optional
-from .models import AIProvider, ModelInfo
+import asyncio
+import importlib
+import sys
+import time
+from contextlib import aclosing
+from functools import partial
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+from .models import AIProvider, ChatMessage, ChatResponse, ModelInfo, ResponseChain
 from .providers.base import AIProviderBase
-from .providers.openai_provider import OpenAIProvider
-from .providers.gemini_provider import GeminiProvider
-from .providers.anthropic_provider import AnthropicProvider
-from .providers.grok_provider import GrokProvider
-from .utils import get_provider_config, extract_provider_from_model, get_retry_config
+from .providers.catalog import STATIC_CATALOGS
+from .routing import ModelRouter
+from .model_catalog import ModelCatalog
+from .discovery import ModelDiscovery, merge_catalogs
+from .utils import (
+    get_provider_config, get_retry_config,
+    get_grok_http_config, get_gemini_config, get_cache_config,
+    get_coalescing_enabled, get_share_max_temperature, get_rate_limit_config, get_admission_config,
+    get_discovery_config, get_hedge_config, get_circuit_breaker_config,
+    get_failover_models, get_prompt_cache_config, get_preflight_config,
+    get_openai_config
+)
+from .cache import create_response_cache, make_cache_key
+from .coalesce import SingleFlight
+from .rate_limit import RateLimiter
+from .admission import AdmissionController
+from .hedging import Hedger
+from .circuit import CircuitBreaker, CircuitOpenError
+from .retry import is_retryable
+from .tokens import ContextLengthError, TokenEstimator
+from . import metrics
+
+
+# Provider modules are imported on first use so the server only pays for
+# the SDKs of providers that are actually configured and used
+PROVIDER_CLASSES = {
+    AIProvider.OPENAI: (".providers.openai_provider", "OpenAIProvider"),
+    AIProvider.GOOGLE: (".providers.gemini_provider", "GeminiProvider"),
+    AIProvider.ANTHROPIC: (".providers.anthropic_provider", "AnthropicProvider"),
+    AIProvider.GROK: (".providers.grok_provider", "GrokProvider"),
+}
+
+
+class ChatStream:
+    """A streaming chat response and the provider and model serving it.
+    
+    provider and model start out as the requested ones; a hedged stream
+    switches them to the backup's once the backup wins.
+    """
+    
+    def __init__(self, chunks: Optional[AsyncGenerator[str, None]], provider: AIProvider, model: str):
+        self.chunks = chunks
+        self.provider = provider
+        self.model = model
+        # max_tokens sent, if preflight lowered the caller's
+        self.clamped_max_tokens: Optional[int] = None
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> str:
+        return await self.chunks.__anext__()
+    
+    async def aclose(self):
+        await self.chunks.aclose()
 
 
 class ProviderManager:
@@ -13,83 +69,699 @@ class ProviderManager:
     
     def __init__(self):
         self.providers: Dict[AIProvider, AIProviderBase] = {}
-        self._initialize_providers()
+        self.provider_config = get_provider_config()
+        self.retry_config = get_retry_config()
+        self.prompt_cache_config = get_prompt_cache_config()
+        self.startup_timings: Dict[str, Dict[str, float]] = {}
+        self._failed_providers: Dict[AIProvider, str] = {}
+        self.catalogs = STATIC_CATALOGS
+        self.router = ModelRouter(self.catalogs)
+        self.catalog = ModelCatalog(self.catalogs, self.provider_config.keys())
         
-    def _initialize_providers(self):
-        """Initialize all configured providers"""
-        provider_config = get_provider_config()
-        retry_config = get_retry_config()
+        # Optional live model discovery, seeded from the last snapshot
+        discovery_config = get_discovery_config()
+        self.discovery = None
+        self._discovery_task: Optional[asyncio.Task] = None
+        self._tokenizer_task: Optional[asyncio.Task] = None
+        if discovery_config["enabled"] and self.provider_config:
+            self.discovery = ModelDiscovery(
+                self.provider_config,
+                snapshot_path=discovery_config["snapshot_path"],
+                interval=discovery_config["interval"],
+                timeout=discovery_config["timeout"]
+            )
+            snapshot = self.discovery.load_snapshot()
+            if snapshot:
+                self.apply_discovered_models(snapshot)
         
-        for provider, config in provider_config.items():
-            try:
-                if provider == AIProvider.OPENAI:
-                    self.providers[provider] = OpenAIProvider(
-                        api_key=config["api_key"],
-                        base_url=config.get("base_url"),
-                        **retry_config
-                    )
-                elif provider == AIProvider.GOOGLE:
-                    self.providers[provider] = GeminiProvider(
-                        api_key=config["api_key"],
-                        **retry_config
-                    )
-                elif provider == AIProvider.ANTHROPIC:
-                    self.providers[provider] = AnthropicProvider(
-                        api_key=config["api_key"],
-                        **retry_config
-                    )
-                elif provider == AIProvider.GROK:
-                    self.providers[provider] = GrokProvider(
-                        api_key=config["api_key"],
-                        base_url=config.get("base_url"),
-                        **retry_config
-                    )
-                    
-                print(f"Initialized {provider.value} provider")
-            except Exception as e:
-                print(f"Failed to initialize {provider.value} provider: {str(e)}")
+        self.response_cache = create_response_cache(get_cache_config())
+        self.single_flight = SingleFlight() if get_coalescing_enabled() else None
+        self.share_max_temperature = get_share_max_temperature()
+        self.rate_limiter = RateLimiter(**get_rate_limit_config())
+        
+        # Local token counts to check requests against context windows
+        preflight_config = get_preflight_config()
+        self.token_estimator = TokenEstimator(memo_size=preflight_config["memo_size"])
+        self.preflight_mode = preflight_config["mode"]
+        self.preflight_min_output = preflight_config["min_output_tokens"]
+        self.preflight_margin = preflight_config["margin"]
+        self.preflight_counts = {"rejected": 0, "trimmed": 0, "clamped": 0}
+        self.admission = AdmissionController(**get_admission_config())
+        
+        hedge_config = get_hedge_config()
+        self.hedge_models = self._by_model_id(hedge_config.pop("backups"))
+        self.hedger = Hedger(**hedge_config)
+        
+        breaker_config = get_circuit_breaker_config()
+        self.breakers_enabled = breaker_config.pop("enabled")
+        self.breakers_per_model = breaker_config.pop("per_model")
+        self.breaker_config = breaker_config
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.failover_models = self._by_model_id(get_failover_models())
+        self.failovers: Dict[str, int] = {}
+        
+    def _initialize_provider(self, provider: AIProvider) -> Optional[AIProviderBase]:
+        """Import and initialize a configured provider"""
+        config = self.provider_config[provider]
+        module_name, class_name = PROVIDER_CLASSES[provider]
+        
+        try:
+            start = time.perf_counter()
+            module = importlib.import_module(module_name, package=__package__)
+            imported = time.perf_counter()
+            
+            provider_class = getattr(module, class_name)
+            if provider == AIProvider.OPENAI:
+                instance = provider_class(
+                    api_key=config["api_key"],
+                    base_url=config.get("base_url"),
+                    **get_openai_config(),
+                    **self.prompt_cache_config,
+                    **self.retry_config
+                )
+            elif provider == AIProvider.GOOGLE:
+                instance = provider_class(
+                    api_key=config["api_key"],
+                    **get_gemini_config(),
+                    **self.prompt_cache_config,
+                    **self.retry_config
+                )
+            elif provider == AIProvider.ANTHROPIC:
+                instance = provider_class(
+                    api_key=config["api_key"],
+                    base_url=config.get("base_url"),
+                    **self.prompt_cache_config,
+                    **self.retry_config
+                )
+            elif provider == AIProvider.GROK:
+                instance = provider_class(
+                    api_key=config["api_key"],
+                    base_url=config.get("base_url"),
+                    **get_grok_http_config(),
+                    **self.retry_config
+                )
+            
+            self.startup_timings[provider.value] = {
+                "import_ms": round((imported - start) * 1000, 1),
+                "init_ms": round((time.perf_counter() - imported) * 1000, 1)
+            }
+            instance.metrics_label = self._model_label
+            self.providers[provider] = instance
+            # stdout carries the MCP stdio transport, so log to stderr
+            print(f"Initialized {provider.value} provider", file=sys.stderr)
+            return instance
+        except Exception as e:
+            self._failed_providers[provider] = str(e)
+            print(f"Failed to initialize {provider.value} provider: {str(e)}", file=sys.stderr)
+            return None
     
     def get_provider(self, provider: AIProvider) -> Optional[AIProviderBase]:
-        """Get a specific provider"""
-        return self.providers.get(provider)
+        """Get a specific provider, initializing it on first use"""
+        instance = self.providers.get(provider)
+        if instance is not None:
+            return instance
+        if provider not in self.provider_config or provider in self._failed_providers:
+            return None
+        return self._initialize_provider(provider)
     
-    def get_provider_for_model(self, model: str, preferred_provider: Optional[AIProvider] = None) -> Optional[AIProviderBase]:
-        """Get provider for a specific model"""
-        # If provider is specified, use it
+    def preload(self) -> Dict[str, Dict[str, float]]:
+        """Initialize every configured provider up front and return timings"""
+        for provider in self.provider_config:
+            self.get_provider(provider)
+        return self.startup_timings
+    
+    def resolve_model(
+        self,
+        model: str,
+        preferred_provider: Optional[AIProvider] = None
+    ) -> Tuple[Optional[AIProviderBase], str]:
+        """Resolve a model name or alias to its provider and canonical model ID"""
+        route = self.router.resolve(model)
+        
+        # If provider is specified, the model must belong to it
         if preferred_provider:
             provider = self.get_provider(preferred_provider)
-            if provider and provider.validate_model(model):
-                return provider
-            else:
-                raise ValueError(f"Model {model} is not supported by {preferred_provider.value}")
-        
-        # Try to extract provider from model name
-        detected_provider = extract_provider_from_model(model)
-        if detected_provider:
-            provider = self.get_provider(detected_provider)
-            if provider and provider.validate_model(model):
-                return provider
-        
-        # Search all providers for the model
-        for provider in self.providers.values():
-            if provider.validate_model(model):
-                return provider
-                
-        return None
+            if provider and route and route.provider == preferred_provider:
+                return provider, route.model
+            raise ValueError(f"Model {model} is not supported by {preferred_provider.value}")
+        
+        if route is None:
+            return None, model
+        return self.get_provider(route.provider), route.model
+    
+    def _by_model_id(self, mapping: Dict[str, str]) -> Dict[str, str]:
+        """Key a model-to-model mapping by canonical model IDs"""
+        resolved = {}
+        for model, other in mapping.items():
+            route = self.router.resolve(model)
+            resolved[route.model if route else model] = other
+        return resolved
+    
+    def _resolve_other(self, model: str, purpose: str) -> Tuple[AIProviderBase, str]:
+        """Resolve a configured backup or fallback model"""
+        provider, model_id = self.resolve_model(model)
+        if provider is None:
+            raise ValueError(f"No provider found for {purpose} model: {model}")
+        return provider, model_id
+    
+    def get_provider_for_model(self, model: str, preferred_provider: Optional[AIProvider] = None) -> Optional[AIProviderBase]:
+        """Get provider for a specific model"""
+        provider, _ = self.resolve_model(model, preferred_provider)
+        return provider
+    
+    def refresh_catalogs(self):
+        """Rebuild the routing index and model listing after catalogs change"""
+        self.router.rebuild(self.catalogs)
+        self.catalog.rebuild(self.catalogs)
+    
+    def apply_discovered_models(self, discovered: Dict[AIProvider, Dict[str, dict]]):
+        """Merge live model lists into the static catalogs"""
+        self.catalogs = merge_catalogs(STATIC_CATALOGS, discovered)
+        self.refresh_catalogs()
+    
+    def start_tokenizer(self):
+        """Load exact OpenAI tokenizers in a worker thread; counts are estimated until then"""
+        if AIProvider.OPENAI in self.provider_config and self._tokenizer_task is None:
+            self._tokenizer_task = asyncio.create_task(
+                asyncio.to_thread(self.token_estimator.load_encodings)
+            )
+    
+    def start_discovery(self):
+        """Start refreshing model catalogs in the background, if enabled"""
+        if self.discovery and self._discovery_task is None:
+            self._discovery_task = asyncio.create_task(
+                self.discovery.run(self.apply_discovered_models)
+            )
+    
+    async def chat(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        hedge_model: Optional[str] = None,
+        chain: Optional[ResponseChain] = None
+    ) -> ChatResponse | ChatStream:
+        """Send a chat request through the shared request pipeline.
+        
+        If hedge_model is given, or HEDGE_MODELS names a backup for model, a
+        slow primary is raced against the backup and the first response wins.
+        If FAILOVER_MODELS names a fallback, requests that fail on the
+        provider's side or hit an open circuit are retried on the fallback.
+        
+        Streams are returned as a ChatStream, which tells which provider and
+        model served them once hedging or failover has picked one.
+        
+        With a chain, a non-streaming request to a provider that stores
+        responses continues the conversation stored there (see
+        AIProviderBase.respond); messages must still be the whole conversation,
+        which failover sends to the fallback as usual.
+        """
+        fallback = self.failover_models.get(model)
+        if fallback is None:
+            return await self._chat(provider, messages, model, temperature, max_tokens, stream, hedge_model, chain)
+        
+        fallback_provider, fallback_model = self._resolve_other(fallback, "failover")
+        if stream:
+            # Stream errors only surface while iterating, so streams switch
+            # up front, and only when the circuit is already open
+            breaker = self._breaker(provider, model)
+            if breaker is not None and not breaker.allows():
+                self._count_failover(provider, model, fallback_model, "circuit open")
+                provider, model = fallback_provider, fallback_model
+            return await self._chat(provider, messages, model, temperature, max_tokens, stream, hedge_model)
+        
+        try:
+            return await self._chat(provider, messages, model, temperature, max_tokens, stream, hedge_model, chain)
+        except Exception as e:
+            if not (isinstance(e, CircuitOpenError) or is_retryable(e)):
+                raise
+            self._count_failover(provider, model, fallback_model, str(e))
+            return await self._chat(fallback_provider, messages, fallback_model, temperature, max_tokens, stream)
+    
+    def _count_failover(self, provider: AIProviderBase, model: str, fallback_model: str, reason: str):
+        key = f"{provider.provider_name.value}:{model}"
+        self.failovers[key] = self.failovers.get(key, 0) + 1
+        print(f"Failing over from {model} to {fallback_model}: {reason}", file=sys.stderr)
+    
+    async def _chat(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        stream: bool,
+        hedge_model: Optional[str] = None,
+        chain: Optional[ResponseChain] = None
+    ) -> ChatResponse | ChatStream:
+        """Check a request against the context window and serve it"""
+        requested = max_tokens
+        original = messages
+        messages, max_tokens = self._preflight(provider, messages, model, max_tokens)
+        if chain is not None and messages is not original:
+            # Trimmed history no longer lines up with the stored one
+            chain = ResponseChain()
+        response = await self._serve(provider, messages, model, temperature, max_tokens, stream, hedge_model, chain)
+        if max_tokens == requested:
+            return response
+        # Tell the caller their max_tokens was lowered
+        if isinstance(response, ChatStream):
+            response.clamped_max_tokens = max_tokens
+            return response
+        return response.model_copy(update={"clamped_max_tokens": max_tokens})
+    
+    async def _serve(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        stream: bool,
+        hedge_model: Optional[str],
+        chain: Optional[ResponseChain]
+    ) -> ChatResponse | ChatStream:
+        """Serve a request from cache, coalesced calls or the provider"""
+        if chain is not None and not stream and provider.supports_response_chaining:
+            # Responses continue provider-side state, so they can't be cached,
+            # shared or hedged on another provider
+            return await self._call(provider, messages, model, temperature, max_tokens, stream=False, chain=chain)
+        
+        backup = self._hedge_backup(model, hedge_model)
+        
+        if stream:
+            if backup is None:
+                chunks = await self._call(provider, messages, model, temperature, max_tokens, stream=True)
+                return ChatStream(chunks, provider.provider_name, model)
+            backup_provider, backup_model = backup
+            response = ChatStream(None, provider.provider_name, model)
+            
+            def served_by(index: int):
+                if index == 1:
+                    response.provider, response.model = backup_provider.provider_name, backup_model
+            
+            response.chunks = self.hedger.race_stream(
+                f"{provider.provider_name.value}:{model}",
+                partial(self._stream, provider, messages, model, temperature, max_tokens),
+                partial(self._stream, backup_provider, messages, backup_model, temperature, max_tokens),
+                on_winner=served_by
+            )
+            return response
+        
+        # The cache and coalescing both answer a request with another
+        # identical request's response, so they share one temperature limit
+        shared = temperature <= self.share_max_temperature
+        if not shared or (self.response_cache is None and self.single_flight is None):
+            return await self._fetch(provider, None, messages, model, temperature, max_tokens, backup)
+        
+        key = make_cache_key(provider.provider_name, model, messages, temperature, max_tokens)
+        if self.response_cache is not None:
+            cached = await self.response_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        if self.single_flight is None:
+            return await self._fetch(provider, key, messages, model, temperature, max_tokens, backup)
+        
+        # Identical requests already in flight share the first call's result
+        return await self.single_flight.do(key, partial(
+            self._fetch, provider, key, messages, model, temperature, max_tokens, backup
+        ))
+    
+    def _preflight(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        max_tokens: Optional[int]
+    ) -> Tuple[List[ChatMessage], Optional[int]]:
+        """Check a request against the model's context window before sending it.
+        
+        A request that leaves no room for PREFLIGHT_MIN_OUTPUT_TOKENS of output
+        (or max_tokens, if smaller) is rejected, or in trim mode cut down to
+        fit. A max_tokens given by the caller is clamped to the model's
+        output limit and to the room the prompt leaves in the context window.
+        
+        Estimated counts can be off either way, so a request is only
+        rejected if it doesn't fit even at PREFLIGHT_MARGIN below the
+        estimate, and trimming assumes it is that much above. Clamping uses
+        the estimate itself, so a long answer isn't cut short for room the
+        prompt probably doesn't take.
+        """
+        route = self.router.resolve(model)
+        if self.preflight_mode == "off" or route is None or route.provider != provider.provider_name:
+            return messages, max_tokens
+        info = self.catalogs.get(route.provider, {}).get(route.catalog_id) or {}
+        context_window = info.get("context_window")
+        if not context_window:
+            return messages, max_tokens
+        max_output = info.get("max_output_tokens") or context_window
+        
+        name = provider.provider_name
+        margin = 0.0 if self.token_estimator.is_exact(name, model) else self.preflight_margin
+        prompt_tokens = self.token_estimator.count_messages(name, model, messages)
+        needed = min(max_tokens or self.preflight_min_output, self.preflight_min_output)
+        if prompt_tokens * (1 - margin) + needed > context_window:
+            if self.preflight_mode != "trim":
+                self.preflight_counts["rejected"] += 1
+                raise ContextLengthError(
+                    f"Request has ~{prompt_tokens} prompt tokens, which leaves no room for output "
+                    f"in {model}'s {context_window}-token context window"
+                )
+            messages = self._trim(name, model, messages, int((context_window - needed) / (1 + margin)))
+            prompt_tokens = self.token_estimator.count_messages(name, model, messages)
+            self.preflight_counts["trimmed"] += 1
+        
+        if max_tokens is not None:
+            room = max(context_window - prompt_tokens, needed)
+            if max_tokens > min(max_output, room):
+                max_tokens = min(max_output, room)
+                self.preflight_counts["clamped"] += 1
+        return messages, max_tokens
+    
+    def _trim(
+        self,
+        name: AIProvider,
+        model: str,
+        messages: List[ChatMessage],
+        budget: int
+    ) -> List[ChatMessage]:
+        """Drop the oldest turns, then truncate the latest message, to fit budget prompt tokens"""
+        estimator = self.token_estimator
+        messages = list(messages)
+        # System messages and the latest message are kept; a dropped user
+        # turn takes its reply with it so the conversation still starts with the user
+        while estimator.count_messages(name, model, messages) > budget:
+            index = next((i for i, msg in enumerate(messages[:-1]) if msg.role != "system"), None)
+            if index is None:
+                break
+            del messages[index]
+            while index < len(messages) - 1 and messages[index].role == "assistant":
+                del messages[index]
+        
+        over = estimator.count_messages(name, model, messages) - budget
+        if over > 0:
+            last = messages[-1]
+            allowed = estimator.count_text(name, model, last.content) - over
+            if allowed <= 0:
+                self.preflight_counts["rejected"] += 1
+                raise ContextLengthError(
+                    f"System prompt alone exceeds {model}'s context window"
+                )
+            messages[-1] = ChatMessage(
+                role=last.role,
+                content=estimator.truncate(name, model, last.content, allowed)
+            )
+        return messages
+    
+    def _hedge_backup(
+        self,
+        model: str,
+        hedge_model: Optional[str]
+    ) -> Optional[Tuple[AIProviderBase, str]]:
+        """Resolve the backup provider and model to hedge a request with"""
+        backup = hedge_model or self.hedge_models.get(model)
+        if not backup:
+            return None
+        return self._resolve_other(backup, "hedge")
+    
+    def _breaker(self, provider: AIProviderBase, model: str) -> Optional[CircuitBreaker]:
+        """Get the circuit breaker guarding a provider, or one of its models"""
+        if not self.breakers_enabled:
+            return None
+        key = provider.provider_name.value
+        if self.breakers_per_model:
+            key = f"{key}:{model}"
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(key, **self.breaker_config)
+        return breaker
+    
+    async def _fetch(
+        self,
+        provider: AIProviderBase,
+        key: Optional[str],
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        backup: Optional[Tuple[AIProviderBase, str]] = None
+    ) -> ChatResponse:
+        """Call the provider, hedged if a backup is given, and cache the response"""
+        if backup is None:
+            response = await self._call(provider, messages, model, temperature, max_tokens, stream=False)
+        else:
+            backup_provider, backup_model = backup
+            response = await self.hedger.race(
+                f"{provider.provider_name.value}:{model}",
+                partial(self._call, provider, messages, model, temperature, max_tokens, stream=False),
+                partial(self._call, backup_provider, messages, backup_model, temperature, max_tokens, stream=False)
+            )
+        if key is not None and self.response_cache is not None:
+            await self.response_cache.set(key, response)
+        return response
+    
+    async def _call(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        stream: bool,
+        chain: Optional[ResponseChain] = None
+    ) -> ChatResponse | AsyncGenerator[str, None]:
+        """Make the actual provider call once the circuit, admission and rate limits allow it"""
+        if stream:
+            return self._stream(provider, messages, model, temperature, max_tokens)
+        
+        labels = self._metric_labels(provider, model)
+        metrics.REQUESTS.inc(**labels)
+        try:
+            return await self._call_provider(provider, messages, model, temperature, max_tokens, chain, labels)
+        except Exception as e:
+            metrics.ERRORS.inc(**labels, error=metrics.error_class(e))
+            raise
+    
+    async def _call_provider(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        chain: Optional[ResponseChain],
+        labels: Dict[str, str]
+    ) -> ChatResponse:
+        # Fail fast before queueing if the provider is known to be down
+        breaker = self._breaker(provider, model)
+        probe = breaker.before_call() if breaker else False
+        # (error, seconds) once the provider has answered
+        outcome = None
+        try:
+            # Wait on the rate limits before taking an admission slot, so
+            # requests queued for one provider's quota don't hold slots
+            # other providers could use
+            await self._acquire_rate_limit(provider, messages, model, max_tokens)
+            await self.admission.acquire(provider.provider_name)
+            try:
+                start = time.perf_counter()
+                metrics.IN_FLIGHT.inc(**labels)
+                try:
+                    if chain is not None:
+                        response = await provider.respond(
+                            messages=messages,
+                            model=model,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            chain=chain
+                        )
+                    else:
+                        response = await provider.chat(
+                            messages=messages,
+                            model=model,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            stream=False
+                        )
+                except Exception as e:
+                    outcome = (e, time.perf_counter() - start)
+                    raise
+                finally:
+                    metrics.IN_FLIGHT.dec(**labels)
+                duration = time.perf_counter() - start
+                outcome = (None, duration)
+                metrics.LATENCY.observe(duration, **labels)
+                output_tokens = (response.usage or {}).get("completion_tokens")
+                if output_tokens and duration > 0:
+                    metrics.TOKEN_RATE.observe(output_tokens / duration, **labels)
+                return response
+            finally:
+                self.admission.release(provider.provider_name)
+        finally:
+            if breaker is not None:
+                if outcome is None:
+                    breaker.abandon(probe)
+                else:
+                    breaker.record(*outcome, probe)
+    
+    async def _stream(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> AsyncGenerator[str, None]:
+        """Stream from the provider, holding an admission slot until the stream ends"""
+        labels = self._metric_labels(provider, model)
+        metrics.REQUESTS.inc(**labels)
+        try:
+            async with aclosing(self._stream_provider(
+                provider, messages, model, temperature, max_tokens, labels
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+        except Exception as e:
+            metrics.ERRORS.inc(**labels, error=metrics.error_class(e))
+            raise
+    
+    async def _stream_provider(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        labels: Dict[str, str]
+    ) -> AsyncGenerator[str, None]:
+        breaker = self._breaker(provider, model)
+        probe = breaker.before_call() if breaker else False
+        # A stream counts as healthy once its first chunk arrives
+        outcome = None
+        try:
+            await self._acquire_rate_limit(provider, messages, model, max_tokens)
+            await self.admission.acquire(provider.provider_name)
+            try:
+                start = time.perf_counter()
+                received: List[str] = []
+                metrics.IN_FLIGHT.inc(**labels)
+                try:
+                    chunks = await provider.chat(
+                        messages=messages,
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True
+                    )
+                    async with aclosing(chunks):
+                        async for chunk in chunks:
+                            if outcome is None:
+                                outcome = (None, time.perf_counter() - start)
+                                metrics.TTFT.observe(outcome[1], **labels)
+                            received.append(chunk)
+                            yield chunk
+                except Exception as e:
+                    if outcome is None:
+                        outcome = (e, time.perf_counter() - start)
+                    raise
+                finally:
+                    metrics.IN_FLIGHT.dec(**labels)
+                duration = time.perf_counter() - start
+                if outcome is None:
+                    outcome = (None, duration)
+                metrics.LATENCY.observe(duration, **labels)
+                # Streams report no usage; rate is measured over generation,
+                # after the first chunk
+                generating = duration - outcome[1]
+                if received and generating > 0:
+                    output_tokens = self.token_estimator.count_text(
+                        provider.provider_name, model, "".join(received)
+                    )
+                    metrics.TOKEN_RATE.observe(output_tokens / generating, **labels)
+            finally:
+                self.admission.release(provider.provider_name)
+        finally:
+            if breaker is not None:
+                if outcome is None:
+                    breaker.abandon(probe)
+                else:
+                    breaker.record(*outcome, probe)
+    
+    def _metric_labels(self, provider: AIProviderBase, model: str) -> Dict[str, str]:
+        return {
+            "provider": provider.provider_name.value,
+            "model": self._model_label(model),
+            "tool": metrics.current_tool.get()
+        }
+    
+    def _model_label(self, model: str) -> str:
+        """Catalog ID of a model for metric labels.
+        
+        Prefix routing accepts any suffix, so labelling by the requested name
+        would let clients create unbounded series.
+        """
+        route = self.router.resolve(model)
+        return route.catalog_id if route is not None else "other"
+    
+    async def _acquire_rate_limit(
+        self,
+        provider: AIProviderBase,
+        messages: List[ChatMessage],
+        model: str,
+        max_tokens: Optional[int]
+    ):
+        """Wait until the provider's rate limits have room for this request"""
+        prompt_tokens = self.token_estimator.count_messages(provider.provider_name, model, messages)
+        await self.rate_limiter.acquire(
+            provider.provider_name,
+            model,
+            prompt_tokens + (max_tokens or 0)
+        )
+    
+    def get_stats(self) -> Dict[str, object]:
+        """Get load, queueing and cache statistics for tuning"""
+        return {
+            "providers": {
+                provider_name.value: provider.stats()
+                for provider_name, provider in self.providers.items()
+            },
+            "admission": self.admission.stats(),
+            "rate_limits": self.rate_limiter.stats(),
+            "response_cache": self.response_cache.stats() if self.response_cache else None,
+            "coalescing": self.single_flight.stats() if self.single_flight else None,
+            "hedging": self.hedger.stats(),
+            "circuit_breakers": {key: breaker.stats() for key, breaker in self.breakers.items()},
+            "failovers": self.failovers,
+            "preflight": {**self.preflight_counts, "tokens": self.token_estimator.stats()},
+            "startup": self.startup_timings,
+            "catalog_version": self.catalog.version,
+            "discovery": self.discovery.stats() if self.discovery else None
+        }
     
     async def list_all_models(self) -> List[ModelInfo]:
         """List all available models from all providers"""
-        all_models = []
+        return self.catalog.models()
+    
+    def get_available_providers(self) -> List[AIProvider]:
+        """Get list of available providers"""
+        return list(self.provider_config.keys())
+    
+    async def aclose(self):
+        """Stop background work and close network resources held by all providers"""
+        if self._discovery_task is not None:
+            self._discovery_task.cancel()
+            try:
+                await self._discovery_task
+            except asyncio.CancelledError:
+                pass
+            self._discovery_task = None
         
         for provider in self.providers.values():
             try:
-                models = await provider.list_models()
-                all_models.extend(models)
+                await provider.aclose()
             except Exception as e:
-                print(f"Failed to list models for {provider.provider_name}: {str(e)}")
-                
-        return all_models
-    
-    def get_available_providers(self) -> List[AIProvider]:
-        """Get list of available providers"""
-        return list(self.providers.keys())
\ No newline at end of file
+                print(f"Failed to close {provider.provider_name.value} provider: {str(e)}", file=sys.stderr)
\ No newline at end of file
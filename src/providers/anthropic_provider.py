@@ -1,79 +1,48 @@
-from typing import List, AsyncGenerator, Optional
+from typing import Any, Dict, List, AsyncGenerator, Optional
 from anthropic import AsyncAnthropic
 
 from .base import AIProviderBase
-from ..models import ChatMessage, ChatResponse, ModelInfo, AIProvider
+from .catalog import ANTHROPIC_MODELS, build_model_info
+from ..models import ChatMessage, ChatResponse, ModelInfo, AIProvider, BatchRequest, BatchResult
+
+
+# The API allows at most this many cache_control breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+CACHE_CONTROL = {"type": "ephemeral"}
 
 
 class AnthropicProvider(AIProviderBase):
     """Anthropic Claude provider implementation"""
     
-    MODELS = {
-        # Claude 4 Models (Latest Generation)
-        "claude-opus-4-20250514": {
-            "name": "Claude Opus 4",
-            "context_window": 200000,
-            "max_output_tokens": 32000,
-            "features": ["chat", "code", "vision", "analysis", "extended_thinking", "multilingual"]
-        },
-        "claude-sonnet-4-20250514": {
-            "name": "Claude Sonnet 4",
-            "context_window": 200000,
-            "max_output_tokens": 64000,
-            "features": ["chat", "code", "vision", "extended_thinking", "multilingual"]
-        },
-        
-        # Claude 3.x Models
-        "claude-3-7-sonnet-20250219": {
-            "name": "Claude Sonnet 3.7",
-            "context_window": 200000,
-            "max_output_tokens": 64000,
-            "features": ["chat", "code", "vision", "extended_thinking", "multilingual"]
-        },
-        "claude-3-5-sonnet-20241022": {
-            "name": "Claude Sonnet 3.5 v2",
-            "context_window": 200000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "multilingual"]
-        },
-        "claude-3-5-sonnet-20240620": {
-            "name": "Claude Sonnet 3.5",
-            "context_window": 200000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "multilingual"]
-        },
-        "claude-3-5-haiku-20241022": {
-            "name": "Claude Haiku 3.5",
-            "context_window": 200000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "fast", "multilingual"]
-        },
-        "claude-3-haiku-20240307": {
-            "name": "Claude Haiku 3",
-            "context_window": 200000,
-            "max_output_tokens": 4096,
-            "features": ["chat", "code", "vision", "fast", "multilingual"]
-        }
-    }
+    MODELS = ANTHROPIC_MODELS
+    supports_batch = True
     
-    def __init__(self, api_key: str, **kwargs):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        prompt_cache: bool = True,
+        prompt_cache_min_tokens: int = 1024,
+        **kwargs
+    ):
         super().__init__(api_key, **kwargs)
-        self.client = AsyncAnthropic(api_key=api_key)
+        self.prompt_cache = prompt_cache
+        self.prompt_cache_min_tokens = prompt_cache_min_tokens
+        # Retries are handled by our own retry policy, not the SDK's
+        self.client = AsyncAnthropic(api_key=api_key, base_url=base_url, max_retries=0)
         
     @property
     def provider_name(self) -> AIProvider:
         return AIProvider.ANTHROPIC
     
-    async def chat(
+    def _build_params(
         self,
         messages: List[ChatMessage],
         model: str,
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None,
-        stream: bool = False
-    ) -> ChatResponse | AsyncGenerator[str, None]:
-        """Send chat messages to Claude"""
-        
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """Build Messages API parameters"""
         # Extract system message if present
         system_message = None
         anthropic_messages = []
@@ -87,68 +56,108 @@ class AnthropicProvider(AIProviderBase):
                     "content": msg.content
                 })
         
-        # Set default max_tokens if not provided
-        if max_tokens is None:
-            max_tokens = 4096
+        params = {
+            "model": model,
+            "messages": anthropic_messages,
+            "temperature": temperature,
+            # Set default max_tokens if not provided
+            "max_tokens": max_tokens if max_tokens is not None else 4096
+        }
+
+        # Only add system parameter if we have a system message
+        if system_message:
+            params["system"] = system_message
+        
+        if self.prompt_cache:
+            self._add_cache_breakpoints(params)
+        return params
+    
+    def _add_cache_breakpoints(self, params: Dict[str, Any]):
+        """Mark long prompt prefixes as cacheable.
+        
+        Breakpoints go, in order of preference, on a long system prompt
+        (shared across conversations), on the latest message once the whole
+        prompt is long enough (so the next turn reuses the conversation so
+        far) and on long earlier messages such as documents.
+        """
+        # Rough token estimate, ~4 characters per token
+        min_chars = self.prompt_cache_min_tokens * 4
+        messages = params["messages"]
+        system = params.get("system")
+        breakpoints = 0
+        
+        if system and len(system) >= min_chars:
+            params["system"] = [{"type": "text", "text": system, "cache_control": CACHE_CONTROL}]
+            breakpoints += 1
+        
+        marked = []
+        prompt_chars = len(system or "") + sum(len(msg["content"]) for msg in messages)
+        if messages and prompt_chars >= min_chars:
+            marked.append(len(messages) - 1)
+        for index in range(len(messages) - 2, -1, -1):
+            if len(messages[index]["content"]) >= min_chars:
+                marked.append(index)
+        
+        for index in marked[:MAX_CACHE_BREAKPOINTS - breakpoints]:
+            messages[index] = {
+                "role": messages[index]["role"],
+                "content": [{
+                    "type": "text",
+                    "text": messages[index]["content"],
+                    "cache_control": CACHE_CONTROL
+                }]
+            }
+    
+    def _to_response(self, message, model: str) -> ChatResponse:
+        """Convert a Messages API message to a ChatResponse"""
+        return ChatResponse(
+            content=message.content[0].text,
+            model=model,
+            provider=self.provider_name,
+            usage=self._usage(message.usage) if hasattr(message, 'usage') else None
+        )
+    
+    def _usage(self, usage) -> Dict[str, int]:
+        """Token usage, counting cached prompt tokens as prompt tokens"""
+        cache_read = usage.cache_read_input_tokens or 0
+        cache_write = usage.cache_creation_input_tokens or 0
+        prompt_tokens = usage.input_tokens + cache_read + cache_write
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": usage.output_tokens,
+            "total_tokens": prompt_tokens + usage.output_tokens,
+            "cache_read_tokens": cache_read,
+            "cache_write_tokens": cache_write
+        }
+    
+    async def chat(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stream: bool = False
+    ) -> ChatResponse | AsyncGenerator[str, None]:
+        """Send chat messages to Claude"""
+        params = self._build_params(messages, model, temperature, max_tokens)
         
         try:
             if stream:
-                return self._stream_chat(
-                    anthropic_messages, model, system_message,
-                    temperature, max_tokens
-                )
+                return self._stream_chat(params)
             else:
-                # Prepare parameters
-                params = {
-                    "model": model,
-                    "messages": anthropic_messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens
-                }
-
-                # Only add system parameter if we have a system message
-                if system_message:
-                    params["system"] = system_message
-
-                response = await self.client.messages.create(**params)
-                
-                return ChatResponse(
-                    content=response.content[0].text,
-                    model=model,
-                    provider=self.provider_name,
-                    usage={
-                        "prompt_tokens": response.usage.input_tokens,
-                        "completion_tokens": response.usage.output_tokens,
-                        "total_tokens": response.usage.input_tokens + response.usage.output_tokens
-                    } if hasattr(response, 'usage') else None
+                response = await self._make_request_with_retry(
+                    self.client.messages.create, **params
                 )
+                return self._to_response(response, model)
         except Exception as e:
-            raise Exception(f"Anthropic API error: {str(e)}")
+            raise Exception(f"Anthropic API error: {str(e)}") from e
     
-    async def _stream_chat(
-        self,
-        messages: List[dict],
-        model: str,
-        system: Optional[str],
-        temperature: float,
-        max_tokens: int
-    ) -> AsyncGenerator[str, None]:
+    async def _stream_chat(self, params: Dict[str, Any]) -> AsyncGenerator[str, None]:
         """Stream chat responses"""
         try:
-            # Prepare parameters
-            params = {
-                "model": model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-                "stream": True
-            }
-
-            # Only add system parameter if we have a system message
-            if system:
-                params["system"] = system
-
-            stream = await self.client.messages.create(**params)
+            stream = await self._make_request_with_retry(
+                self.client.messages.create, **params, stream=True
+            )
             
             async for event in stream:
                 if event.type == "content_block_delta":
@@ -156,25 +165,94 @@ class AnthropicProvider(AIProviderBase):
                         yield event.delta.text
                         
         except Exception as e:
-            raise Exception(f"Anthropic streaming error: {str(e)}")
+            raise Exception(f"Anthropic streaming error: {str(e)}") from e
+    
+    async def submit_batch(self, requests: List[BatchRequest]) -> str:
+        """Start a Message Batches job"""
+        try:
+            batch = await self._make_request_with_retry(
+                self.client.messages.batches.create,
+                requests=[
+                    {
+                        "custom_id": request.custom_id,
+                        "params": self._build_params(
+                            request.messages, request.model, request.temperature, request.max_tokens
+                        )
+                    }
+                    for request in requests
+                ]
+            )
+            return batch.id
+        except Exception as e:
+            raise Exception(f"Anthropic batch error: {str(e)}") from e
+    
+    async def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Get a Message Batches job's status and request counts"""
+        try:
+            batch = await self._make_request_with_retry(
+                self.client.messages.batches.retrieve, batch_id
+            )
+        except Exception as e:
+            raise Exception(f"Anthropic batch error: {str(e)}") from e
+        
+        counts = batch.request_counts
+        failed = counts.errored + counts.canceled + counts.expired
+        if batch.processing_status == "ended":
+            status = "completed"
+        elif batch.processing_status == "canceling":
+            status = "cancelling"
+        else:
+            status = "in_progress"
+        return {
+            "status": status,
+            "counts": {
+                "total": counts.processing + counts.succeeded + failed,
+                "succeeded": counts.succeeded,
+                "failed": failed
+            }
+        }
+    
+    async def batch_results(self, batch_id: str) -> AsyncGenerator[BatchResult, None]:
+        """Stream results from the job's JSONL results file"""
+        try:
+            results = await self._make_request_with_retry(
+                self.client.messages.batches.results, batch_id
+            )
+            async for entry in results:
+                if entry.result.type == "succeeded":
+                    message = entry.result.message
+                    yield BatchResult(
+                        custom_id=entry.custom_id,
+                        response=self._to_response(message, message.model)
+                    )
+                else:
+                    # Errored results wrap an API error; canceled/expired ones have none
+                    error = getattr(getattr(entry.result, "error", None), "error", None)
+                    yield BatchResult(
+                        custom_id=entry.custom_id,
+                        error=getattr(error, "message", None) or entry.result.type
+                    )
+        except Exception as e:
+            raise Exception(f"Anthropic batch error: {str(e)}") from e
+    
+    async def cancel_batch(self, batch_id: str):
+        """Cancel a Message Batches job"""
+        try:
+            await self._make_request_with_retry(self.client.messages.batches.cancel, batch_id)
+        except Exception as e:
+            raise Exception(f"Anthropic batch error: {str(e)}") from e
     
     async def list_models(self) -> List[ModelInfo]:
         """List available Claude models"""
-        models = []
-        
-        for model_id, info in self.MODELS.items():
-            models.append(ModelInfo(
-                id=model_id,
-                name=info["name"],
-                provider=self.provider_name,
-                description=f"Anthropic {info['name']} model",
-                context_window=info["context_window"],
-                max_output_tokens=info["max_output_tokens"],
-                supported_features=info["features"]
-            ))
-            
-        return models
+        return [
+            build_model_info(self.provider_name, model_id, info)
+            for model_id, info in self.MODELS.items()
+        ]
     
     def validate_model(self, model: str) -> bool:
         """Check if model is valid for Anthropic"""
-        return model in self.MODELS
\ No newline at end of file
+        return model in self.MODELS
+    
+    async def aclose(self):
+        """Close the underlying Anthropic client"""
+        await self.client.close()
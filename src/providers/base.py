@@ -1,20 +1,41 @@
 from abc import ABC, abstractmethod
-from typing import List, AsyncGenerator, Optional
-import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import Any, Callable, Dict, List, AsyncGenerator, Optional
+import sys
+from functools import partial
+from tenacity import RetryCallState
 
 from ..models import (
-    ChatMessage, ChatResponse, ModelInfo, AIProvider
+    ChatMessage, ChatResponse, ModelInfo, AIProvider, BatchRequest, BatchResult, ResponseChain
 )
+from ..retry import call_with_retry
+from .. import metrics
 
 
 class AIProviderBase(ABC):
     """Base class for all AI providers"""
     
-    def __init__(self, api_key: str, max_retries: int = 3, retry_delay: float = 1.0):
+    # Whether the provider implements the batch methods below
+    supports_batch = False
+    # Whether the provider implements respond() below
+    supports_response_chaining = False
+    
+    def __init__(
+        self,
+        api_key: str,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        retry_max_delay: float = 20.0,
+        retry_budget: float = 60.0
+    ):
         self.api_key = api_key
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self.retry_budget = retry_budget
+        self.retry_count = 0
+        # Maps a requested model name to its metrics label; ProviderManager
+        # replaces it to label by catalog ID
+        self.metrics_label: Callable[[str], str] = str
         
     @property
     @abstractmethod
@@ -44,14 +65,83 @@ class AIProviderBase(ABC):
         """Check if the model is valid for this provider"""
         pass
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    async def _make_request_with_retry(self, request_func, *args, **kwargs):
-        """Generic retry wrapper for API requests"""
-        try:
-            return await request_func(*args, **kwargs)
-        except Exception as e:
-            print(f"Request failed for {self.provider_name}: {str(e)}")
-            raise
\ No newline at end of file
+    async def respond(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        chain: Optional[ResponseChain] = None
+    ) -> ChatResponse:
+        """Send a conversation turn, continuing the provider-side state in chain.
+        
+        messages is the whole conversation; only those after
+        chain.message_count need to be sent. The response's response_id
+        continues the chain on the next turn.
+        """
+        raise NotImplementedError(f"{self.provider_name.value} does not store responses")
+    
+    async def submit_batch(self, requests: List[BatchRequest]) -> str:
+        """Submit requests to the provider's batch API and return its batch ID"""
+        raise NotImplementedError(f"{self.provider_name.value} has no batch API")
+    
+    async def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Get a batch's status and request counts.
+        
+        Status is one of 'in_progress', 'completed', 'failed', 'expired',
+        'cancelling' or 'cancelled'; counts has 'total', 'succeeded' and
+        'failed'.
+        """
+        raise NotImplementedError(f"{self.provider_name.value} has no batch API")
+    
+    def batch_results(self, batch_id: str) -> AsyncGenerator[BatchResult, None]:
+        """Stream the results of a finished batch"""
+        raise NotImplementedError(f"{self.provider_name.value} has no batch API")
+    
+    async def cancel_batch(self, batch_id: str):
+        """Cancel a batch that is still running"""
+        raise NotImplementedError(f"{self.provider_name.value} has no batch API")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get provider-level counters"""
+        return {"retries": self.retry_count}
+    
+    async def aclose(self):
+        """Release any network resources held by the provider"""
+        pass
+    
+    async def _make_request_with_retry(
+        self,
+        request_func,
+        *args,
+        metrics_model: Optional[str] = None,
+        **kwargs
+    ):
+        """Await an API request, retrying transient failures per the retry config.
+        
+        Retries are counted against `metrics_model`, or the request's own
+        `model` argument.
+        """
+        return await call_with_retry(
+            request_func,
+            *args,
+            max_retries=self.max_retries,
+            base_delay=self.retry_delay,
+            max_delay=self.retry_max_delay,
+            budget=self.retry_budget,
+            on_retry=partial(self._on_retry, metrics_model or kwargs.get("model") or ""),
+            **kwargs
+        )
+    
+    def _on_retry(self, model: str, retry_state: RetryCallState):
+        """Record and report a retry before backing off"""
+        self.retry_count += 1
+        metrics.RETRIES.inc(
+            provider=self.provider_name.value, model=self.metrics_label(model), tool=metrics.current_tool.get()
+        )
+        error = retry_state.outcome.exception()
+        print(
+            f"Request failed for {self.provider_name.value} ({str(error)}), "
+            f"retrying in {retry_state.next_action.sleep:.1f}s",
+            file=sys.stderr
+        )
\ No newline at end of file
@@ -0,0 +1,300 @@
+from typing import Dict
+
+from ..models import AIProvider, ModelInfo
+
+
+# Static model metadata for each provider. Kept apart from the provider
+# modules so routing and model listing work without importing any SDK.
+
+OPENAI_MODELS: Dict[str, dict] = {
+    # Flagship GPT Models
+    "gpt-4.1": {
+        "name": "GPT-4.1",
+        "context_window": 1000000,
+        "max_output_tokens": 32768,
+        "features": ["chat", "code", "vision", "audio", "json_mode", "massive_context"]
+    },
+    "gpt-4o": {
+        "name": "GPT-4o",
+        "context_window": 128000,
+        "max_output_tokens": 16384,
+        "features": ["chat", "code", "vision", "audio", "json_mode"]
+    },
+    "gpt-4o-audio-preview": {
+        "name": "GPT-4o Audio",
+        "context_window": 128000,
+        "max_output_tokens": 16384,
+        "features": ["chat", "code", "vision", "audio", "json_mode"]
+    },
+    "chatgpt-4o-latest": {
+        "name": "ChatGPT-4o",
+        "context_window": 128000,
+        "max_output_tokens": 16384,
+        "features": ["chat", "code", "vision", "audio", "json_mode"]
+    },
+    
+    # Cost-Optimized Models
+    "gpt-4.1-mini": {
+        "name": "GPT-4.1 Mini",
+        "context_window": 1000000,
+        "max_output_tokens": 16384,
+        "features": ["chat", "code", "vision", "audio", "json_mode", "massive_context", "fast"]
+    },
+    "gpt-4.1-nano": {
+        "name": "GPT-4.1 Nano",
+        "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "massive_context", "ultra_fast"]
+    },
+    "gpt-4o-mini": {
+        "name": "GPT-4o Mini",
+        "context_window": 128000,
+        "max_output_tokens": 16384,
+        "features": ["chat", "code", "vision", "json_mode", "fast"]
+    },
+    "gpt-4o-mini-audio-preview": {
+        "name": "GPT-4o Mini Audio",
+        "context_window": 128000,
+        "max_output_tokens": 16384,
+        "features": ["chat", "code", "vision", "audio", "json_mode", "fast"]
+    },
+    
+    # Reasoning Models (o-series)
+    "o4-mini": {
+        "name": "o4-mini",
+        "context_window": 200000,
+        "max_output_tokens": 65536,
+        "features": ["chat", "code", "reasoning", "advanced_reasoning", "fast"]
+    },
+    "o3": {
+        "name": "o3",
+        "context_window": 200000,
+        "max_output_tokens": 100000,
+        "features": ["chat", "code", "reasoning", "advanced_reasoning"]
+    },
+    "o3-pro": {
+        "name": "o3-pro",
+        "context_window": 200000,
+        "max_output_tokens": 100000,
+        "features": ["chat", "code", "reasoning", "advanced_reasoning", "deep_thinking"]
+    },
+    "o3-mini": {
+        "name": "o3-mini",
+        "context_window": 200000,
+        "max_output_tokens": 65536,
+        "features": ["chat", "code", "reasoning", "advanced_reasoning", "fast"]
+    },
+    "o1": {
+        "name": "o1",
+        "context_window": 200000,
+        "max_output_tokens": 100000,
+        "features": ["chat", "code", "reasoning", "advanced_reasoning"]
+    },
+    "o1-mini": {
+        "name": "o1-mini",
+        "context_window": 128000,
+        "max_output_tokens": 65536,
+        "features": ["chat", "code", "reasoning", "advanced_reasoning"]
+    },
+    "o1-pro": {
+        "name": "o1-pro",
+        "context_window": 200000,
+        "max_output_tokens": 100000,
+        "features": ["chat", "code", "reasoning", "advanced_reasoning", "deep_thinking"]
+    },
+    
+    # Older GPT Models
+    "gpt-4-turbo": {
+        "name": "GPT-4 Turbo",
+        "context_window": 128000,
+        "max_output_tokens": 4096,
+        "features": ["chat", "code", "vision", "json_mode"]
+    },
+    "gpt-4": {
+        "name": "GPT-4",
+        "context_window": 8192,
+        "max_output_tokens": 4096,
+        "features": ["chat", "code", "vision"]
+    },
+    "gpt-3.5-turbo": {
+        "name": "GPT-3.5 Turbo",
+        "context_window": 16385,
+        "max_output_tokens": 4096,
+        "features": ["chat", "code", "fast"]
+    }
+}
+
+ANTHROPIC_MODELS: Dict[str, dict] = {
+    # Claude 4 Models (Latest Generation)
+    "claude-opus-4-20250514": {
+        "name": "Claude Opus 4",
+        "context_window": 200000,
+        "max_output_tokens": 32000,
+        "features": ["chat", "code", "vision", "analysis", "extended_thinking", "multilingual"]
+    },
+    "claude-sonnet-4-20250514": {
+        "name": "Claude Sonnet 4",
+        "context_window": 200000,
+        "max_output_tokens": 64000,
+        "features": ["chat", "code", "vision", "extended_thinking", "multilingual"]
+    },
+    
+    # Claude 3.x Models
+    "claude-3-7-sonnet-20250219": {
+        "name": "Claude Sonnet 3.7",
+        "context_window": 200000,
+        "max_output_tokens": 64000,
+        "features": ["chat", "code", "vision", "extended_thinking", "multilingual"]
+    },
+    "claude-3-5-sonnet-20241022": {
+        "name": "Claude Sonnet 3.5 v2",
+        "context_window": 200000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "multilingual"]
+    },
+    "claude-3-5-sonnet-20240620": {
+        "name": "Claude Sonnet 3.5",
+        "context_window": 200000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "multilingual"]
+    },
+    "claude-3-5-haiku-20241022": {
+        "name": "Claude Haiku 3.5",
+        "context_window": 200000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "fast", "multilingual"]
+    },
+    "claude-3-haiku-20240307": {
+        "name": "Claude Haiku 3",
+        "context_window": 200000,
+        "max_output_tokens": 4096,
+        "features": ["chat", "code", "vision", "fast", "multilingual"]
+    }
+}
+
+GEMINI_MODELS: Dict[str, dict] = {
+    # Gemini 2.5 Series (Latest with Thinking)
+    "gemini-2.5-pro": {
+        "name": "Gemini 2.5 Pro",
+        "context_window": 2000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "audio", "video", "thinking", "multimodal"]
+    },
+    "gemini-2.5-flash": {
+        "name": "Gemini 2.5 Flash",
+        "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "audio", "video", "thinking", "fast", "multimodal"]
+    },
+    "gemini-2.5-flash-lite-preview-06-17": {
+        "name": "Gemini 2.5 Flash Lite",
+        "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "audio", "video", "ultra_fast", "cost_effective", "multimodal"]
+    },
+    
+    # Gemini 2.0 Series
+    "gemini-2.0-flash": {
+        "name": "Gemini 2.0 Flash",
+        "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "audio", "video", "realtime", "fast", "multimodal"]
+    },
+    "gemini-2.0-flash-lite": {
+        "name": "Gemini 2.0 Flash Lite",
+        "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "audio", "video", "cost_effective", "fast", "multimodal"]
+    },
+    
+    # Gemini 1.5 Series (Deprecated)
+    "gemini-1.5-flash": {
+        "name": "Gemini 1.5 Flash",
+        "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "audio", "video", "fast", "multimodal", "deprecated"]
+    },
+    "gemini-1.5-flash-8b": {
+        "name": "Gemini 1.5 Flash 8B",
+        "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "audio", "video", "high_volume", "multimodal", "deprecated"]
+    },
+    "gemini-1.5-pro": {
+        "name": "Gemini 1.5 Pro",
+        "context_window": 2000000,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "vision", "audio", "video", "complex_reasoning", "multimodal", "deprecated"]
+    }
+}
+
+GROK_MODELS: Dict[str, dict] = {
+    # Grok 4 Series (Latest Reasoning Models)
+    "grok-4-0709": {
+        "name": "Grok 4",
+        "context_window": 256000,
+        "max_output_tokens": 32768,
+        "features": ["chat", "code", "reasoning", "advanced_reasoning", "function_calling", "structured_outputs"]
+    },
+    
+    # Grok 3 Series
+    "grok-3": {
+        "name": "Grok 3",
+        "context_window": 131072,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "reasoning", "vision", "function_calling", "structured_outputs"]
+    },
+    "grok-3-mini": {
+        "name": "Grok 3 Mini",
+        "context_window": 131072,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "reasoning", "fast", "efficient"]
+    },
+    "grok-3-fast": {
+        "name": "Grok 3 Fast",
+        "context_window": 131072,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "reasoning", "fast", "regional"]
+    },
+    "grok-3-mini-fast": {
+        "name": "Grok 3 Mini Fast",
+        "context_window": 131072,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "reasoning", "fast", "efficient", "ultra_fast"]
+    },
+    
+    # Grok 2 Series (Vision Models)
+    "grok-2-vision-1212": {
+        "name": "Grok 2 Vision",
+        "context_window": 32768,
+        "max_output_tokens": 8192,
+        "features": ["chat", "code", "reasoning", "vision", "function_calling", "structured_outputs"]
+    }
+}
+
+STATIC_CATALOGS: Dict[AIProvider, Dict[str, dict]] = {
+    AIProvider.OPENAI: OPENAI_MODELS,
+    AIProvider.ANTHROPIC: ANTHROPIC_MODELS,
+    AIProvider.GOOGLE: GEMINI_MODELS,
+    AIProvider.GROK: GROK_MODELS,
+}
+
+VENDOR_NAMES: Dict[AIProvider, str] = {
+    AIProvider.OPENAI: "OpenAI",
+    AIProvider.ANTHROPIC: "Anthropic",
+    AIProvider.GOOGLE: "Google",
+    AIProvider.GROK: "xAI",
+}
+
+
+def build_model_info(provider: AIProvider, model_id: str, info: dict) -> ModelInfo:
+    """Build the public ModelInfo for a catalog entry"""
+    return ModelInfo(
+        id=model_id,
+        name=info["name"],
+        provider=provider,
+        description=f"{VENDOR_NAMES[provider]} {info['name']} model",
+        context_window=info.get("context_window"),
+        max_output_tokens=info.get("max_output_tokens"),
+        supported_features=info.get("features", [])
+    )
@@ -1,73 +1,78 @@
-from typing import List, AsyncGenerator, Optional
+from collections import OrderedDict
+from datetime import timedelta
+from functools import partial
+from typing import Dict, List, AsyncGenerator, Optional, Tuple
 import google.generativeai as genai
+from google.generativeai import caching
 import asyncio
+import concurrent.futures
+import hashlib
+import sys
+import threading
+import time
 
 from .base import AIProviderBase
+from .catalog import GEMINI_MODELS, build_model_info
+from ..coalesce import SingleFlight
+from ..executor import BoundedThreadPool, ExecutorSaturatedError
 from ..models import ChatMessage, ChatResponse, ModelInfo, AIProvider
+from ..retry import is_retryable
+
+# Context caches are extended this long before they would expire, so
+# requests in flight never reference an expired cache
+CONTEXT_CACHE_REFRESH_MARGIN = 60.0
 
 
 class GeminiProvider(AIProviderBase):
     """Google Gemini provider implementation"""
     
-    MODELS = {
-        # Gemini 2.5 Series (Latest with Thinking)
-        "gemini-2.5-pro": {
-            "name": "Gemini 2.5 Pro",
-            "context_window": 2000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "audio", "video", "thinking", "multimodal"]
-        },
-        "gemini-2.5-flash": {
-            "name": "Gemini 2.5 Flash",
-            "context_window": 1000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "audio", "video", "thinking", "fast", "multimodal"]
-        },
-        "gemini-2.5-flash-lite-preview-06-17": {
-            "name": "Gemini 2.5 Flash Lite",
-            "context_window": 1000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "audio", "video", "ultra_fast", "cost_effective", "multimodal"]
-        },
-        
-        # Gemini 2.0 Series
-        "gemini-2.0-flash": {
-            "name": "Gemini 2.0 Flash",
-            "context_window": 1000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "audio", "video", "realtime", "fast", "multimodal"]
-        },
-        "gemini-2.0-flash-lite": {
-            "name": "Gemini 2.0 Flash Lite",
-            "context_window": 1000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "audio", "video", "cost_effective", "fast", "multimodal"]
-        },
-        
-        # Gemini 1.5 Series (Deprecated)
-        "gemini-1.5-flash": {
-            "name": "Gemini 1.5 Flash",
-            "context_window": 1000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "audio", "video", "fast", "multimodal", "deprecated"]
-        },
-        "gemini-1.5-flash-8b": {
-            "name": "Gemini 1.5 Flash 8B",
-            "context_window": 1000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "audio", "video", "high_volume", "multimodal", "deprecated"]
-        },
-        "gemini-1.5-pro": {
-            "name": "Gemini 1.5 Pro",
-            "context_window": 2000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "vision", "audio", "video", "complex_reasoning", "multimodal", "deprecated"]
-        }
-    }
+    MODELS = GEMINI_MODELS
     
-    def __init__(self, api_key: str, **kwargs):
+    def __init__(
+        self,
+        api_key: str,
+        stream_buffer_size: int = 32,
+        model_cache_size: int = 32,
+        max_workers: int = 8,
+        max_queue: int = 64,
+        prompt_cache: bool = True,
+        prompt_cache_min_tokens: int = 1024,
+        context_cache_min_tokens: int = 4096,
+        context_cache_ttl: int = 3600,
+        context_cache_size: int = 32,
+        **kwargs
+    ):
         super().__init__(api_key, **kwargs)
         genai.configure(api_key=api_key)
+        self.stream_buffer_size = stream_buffer_size
+        
+        # Gemini caches prompts only explicitly and bills cache storage by the
+        # hour, so it has its own, higher threshold than prompt_cache_min_tokens
+        self.prompt_cache = prompt_cache
+        self.context_cache_min_tokens = context_cache_min_tokens
+        self.context_cache_ttl = context_cache_ttl
+        self.context_cache_size = context_cache_size
+        # (cache, monotonic expiry) keyed by model and system prompt hash
+        self._context_caches: OrderedDict[str, Tuple[caching.CachedContent, float]] = OrderedDict()
+        self._context_cache_failures: Dict[str, float] = {}
+        self._context_cache_flight = SingleFlight()
+        self._context_cache_hits = 0
+        self._context_cache_created = 0
+        
+        # Dedicated pool for the synchronous SDK so Gemini bursts don't
+        # starve other users of the loop's default executor
+        self.executor = BoundedThreadPool(
+            "gemini",
+            max_workers=max_workers,
+            max_queue=max_queue
+        )
+        
+        # LRU cache of model handles keyed by (model, temperature, max_tokens)
+        self.model_cache_size = model_cache_size
+        self._model_cache: OrderedDict[Tuple, genai.GenerativeModel] = OrderedDict()
+        self._model_cache_hits = 0
+        self._model_cache_misses = 0
+        self._model_cache_evictions = 0
         
     @property
     def provider_name(self) -> AIProvider:
@@ -83,28 +88,29 @@ class GeminiProvider(AIProviderBase):
     ) -> ChatResponse | AsyncGenerator[str, None]:
         """Send chat messages to Gemini"""
         
-        # Initialize the model
-        generation_config = genai.GenerationConfig(
-            temperature=temperature,
-            max_output_tokens=max_tokens
-        )
+        gemini_model = None
+        system_prompt = self._cacheable_system_prompt(messages)
+        if system_prompt:
+            gemini_model = await self._get_cached_model(model, system_prompt, temperature, max_tokens)
         
-        gemini_model = genai.GenerativeModel(
-            model_name=model,
-            generation_config=generation_config
-        )
-        
-        # Convert messages to Gemini format
-        gemini_messages = self._convert_messages(messages)
+        if gemini_model is not None:
+            # The system prompt is read from the context cache
+            gemini_messages = self._convert_messages([msg for msg in messages if msg.role != "system"])
+        else:
+            gemini_model = self._get_model(model, temperature, max_tokens)
+            # Convert messages to Gemini format
+            gemini_messages = self._convert_messages(messages)
         
         try:
             if stream:
                 return self._stream_chat(gemini_model, gemini_messages, model)
             else:
-                # Run synchronous method in thread pool
-                response = await asyncio.to_thread(
+                # Run synchronous method in the dedicated thread pool
+                response = await self._make_request_with_retry(
+                    self.executor.run,
                     gemini_model.generate_content,
-                    gemini_messages
+                    gemini_messages,
+                    metrics_model=model
                 )
 
                 # Check if response was blocked or empty
@@ -138,11 +144,167 @@ class GeminiProvider(AIProviderBase):
                     usage={
                         "prompt_tokens": response.usage_metadata.prompt_token_count,
                         "completion_tokens": response.usage_metadata.candidates_token_count,
-                        "total_tokens": response.usage_metadata.total_token_count
+                        "total_tokens": response.usage_metadata.total_token_count,
+                        "cache_read_tokens": getattr(response.usage_metadata, "cached_content_token_count", 0)
                     } if hasattr(response, 'usage_metadata') else None
                 )
         except Exception as e:
-            raise Exception(f"Gemini API error: {str(e)}")
+            raise Exception(f"Gemini API error: {str(e)}") from e
+    
+    def _get_model(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> genai.GenerativeModel:
+        """Get a cached model handle for this generation config"""
+        key = (model, round(float(temperature), 4), max_tokens)
+        
+        gemini_model = self._model_cache.get(key)
+        if gemini_model is not None:
+            self._model_cache.move_to_end(key)
+            self._model_cache_hits += 1
+            return gemini_model
+        
+        self._model_cache_misses += 1
+        gemini_model = genai.GenerativeModel(
+            model_name=model,
+            generation_config=genai.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens
+            )
+        )
+        
+        if self.model_cache_size > 0:
+            self._model_cache[key] = gemini_model
+            while len(self._model_cache) > self.model_cache_size:
+                self._model_cache.popitem(last=False)
+                self._model_cache_evictions += 1
+                
+        return gemini_model
+    
+    def _cacheable_system_prompt(self, messages: List[ChatMessage]) -> Optional[str]:
+        """The system prompt, if it is long enough to be worth a context cache"""
+        if not self.prompt_cache:
+            return None
+        system = [msg.content for msg in messages if msg.role == "system"]
+        # Rough token estimate, ~4 characters per token
+        if len(system) == 1 and len(system[0]) >= self.context_cache_min_tokens * 4:
+            return system[0]
+        return None
+    
+    async def _get_cached_model(
+        self,
+        model: str,
+        system_prompt: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> Optional[genai.GenerativeModel]:
+        """Get a model handle that reads the system prompt from a context cache.
+        
+        Returns None if the cache can't be created, so the request is sent
+        uncached. After a non-transient failure creation isn't retried for the
+        same prompt until a TTL passes.
+        """
+        key = f"{model}:{hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()}"
+        now = time.monotonic()
+        failed_at = self._context_cache_failures.get(key)
+        if failed_at is not None and now - failed_at < self.context_cache_ttl:
+            return None
+        
+        entry = self._context_caches.get(key)
+        if entry is not None and entry[1] - now > CONTEXT_CACHE_REFRESH_MARGIN:
+            self._context_cache_hits += 1
+        else:
+            try:
+                entry = await self._context_cache_flight.do(
+                    key, lambda: self._create_context_cache(key, model, system_prompt)
+                )
+            except Exception as e:
+                print(f"Gemini context cache unavailable for {model}: {str(e)}", file=sys.stderr)
+                # Rate limits, server errors and a saturated pool pass; the
+                # next request with this prompt tries again
+                if not (is_retryable(e) or isinstance(e, ExecutorSaturatedError)):
+                    self._context_cache_failures = {
+                        failed_key: failed_at
+                        for failed_key, failed_at in self._context_cache_failures.items()
+                        if now - failed_at < self.context_cache_ttl
+                    }
+                    self._context_cache_failures[key] = now
+                return None
+        
+        if key in self._context_caches:
+            self._context_caches.move_to_end(key)
+        return genai.GenerativeModel.from_cached_content(
+            entry[0],
+            generation_config=genai.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens
+            )
+        )
+    
+    async def _create_context_cache(
+        self,
+        key: str,
+        model: str,
+        system_prompt: str
+    ) -> Tuple[caching.CachedContent, float]:
+        """Create a context cache, or extend the TTL of an expiring one"""
+        ttl = timedelta(seconds=self.context_cache_ttl)
+        entry = self._context_caches.get(key)
+        cached = None
+        if entry is not None:
+            try:
+                await self.executor.run(partial(entry[0].update, ttl=ttl))
+                cached = entry[0]
+            except Exception:
+                # Expired or deleted remotely; create a new one
+                pass
+        if cached is None:
+            cached = await self._make_request_with_retry(
+                self.executor.run,
+                partial(caching.CachedContent.create, model=model, system_instruction=system_prompt, ttl=ttl),
+                metrics_model=model
+            )
+            self._context_cache_created += 1
+        
+        entry = (cached, time.monotonic() + self.context_cache_ttl)
+        self._context_caches[key] = entry
+        self._context_cache_failures.pop(key, None)
+        while len(self._context_caches) > max(1, self.context_cache_size):
+            _, (evicted, _) = self._context_caches.popitem(last=False)
+            try:
+                # Stop paying for storage of caches we no longer use
+                self.executor.submit(evicted.delete).add_done_callback(self._context_cache_deleted)
+            except ExecutorSaturatedError:
+                # Left to expire at the end of its TTL
+                pass
+        return entry
+    
+    def _context_cache_deleted(self, future: asyncio.Future):
+        """Report a failed delete of an evicted context cache"""
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Failed to delete Gemini context cache: {str(future.exception())}", file=sys.stderr)
+    
+    def context_cache_stats(self) -> Dict[str, int]:
+        """Get counters for Gemini context caches"""
+        return {
+            "size": len(self._context_caches),
+            "max_size": self.context_cache_size,
+            "hits": self._context_cache_hits,
+            "created": self._context_cache_created,
+            "failures": len(self._context_cache_failures)
+        }
+    
+    def model_cache_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters for the model handle cache"""
+        return {
+            "size": len(self._model_cache),
+            "max_size": self.model_cache_size,
+            "hits": self._model_cache_hits,
+            "misses": self._model_cache_misses,
+            "evictions": self._model_cache_evictions
+        }
     
     def _convert_messages(self, messages: List[ChatMessage]) -> List[dict]:
         """Convert our message format to Gemini format"""
@@ -177,39 +339,84 @@ class GeminiProvider(AIProviderBase):
         messages: List[dict],
         model_name: str
     ) -> AsyncGenerator[str, None]:
-        """Stream chat responses"""
+        """Stream chat responses.
+
+        The SDK stream is synchronous, so a worker thread iterates it and
+        hands chunks to the event loop through a bounded queue. The worker
+        blocks while the queue is full and stops once the consumer goes away.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.stream_buffer_size)
+        stopped = threading.Event()
+        
+        def put(item) -> bool:
+            """Hand an item to the loop, waiting while the queue is full"""
+            try:
+                future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            except RuntimeError:
+                # Event loop already closed
+                return False
+            while not stopped.is_set():
+                try:
+                    future.result(timeout=0.1)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    continue
+            future.cancel()
+            return False
+        
+        def produce():
+            try:
+                response = model.generate_content(messages, stream=True)
+                for chunk in response:
+                    if stopped.is_set():
+                        return
+                    if chunk.text and not put(("chunk", chunk.text)):
+                        return
+                put(("done", None))
+            except Exception as e:
+                put(("error", e))
+        
         try:
-            # Run synchronous streaming in thread pool
-            response = await asyncio.to_thread(
-                model.generate_content,
-                messages,
-                stream=True
-            )
-            
-            for chunk in response:
-                if chunk.text:
-                    yield chunk.text
-                    
+            self.executor.submit(produce)
         except Exception as e:
-            raise Exception(f"Gemini streaming error: {str(e)}")
+            raise Exception(f"Gemini streaming error: {str(e)}") from e
+        
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "done":
+                    break
+                if kind == "error":
+                    raise Exception(f"Gemini streaming error: {str(value)}") from value
+                yield value
+        finally:
+            stopped.set()
     
     async def list_models(self) -> List[ModelInfo]:
         """List available Gemini models"""
-        models = []
-        
-        for model_id, info in self.MODELS.items():
-            models.append(ModelInfo(
-                id=model_id,
-                name=info["name"],
-                provider=self.provider_name,
-                description=f"Google {info['name']} model",
-                context_window=info["context_window"],
-                max_output_tokens=info["max_output_tokens"],
-                supported_features=info["features"]
-            ))
-            
-        return models
+        return [
+            build_model_info(self.provider_name, model_id, info)
+            for model_id, info in self.MODELS.items()
+        ]
     
     def validate_model(self, model: str) -> bool:
         """Check if model is valid for Gemini"""
-        return model in self.MODELS
\ No newline at end of file
+        return model in self.MODELS
+    
+    def stats(self) -> Dict[str, object]:
+        """Get retry, thread pool and model cache counters"""
+        return {
+            **super().stats(),
+            "executor": self.executor_stats(),
+            "model_cache": self.model_cache_stats(),
+            "context_cache": self.context_cache_stats()
+        }
+    
+    def executor_stats(self) -> Dict[str, int | float]:
+        """Get queue depth and saturation of the Gemini thread pool"""
+        return self.executor.stats()
+    
+    async def aclose(self):
+        """Shut down the Gemini thread pool"""
+        self.executor.shutdown()
\ No newline at end of file
@@ -1,59 +1,29 @@
 from typing import List, AsyncGenerator, Optional
 import httpx
 import json
+import sys
 
 from .base import AIProviderBase
+from .catalog import GROK_MODELS, build_model_info
 from ..models import ChatMessage, ChatResponse, ModelInfo, AIProvider
 
 
 class GrokProvider(AIProviderBase):
     """xAI Grok provider implementation"""
     
-    MODELS = {
-        # Grok 4 Series (Latest Reasoning Models)
-        "grok-4-0709": {
-            "name": "Grok 4",
-            "context_window": 256000,
-            "max_output_tokens": 32768,
-            "features": ["chat", "code", "reasoning", "advanced_reasoning", "function_calling", "structured_outputs"]
-        },
-        
-        # Grok 3 Series
-        "grok-3": {
-            "name": "Grok 3",
-            "context_window": 131072,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "reasoning", "vision", "function_calling", "structured_outputs"]
-        },
-        "grok-3-mini": {
-            "name": "Grok 3 Mini",
-            "context_window": 131072,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "reasoning", "fast", "efficient"]
-        },
-        "grok-3-fast": {
-            "name": "Grok 3 Fast",
-            "context_window": 131072,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "reasoning", "fast", "regional"]
-        },
-        "grok-3-mini-fast": {
-            "name": "Grok 3 Mini Fast",
-            "context_window": 131072,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "reasoning", "fast", "efficient", "ultra_fast"]
-        },
-        
-        # Grok 2 Series (Vision Models)
-        "grok-2-vision-1212": {
-            "name": "Grok 2 Vision",
-            "context_window": 32768,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "reasoning", "vision", "function_calling", "structured_outputs"]
-        }
-    }
+    MODELS = GROK_MODELS
     
-    def __init__(self, api_key: str, base_url: Optional[str] = None, **kwargs):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 60.0,
+        **kwargs
+    ):
         super().__init__(api_key, **kwargs)
         self.base_url = base_url or "https://api.x.ai/v1"
         self.headers = {
@@ -61,6 +31,26 @@ class GrokProvider(AIProviderBase):
             "Content-Type": "application/json"
         }
         
+        # HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 without it
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("h2 is not installed, Grok provider falling back to HTTP/1.1", file=sys.stderr)
+                http2 = False
+        
+        # Long-lived pooled client so connections are reused across requests
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            )
+        )
+        
     @property
     def provider_name(self) -> AIProvider:
         return AIProvider.GROK
@@ -100,87 +90,110 @@ class GrokProvider(AIProviderBase):
             payload["stream"] = True
             
         try:
-            async with httpx.AsyncClient() as client:
-                if stream:
-                    return self._stream_chat(client, payload, model)
-                else:
-                    response = await client.post(
-                        f"{self.base_url}/chat/completions",
-                        headers=self.headers,
-                        json=payload,
-                        timeout=60.0
-                    )
-                    response.raise_for_status()
-                    
-                    data = response.json()
-                    
-                    return ChatResponse(
-                        content=data["choices"][0]["message"]["content"],
-                        model=model,
-                        provider=self.provider_name,
-                        usage={
-                            "prompt_tokens": data["usage"]["prompt_tokens"],
-                            "completion_tokens": data["usage"]["completion_tokens"],
-                            "total_tokens": data["usage"]["total_tokens"]
-                        } if "usage" in data else None
-                    )
+            if stream:
+                return self._stream_chat(payload, model)
+            else:
+                response = await self._make_request_with_retry(self._post, payload, metrics_model=model)
+                data = response.json()
+                
+                return ChatResponse(
+                    content=data["choices"][0]["message"]["content"],
+                    model=model,
+                    provider=self.provider_name,
+                    usage={
+                        "prompt_tokens": data["usage"]["prompt_tokens"],
+                        "completion_tokens": data["usage"]["completion_tokens"],
+                        "total_tokens": data["usage"]["total_tokens"],
+                        # Grok caches prompt prefixes automatically
+                        "cache_read_tokens": (data["usage"].get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+                    } if data.get("usage") else None
+                )
         except httpx.HTTPStatusError as e:
-            raise Exception(f"Grok API HTTP error: {e.response.status_code} - {e.response.text}")
+            raise Exception(f"Grok API HTTP error: {e.response.status_code} - {e.response.text}") from e
         except Exception as e:
-            raise Exception(f"Grok API error: {str(e)}")
+            raise Exception(f"Grok API error: {str(e)}") from e
+    
+    async def _post(self, payload: dict) -> httpx.Response:
+        """POST a chat completion request, raising on HTTP errors"""
+        response = await self.client.post(
+            f"{self.base_url}/chat/completions",
+            json=payload
+        )
+        response.raise_for_status()
+        return response
+    
+    async def _open_stream(self, request: httpx.Request) -> httpx.Response:
+        """Send a streaming request, raising on HTTP errors"""
+        response = await self.client.send(request, stream=True)
+        if response.is_error:
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+            response.raise_for_status()
+        return response
     
     async def _stream_chat(
         self,
-        client: httpx.AsyncClient,
         payload: dict,
         model: str
     ) -> AsyncGenerator[str, None]:
-        """Stream chat responses"""
+        """Stream chat responses.
+
+        The generator owns its pooled connection from the first iteration
+        until it is exhausted, closed or cancelled, at which point the
+        connection goes back to the pool.
+        """
+        request = self.client.build_request(
+            "POST",
+            f"{self.base_url}/chat/completions",
+            json=payload
+        )
+        
         try:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload,
-                timeout=60.0
-            ) as response:
-                response.raise_for_status()
-                
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data_str = line[6:]
-                        if data_str == "[DONE]":
-                            break
-                            
-                        try:
-                            data = json.loads(data_str)
-                            if "choices" in data and len(data["choices"]) > 0:
-                                content = data["choices"][0].get("delta", {}).get("content")
-                                if content:
-                                    yield content
-                        except json.JSONDecodeError:
-                            continue
-                            
+            response = await self._make_request_with_retry(
+                self._open_stream, request, metrics_model=model
+            )
+        except httpx.HTTPStatusError as e:
+            raise Exception(f"Grok API HTTP error: {e.response.status_code} - {e.response.text}") from e
         except Exception as e:
-            raise Exception(f"Grok streaming error: {str(e)}")
+            raise Exception(f"Grok streaming error: {str(e)}") from e
+        
+        try:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                    
+                data_str = line[6:]
+                if data_str == "[DONE]":
+                    break
+                    
+                try:
+                    data = json.loads(data_str)
+                except json.JSONDecodeError:
+                    continue
+                    
+                if data.get("choices"):
+                    content = data["choices"][0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+                        
+        except httpx.HTTPError as e:
+            raise Exception(f"Grok streaming error: {str(e)}") from e
+        finally:
+            await response.aclose()
     
     async def list_models(self) -> List[ModelInfo]:
         """List available Grok models"""
-        models = []
-        
-        for model_id, info in self.MODELS.items():
-            models.append(ModelInfo(
-                id=model_id,
-                name=info["name"],
-                provider=self.provider_name,
-                description=f"xAI {info['name']} model",
-                context_window=info["context_window"],
-                max_output_tokens=info["max_output_tokens"],
-                supported_features=info["features"]
-            ))
-            
-        return models
+        return [
+            build_model_info(self.provider_name, model_id, info)
+            for model_id, info in self.MODELS.items()
+        ]
     
     def validate_model(self, model: str) -> bool:
         """Check if model is valid for Grok"""
-        return model in self.MODELS
\ No newline at end of file
+        return model in self.MODELS
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        await self.client.aclose()
\ No newline at end of file
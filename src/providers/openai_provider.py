@@ -1,143 +1,119 @@
-from typing import List, AsyncGenerator, Optional, Dict
+import hashlib
+import json
+from typing import Any, List, AsyncGenerator, Optional, Dict
 import openai
 from openai import AsyncOpenAI
 
 from .base import AIProviderBase
-from ..models import ChatMessage, ChatResponse, ModelInfo, AIProvider
+from .catalog import OPENAI_MODELS, build_model_info
+from ..models import (
+    ChatMessage, ChatResponse, ModelInfo, AIProvider, BatchRequest, BatchResult, ResponseChain
+)
+
+
+# OpenAI batch statuses mapped to the ones reported by AIProviderBase.get_batch
+BATCH_STATUSES = {
+    "validating": "in_progress",
+    "in_progress": "in_progress",
+    "finalizing": "in_progress",
+    "completed": "completed",
+    "failed": "failed",
+    "expired": "expired",
+    "cancelling": "cancelling",
+    "cancelled": "cancelled",
+}
+
+# Early reasoning models reject system (and developer) messages
+NO_SYSTEM_MESSAGE_MODELS = ("o1-mini", "o1-preview")
 
 
 class OpenAIProvider(AIProviderBase):
     """OpenAI GPT provider implementation"""
     
-    MODELS = {
-        # Flagship GPT Models
-        "gpt-4.1": {
-            "name": "GPT-4.1",
-            "context_window": 1000000,
-            "max_output_tokens": 32768,
-            "features": ["chat", "code", "vision", "audio", "json_mode", "massive_context"]
-        },
-        "gpt-4o": {
-            "name": "GPT-4o",
-            "context_window": 128000,
-            "max_output_tokens": 16384,
-            "features": ["chat", "code", "vision", "audio", "json_mode"]
-        },
-        "gpt-4o-audio-preview": {
-            "name": "GPT-4o Audio",
-            "context_window": 128000,
-            "max_output_tokens": 16384,
-            "features": ["chat", "code", "vision", "audio", "json_mode"]
-        },
-        "chatgpt-4o-latest": {
-            "name": "ChatGPT-4o",
-            "context_window": 128000,
-            "max_output_tokens": 16384,
-            "features": ["chat", "code", "vision", "audio", "json_mode"]
-        },
-        
-        # Cost-Optimized Models
-        "gpt-4.1-mini": {
-            "name": "GPT-4.1 Mini",
-            "context_window": 1000000,
-            "max_output_tokens": 16384,
-            "features": ["chat", "code", "vision", "audio", "json_mode", "massive_context", "fast"]
-        },
-        "gpt-4.1-nano": {
-            "name": "GPT-4.1 Nano",
-            "context_window": 1000000,
-            "max_output_tokens": 8192,
-            "features": ["chat", "code", "massive_context", "ultra_fast"]
-        },
-        "gpt-4o-mini": {
-            "name": "GPT-4o Mini",
-            "context_window": 128000,
-            "max_output_tokens": 16384,
-            "features": ["chat", "code", "vision", "json_mode", "fast"]
-        },
-        "gpt-4o-mini-audio-preview": {
-            "name": "GPT-4o Mini Audio",
-            "context_window": 128000,
-            "max_output_tokens": 16384,
-            "features": ["chat", "code", "vision", "audio", "json_mode", "fast"]
-        },
-        
-        # Reasoning Models (o-series)
-        "o4-mini": {
-            "name": "o4-mini",
-            "context_window": 200000,
-            "max_output_tokens": 65536,
-            "features": ["chat", "code", "reasoning", "advanced_reasoning", "fast"]
-        },
-        "o3": {
-            "name": "o3",
-            "context_window": 200000,
-            "max_output_tokens": 100000,
-            "features": ["chat", "code", "reasoning", "advanced_reasoning"]
-        },
-        "o3-pro": {
-            "name": "o3-pro",
-            "context_window": 200000,
-            "max_output_tokens": 100000,
-            "features": ["chat", "code", "reasoning", "advanced_reasoning", "deep_thinking"]
-        },
-        "o3-mini": {
-            "name": "o3-mini",
-            "context_window": 200000,
-            "max_output_tokens": 65536,
-            "features": ["chat", "code", "reasoning", "advanced_reasoning", "fast"]
-        },
-        "o1": {
-            "name": "o1",
-            "context_window": 200000,
-            "max_output_tokens": 100000,
-            "features": ["chat", "code", "reasoning", "advanced_reasoning"]
-        },
-        "o1-mini": {
-            "name": "o1-mini",
-            "context_window": 128000,
-            "max_output_tokens": 65536,
-            "features": ["chat", "code", "reasoning", "advanced_reasoning"]
-        },
-        "o1-pro": {
-            "name": "o1-pro",
-            "context_window": 200000,
-            "max_output_tokens": 100000,
-            "features": ["chat", "code", "reasoning", "advanced_reasoning", "deep_thinking"]
-        },
-        
-        # Older GPT Models
-        "gpt-4-turbo": {
-            "name": "GPT-4 Turbo",
-            "context_window": 128000,
-            "max_output_tokens": 4096,
-            "features": ["chat", "code", "vision", "json_mode"]
-        },
-        "gpt-4": {
-            "name": "GPT-4",
-            "context_window": 8192,
-            "max_output_tokens": 4096,
-            "features": ["chat", "code", "vision"]
-        },
-        "gpt-3.5-turbo": {
-            "name": "GPT-3.5 Turbo",
-            "context_window": 16385,
-            "max_output_tokens": 4096,
-            "features": ["chat", "code", "fast"]
-        }
-    }
+    MODELS = OPENAI_MODELS
+    supports_batch = True
+    supports_response_chaining = True
     
-    def __init__(self, api_key: str, base_url: Optional[str] = None, **kwargs):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        prompt_cache: bool = True,
+        prompt_cache_min_tokens: int = 1024,
+        responses_api: bool = True,
+        **kwargs
+    ):
         super().__init__(api_key, **kwargs)
+        # OpenAI caches prompt prefixes automatically; a cache key routes requests
+        # sharing a system prompt together. Compatible servers may reject it.
+        self.prompt_cache_key = prompt_cache and base_url is None
+        # Conversations are continued on the Responses API unless disabled;
+        # models (or servers) found not to support it use chat completions
+        self.responses_api = responses_api
+        self._responses_unsupported = set()
+        # Retries are handled by our own retry policy, not the SDK's
         self.client = AsyncOpenAI(
             api_key=api_key,
-            base_url=base_url
+            base_url=base_url,
+            max_retries=0
         )
         
     @property
     def provider_name(self) -> AIProvider:
         return AIProvider.OPENAI
     
+    def _build_params(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """Build chat completion parameters for the model type"""
+        # Convert our message format to OpenAI format
+        params = {
+            "model": model,
+            "messages": self._convert_messages(messages, model),
+        }
+        
+        # Reasoning models (o-series) use max_completion_tokens and don't support temperature
+        if model.startswith(('o1', 'o3', 'o4')):
+            if max_tokens:
+                params["max_completion_tokens"] = max_tokens
+        else:
+            # Regular models use max_tokens and temperature
+            params["temperature"] = temperature
+            if max_tokens:
+                params["max_tokens"] = max_tokens
+        
+        self._add_prompt_cache_key(params, messages, model)
+        return params
+    
+    def _convert_messages(self, messages: List[ChatMessage], model: str) -> List[Dict[str, str]]:
+        """Convert messages, sending system messages as user messages to models without them"""
+        system_role = "user" if model.startswith(NO_SYSTEM_MESSAGE_MODELS) else "system"
+        return [
+            {"role": system_role if msg.role == "system" else msg.role, "content": msg.content}
+            for msg in messages
+        ]
+    
+    def _add_prompt_cache_key(self, params: Dict[str, Any], messages: List[ChatMessage], model: str):
+        system = [msg.content for msg in messages if msg.role == "system"]
+        if self.prompt_cache_key and system:
+            params["prompt_cache_key"] = hashlib.sha256(
+                "\n".join([model, *system]).encode("utf-8")
+            ).hexdigest()[:32]
+    
+    def _usage(self, usage: openai.types.CompletionUsage) -> Dict[str, int]:
+        """Token usage, including prompt tokens read from the prompt cache"""
+        details = usage.prompt_tokens_details
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cache_read_tokens": (details.cached_tokens or 0) if details else 0
+        }
+    
     async def chat(
         self,
         messages: List[ChatMessage],
@@ -147,106 +123,228 @@ class OpenAIProvider(AIProviderBase):
         stream: bool = False
     ) -> ChatResponse | AsyncGenerator[str, None]:
         """Send chat messages to OpenAI"""
-        
-        # Convert our message format to OpenAI format
-        openai_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
+        params = self._build_params(messages, model, temperature, max_tokens)
         
         try:
-            # Reasoning models (o-series) use different parameters
-            is_reasoning_model = model.startswith(('o1', 'o3', 'o4'))
-
             if stream:
-                return self._stream_chat(
-                    openai_messages, model, temperature, max_tokens, is_reasoning_model
-                )
+                return self._stream_chat(params)
             else:
-                # Build parameters based on model type
-                params = {
-                    "model": model,
-                    "messages": openai_messages,
-                }
-
-                if is_reasoning_model:
-                    # Reasoning models use max_completion_tokens and don't support temperature
-                    if max_tokens:
-                        params["max_completion_tokens"] = max_tokens
-                else:
-                    # Regular models use max_tokens and temperature
-                    params["temperature"] = temperature
-                    if max_tokens:
-                        params["max_tokens"] = max_tokens
-
-                response = await self.client.chat.completions.create(**params)
+                response = await self._make_request_with_retry(
+                    self.client.chat.completions.create, **params
+                )
 
                 return ChatResponse(
                     content=response.choices[0].message.content,
                     model=model,
                     provider=self.provider_name,
-                    usage={
-                        "prompt_tokens": response.usage.prompt_tokens,
-                        "completion_tokens": response.usage.completion_tokens,
-                        "total_tokens": response.usage.total_tokens
-                    } if response.usage else None
+                    usage=self._usage(response.usage) if response.usage else None
                 )
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
+            raise Exception(f"OpenAI API error: {str(e)}") from e
     
-    async def _stream_chat(
-        self,
-        messages: List[Dict],
-        model: str,
-        temperature: float,
-        max_tokens: Optional[int],
-        is_reasoning_model: bool = False
-    ) -> AsyncGenerator[str, None]:
+    async def _stream_chat(self, params: Dict[str, Any]) -> AsyncGenerator[str, None]:
         """Stream chat responses"""
         try:
-            # Build parameters based on model type
-            params = {
-                "model": model,
-                "messages": messages,
-                "stream": True
-            }
-
-            if is_reasoning_model:
-                # Reasoning models use max_completion_tokens and don't support temperature
-                if max_tokens:
-                    params["max_completion_tokens"] = max_tokens
-            else:
-                # Regular models use max_tokens and temperature
-                params["temperature"] = temperature
-                if max_tokens:
-                    params["max_tokens"] = max_tokens
-
-            stream = await self.client.chat.completions.create(**params)
+            stream = await self._make_request_with_retry(
+                self.client.chat.completions.create, **params, stream=True
+            )
             
             async for chunk in stream:
                 if chunk.choices[0].delta.content is not None:
                     yield chunk.choices[0].delta.content
                     
         except Exception as e:
-            raise Exception(f"OpenAI streaming error: {str(e)}")
+            raise Exception(f"OpenAI streaming error: {str(e)}") from e
+    
+    async def respond(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        chain: Optional[ResponseChain] = None
+    ) -> ChatResponse:
+        """Continue a conversation on the Responses API.
+        
+        With a stored response to continue from, only the new messages are
+        sent. If that response has expired the whole conversation is sent
+        instead, and models the Responses API rejects fall back to chat
+        completions.
+        """
+        if not self.responses_api or model in self._responses_unsupported:
+            return await self.chat(messages, model, temperature, max_tokens)
+        
+        chain = chain or ResponseChain()
+        if chain.response_id and 0 < chain.message_count < len(messages):
+            try:
+                return await self._create_response(
+                    messages[chain.message_count:], model, temperature, max_tokens, chain.response_id
+                )
+            except Exception as e:
+                error = self._api_error(e)
+                if error is None or (
+                    error.code != "previous_response_not_found" and error.param != "previous_response_id"
+                ):
+                    raise
+        
+        try:
+            return await self._create_response(messages, model, temperature, max_tokens)
+        except Exception as e:
+            error = self._api_error(e)
+            if error is None or not (
+                error.status_code == 404 or (error.status_code == 400 and error.param == "model")
+            ):
+                raise
+            self._responses_unsupported.add(model)
+            return await self.chat(messages, model, temperature, max_tokens)
+    
+    def _api_error(self, e: Exception) -> Optional[openai.APIStatusError]:
+        """The SDK error behind a wrapped API error, if the API returned one"""
+        return e.__cause__ if isinstance(e.__cause__, openai.APIStatusError) else None
+    
+    async def _create_response(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        previous_response_id: Optional[str] = None
+    ) -> ChatResponse:
+        """Create a stored response from input messages"""
+        params = {
+            "model": model,
+            # System messages go in the input rather than instructions, which
+            # aren't carried over to chained responses
+            "input": self._convert_messages(messages, model),
+            "store": True
+        }
+        if previous_response_id:
+            params["previous_response_id"] = previous_response_id
+        if not model.startswith(('o1', 'o3', 'o4')):
+            params["temperature"] = temperature
+        if max_tokens:
+            params["max_output_tokens"] = max_tokens
+        self._add_prompt_cache_key(params, messages, model)
+        
+        try:
+            response = await self._make_request_with_retry(self.client.responses.create, **params)
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}") from e
+        
+        usage = response.usage
+        return ChatResponse(
+            content=response.output_text,
+            model=model,
+            provider=self.provider_name,
+            usage={
+                "prompt_tokens": usage.input_tokens,
+                "completion_tokens": usage.output_tokens,
+                "total_tokens": usage.total_tokens,
+                "cache_read_tokens": usage.input_tokens_details.cached_tokens or 0
+            } if usage else None,
+            response_id=response.id
+        )
+    
+    async def submit_batch(self, requests: List[BatchRequest]) -> str:
+        """Upload requests as a JSONL file and start a Batch API job"""
+        lines = [
+            json.dumps({
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_params(
+                    request.messages, request.model, request.temperature, request.max_tokens
+                )
+            })
+            for request in requests
+        ]
+        
+        try:
+            input_file = await self._make_request_with_retry(
+                self.client.files.create,
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = await self._make_request_with_retry(
+                self.client.batches.create,
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            return batch.id
+        except Exception as e:
+            raise Exception(f"OpenAI batch error: {str(e)}") from e
+    
+    async def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Get a Batch API job's status and request counts"""
+        try:
+            batch = await self._make_request_with_retry(self.client.batches.retrieve, batch_id)
+        except Exception as e:
+            raise Exception(f"OpenAI batch error: {str(e)}") from e
+        
+        counts = batch.request_counts
+        return {
+            "status": BATCH_STATUSES.get(batch.status, batch.status),
+            "counts": {
+                "total": counts.total,
+                "succeeded": counts.completed,
+                "failed": counts.failed
+            } if counts else {}
+        }
+    
+    async def batch_results(self, batch_id: str) -> AsyncGenerator[BatchResult, None]:
+        """Stream results line by line from the job's output and error files"""
+        try:
+            batch = await self._make_request_with_retry(self.client.batches.retrieve, batch_id)
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                async with self.client.files.with_streaming_response.content(file_id) as response:
+                    async for line in response.iter_lines():
+                        if line.strip():
+                            yield self._parse_batch_line(json.loads(line))
+        except Exception as e:
+            raise Exception(f"OpenAI batch error: {str(e)}") from e
+    
+    def _parse_batch_line(self, entry: Dict[str, Any]) -> BatchResult:
+        """Convert one line of a batch output or error file"""
+        response = entry.get("response") or {}
+        body = response.get("body") or {}
+        if response.get("status_code") == 200 and body.get("choices"):
+            usage = body.get("usage")
+            return BatchResult(
+                custom_id=entry["custom_id"],
+                response=ChatResponse(
+                    content=body["choices"][0]["message"].get("content") or "",
+                    model=body.get("model", ""),
+                    provider=self.provider_name,
+                    usage=self._usage(openai.types.CompletionUsage.model_validate(usage)) if usage else None
+                )
+            )
+        error = entry.get("error") or body.get("error") or {}
+        return BatchResult(
+            custom_id=entry["custom_id"],
+            error=error.get("message") or f"HTTP {response.get('status_code')}"
+        )
+    
+    async def cancel_batch(self, batch_id: str):
+        """Cancel a Batch API job"""
+        try:
+            await self._make_request_with_retry(self.client.batches.cancel, batch_id)
+        except Exception as e:
+            raise Exception(f"OpenAI batch error: {str(e)}") from e
     
     async def list_models(self) -> List[ModelInfo]:
         """List available OpenAI models"""
-        models = []
-        
-        for model_id, info in self.MODELS.items():
-            models.append(ModelInfo(
-                id=model_id,
-                name=info["name"],
-                provider=self.provider_name,
-                description=f"OpenAI {info['name']} model",
-                context_window=info["context_window"],
-                max_output_tokens=info["max_output_tokens"],
-                supported_features=info["features"]
-            ))
-            
-        return models
+        return [
+            build_model_info(self.provider_name, model_id, info)
+            for model_id, info in self.MODELS.items()
+        ]
     
     def validate_model(self, model: str) -> bool:
         """Check if model is valid for OpenAI"""
-        return model in self.MODELS
\ No newline at end of file
+        return model in self.MODELS
+    
+    async def aclose(self):
+        """Close the underlying OpenAI client"""
+        await self.client.close()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .models import AIProvider
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate.
+
+    The bucket holds `burst_seconds` worth of tokens, so at most that much
+    can go out at once and the rest is spread over the minute. A request
+    larger than the bucket waits for a full bucket and then leaves it in
+    debt, which later requests wait out.
+    """
+
+    def __init__(self, per_minute: int, burst_seconds: float = 5.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken from the bucket"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+
+class _Limit:
+    """Request and token buckets for one provider (or provider/model)"""
+
+    def __init__(self, rpm: Optional[int], tpm: Optional[int], burst_seconds: float):
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm else None
+        # asyncio.Lock wakes waiters in FIFO order, which keeps queueing fair
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.last_wait = 0.0
+        self.acquired = 0
+
+    def wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    def consume(self, tokens: int):
+        if self.requests:
+            self.requests.consume(1)
+        if self.tokens:
+            self.tokens.consume(tokens)
+
+
+class RateLimiter:
+    """Client-side requests-per-minute and tokens-per-minute limiter.
+
+    Limits are configured per provider; with per_model enabled every model
+    gets its own buckets with the provider's limits. Bursts are capped at
+    burst_seconds worth of the limit.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[AIProvider, Dict[str, Optional[int]]],
+        per_model: bool = False,
+        burst_seconds: float = 5.0
+    ):
+        self.limits = limits
+        self.per_model = per_model
+        self.burst_seconds = burst_seconds
+        self._buckets: Dict[Tuple[AIProvider, Optional[str]], _Limit] = {}
+
+    def _get_limit(self, provider: AIProvider, model: str) -> Optional[_Limit]:
+        config = self.limits.get(provider)
+        if not config or not (config.get("rpm") or config.get("tpm")):
+            return None
+        key = (provider, model if self.per_model else None)
+        limit = self._buckets.get(key)
+        if limit is None:
+            limit = _Limit(config.get("rpm"), config.get("tpm"), self.burst_seconds)
+            self._buckets[key] = limit
+        return limit
+
+    async def acquire(self, provider: AIProvider, model: str, tokens: int) -> float:
+        """Wait for capacity and take it, returning the seconds spent queued"""
+        limit = self._get_limit(provider, model)
+        if limit is None:
+            return 0.0
+
+        start = time.monotonic()
+        limit.waiting += 1
+        try:
+            async with limit.lock:
+                wait = limit.wait_time(tokens)
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = limit.wait_time(tokens)
+                limit.consume(tokens)
+        finally:
+            limit.waiting -= 1
+
+        waited = time.monotonic() - start
+        limit.last_wait = waited
+        limit.total_wait += waited
+        limit.acquired += 1
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and wait times for every active bucket"""
+        stats = {}
+        for (provider, model), limit in self._buckets.items():
+            name = f"{provider.value}/{model}" if model else provider.value
+            stats[name] = {
+                "waiting": limit.waiting,
+                "current_wait": round(limit.wait_time(0), 3),
+                "last_wait": round(limit.last_wait, 3),
+                "avg_wait": round(limit.total_wait / limit.acquired, 3) if limit.acquired else 0.0,
+                "acquired": limit.acquired,
+                "requests_available": max(0, int(limit.requests.tokens)) if limit.requests else None,
+                "tokens_available": max(0, int(limit.tokens.tokens)) if limit.tokens else None
+            }
+        return stats
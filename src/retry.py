@@ -0,0 +1,141 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception
+
+
+# Status codes worth retrying: timeouts, conflicts, rate limits, server errors
+# and Anthropic's 529 "overloaded"
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# Transport-level failures raised by httpx and the provider SDKs
+RETRYABLE_ERROR_NAMES = {
+    "TimeoutException", "ConnectTimeout", "ReadTimeout", "WriteTimeout", "PoolTimeout",
+    "ConnectError", "ReadError", "RemoteProtocolError",
+    "APIConnectionError", "APITimeoutError",
+}
+
+
+def _error_chain(exc: BaseException):
+    """Yield an exception and everything it was raised from"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def get_status_code(exc: BaseException) -> Optional[int]:
+    """Find the HTTP status code behind a (possibly wrapped) provider error"""
+    for error in _error_chain(exc):
+        status = getattr(error, "status_code", None)
+        if isinstance(status, int):
+            return status
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+        if isinstance(status, int):
+            return status
+        # google.api_core exceptions carry the HTTP status as .code
+        status = getattr(error, "code", None)
+        if isinstance(status, int) and 100 <= status < 600:
+            return status
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Classify an error: rate limits, 5xx and timeouts are retryable, other 4xx are not"""
+    status = get_status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    for error in _error_chain(exc):
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return True
+        if any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__):
+            return True
+    return False
+
+
+def get_retry_after(exc: BaseException) -> Optional[float]:
+    """Read the server's Retry-After hint in seconds, if any"""
+    for error in _error_chain(exc):
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if not headers:
+            continue
+        value = headers.get("retry-after-ms")
+        if value:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+    return None
+
+
+class DecorrelatedJitterWait:
+    """Decorrelated-jitter backoff that honors Retry-After and a total time budget"""
+
+    def __init__(self, base_delay: float, max_delay: float, budget: float):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self._previous = base_delay
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        delay = min(self.max_delay, random.uniform(self.base_delay, self._previous * 3))
+        self._previous = delay
+
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        retry_after = get_retry_after(exc) if exc else None
+        if retry_after is not None:
+            delay = retry_after
+
+        remaining = self.budget - retry_state.seconds_since_start
+        return max(0.0, min(delay, remaining))
+
+
+async def call_with_retry(
+    func: Callable,
+    *args: Any,
+    max_retries: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 20.0,
+    budget: float = 60.0,
+    on_retry: Optional[Callable[[RetryCallState], None]] = None,
+    **kwargs: Any
+) -> Any:
+    """Await func, retrying retryable errors with jittered backoff.
+
+    Gives up after max_retries retries or once the time budget is spent,
+    re-raising the last error.
+    """
+    wait = DecorrelatedJitterWait(base_delay, max_delay, budget)
+
+    def stop(retry_state: RetryCallState) -> bool:
+        if retry_state.attempt_number > max_retries:
+            return True
+        # Don't start a wait the budget can't cover
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        retry_after = get_retry_after(exc) if exc else None
+        remaining = budget - retry_state.seconds_since_start
+        return remaining <= 0 or (retry_after is not None and retry_after > remaining)
+
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception(is_retryable),
+        stop=stop,
+        wait=wait,
+        before_sleep=on_retry,
+        reraise=True
+    ):
+        with attempt:
+            return await func(*args, **kwargs)
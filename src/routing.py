@@ -0,0 +1,94 @@
+import re
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .models import AIProvider
+
+
+# Version/date suffixes that have a shorter alias, e.g.
+# claude-sonnet-4-20250514, grok-4-0709, gpt-4o-2024-08-06
+_SNAPSHOT_SUFFIX = re.compile(r"-(\d{8}|\d{4}-\d{2}-\d{2}|\d{4})$")
+
+
+class Route(NamedTuple):
+    provider: AIProvider
+    # ID sent to the provider API
+    model: str
+    # Catalog entry holding the model's metadata
+    catalog_id: str
+
+
+class _TrieNode:
+    __slots__ = ("children", "route")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.route: Optional[Route] = None
+
+
+class ModelRouter:
+    """Precomputed model-to-provider index.
+
+    Lookups try, in order: the exact model ID, an alias (the ID without
+    its date/version suffix, or with "-latest" in its place), and finally
+    the longest catalog ID that prefixes the model at a "-" boundary, so
+    snapshots like gpt-4o-2024-11-20 route to gpt-4o's provider.
+    """
+
+    def __init__(self, catalogs: Dict[AIProvider, Dict[str, dict]]):
+        self.rebuild(catalogs)
+
+    def rebuild(self, catalogs: Dict[AIProvider, Dict[str, dict]]):
+        """Rebuild the index, e.g. after a model catalog refresh"""
+        exact: Dict[str, Route] = {}
+        aliases: Dict[str, Tuple[str, Route]] = {}
+        trie = _TrieNode()
+
+        for provider, models in catalogs.items():
+            for model_id in models:
+                route = Route(provider, model_id, model_id)
+                exact[model_id] = route
+                exact.setdefault(model_id.lower(), route)
+
+                node = trie
+                for char in model_id.lower():
+                    node = node.children.setdefault(char, _TrieNode())
+                node.route = route
+
+                match = _SNAPSHOT_SUFFIX.search(model_id)
+                if match:
+                    base = model_id[:match.start()].lower()
+                    # Aliases point at the newest snapshot
+                    for alias in (base, f"{base}-latest"):
+                        current = aliases.get(alias)
+                        if current is None or match.group(1) > current[0]:
+                            aliases[alias] = (match.group(1), route)
+
+        self._exact = exact
+        self._aliases = {alias: route for alias, (_, route) in aliases.items()}
+        self._trie = trie
+
+    def resolve(self, model: str) -> Optional[Route]:
+        """Find the provider and canonical ID for a model name"""
+        route = self._exact.get(model)
+        if route is not None:
+            return route
+
+        key = model.lower()
+        route = self._exact.get(key) or self._aliases.get(key)
+        if route is not None:
+            return route
+
+        return self._longest_prefix(key, model)
+
+    def _longest_prefix(self, key: str, model: str) -> Optional[Route]:
+        best = None
+        node = self._trie
+        for index, char in enumerate(key):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.route is not None and index + 1 < len(key) and key[index + 1] == "-":
+                best = node.route
+        if best is None:
+            return None
+        return Route(best.provider, model, best.catalog_id)
@@ -1,25 +1,81 @@
 import asyncio
-from typing import List, Dict, Any
-from fastmcp import FastMCP
+import json
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager, aclosing
+from functools import partial
+from typing import List, Dict, Any, Optional
+from fastmcp import FastMCP, Context
 
-from .utils import load_environment
+from .utils import (
+    load_environment, get_compare_timeout, get_batch_config, get_batch_jobs_config,
+    get_session_config, get_metrics_config
+)
+from .fanout import fan_out
 from .provider_manager import ProviderManager
+from .batch_jobs import BatchJobManager, batch_custom_id
+from .providers.base import AIProviderBase
+from .sessions import SessionStore
+from .metrics import REGISTRY, current_tool, start_metrics_server
 from .models import (
     ChatMessage, ChatRequest, ChatResponse,
     CompareRequest, CompareResponse,
     AnalyzeRequest, GenerateRequest,
-    AIProvider
+    AIProvider, BatchRequest, ResponseChain
 )
 
 # Initialize environment
 load_environment()
 
-# Create MCP server
-mcp = FastMCP("AI API MCP Server")
-
 # Initialize provider manager
 provider_manager = ProviderManager()
 
+_batch_config = get_batch_config()
+batch_jobs = BatchJobManager(
+    provider_manager,
+    concurrency=_batch_config["concurrency"],
+    timeout=_batch_config["timeout"],
+    **get_batch_jobs_config()
+)
+sessions = SessionStore(**get_session_config())
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Run background work and release provider connections on shutdown"""
+    provider_manager.start_tokenizer()
+    provider_manager.start_discovery()
+    batch_jobs.resume()
+    metrics_server = await start_metrics_server(**get_metrics_config())
+    try:
+        yield {}
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+        await batch_jobs.aclose()
+        sessions.spill_all()
+        await provider_manager.aclose()
+
+
+# Create MCP server
+mcp = FastMCP("AI API MCP Server", lifespan=lifespan)
+
+# Instructions for the analyze tool, sent ahead of the content as a stable prefix
+ANALYSIS_INSTRUCTIONS = {
+    "code": "Analyze the code you are given and provide insights on quality, potential issues, and improvements.",
+    "text": "Analyze the text you are given for tone, clarity, structure, and key points.",
+    "security": "Analyze the code you are given for security vulnerabilities and provide recommendations.",
+    "performance": "Analyze the code you are given for performance issues and optimization opportunities.",
+    "general": "Provide a comprehensive analysis of the content you are given."
+}
+
+
+async def _no_provider(model: str):
+    """Placeholder call for models no provider can serve"""
+    raise ValueError(f"No provider found for model: {model}")
+
 
 @mcp.tool()
 async def chat(
@@ -28,7 +84,10 @@ async def chat(
     provider: str = None,
     temperature: float = 0.7,
     max_tokens: int = None,
-    stream: bool = False
+    stream: bool = False,
+    hedge_model: str = None,
+    session_id: str = None,
+    ctx: Optional[Context] = None
 ) -> Dict[str, Any]:
     """
     Chat with AI models from various providers
@@ -39,60 +98,137 @@ async def chat(
         provider: Optional provider name ('openai', 'anthropic', 'google', 'grok')
         temperature: Sampling temperature (0.0-2.0)
         max_tokens: Maximum tokens to generate
-        stream: Whether to stream the response
+        stream: Whether to stream the response. Chunks are forwarded as
+            progress notifications as they arrive when the client sends a
+            progress token; the full text is still returned at the end.
+        hedge_model: Optional backup model raced against a slow primary; the
+            first response wins (defaults to HEDGE_MODELS)
+        session_id: Optional conversation ID. The server keeps the session's
+            history, so messages only needs the new turn; the reply is added
+            to the history once it succeeds.
         
     Returns:
         Response with content, model info, and usage stats
     """
+    current_tool.set("chat")
     try:
         # Convert messages
         chat_messages = [ChatMessage(**msg) for msg in messages]
         
         # Get provider
         provider_enum = AIProvider(provider) if provider else None
-        ai_provider = provider_manager.get_provider_for_model(model, provider_enum)
+        ai_provider, model = provider_manager.resolve_model(model, provider_enum)
         
         if not ai_provider:
             return {"error": f"No provider found for model: {model}"}
         
-        # Make chat request
-        response = await ai_provider.chat(
-            messages=chat_messages,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=stream
-        )
+        if not session_id:
+            return await _chat_result(
+                ai_provider, chat_messages, model, temperature, max_tokens, stream, hedge_model, ctx
+            )
         
-        if stream:
-            # For streaming, collect all chunks
-            content = ""
-            async for chunk in response:
-                content += chunk
+        session = sessions.get(session_id)
+        async with session.lock:
+            # Providers that store conversations (OpenAI's Responses API) are
+            # only sent the turns added since their last stored response
+            target = f"{ai_provider.provider_name.value}:{model}"
+            chain = None
+            if ai_provider.supports_response_chaining and not stream:
+                chain = session.chain if session.chain_target == target else ResponseChain()
             
-            return {
-                "content": content,
-                "model": model,
-                "provider": ai_provider.provider_name.value
-            }
-        else:
-            return response.model_dump()
+            history = session.messages + chat_messages
+            result = await _chat_result(
+                ai_provider, history, model, temperature, max_tokens, stream, hedge_model, ctx, chain
+            )
+            session.append(chat_messages + [ChatMessage(role="assistant", content=result["content"])])
+            
+            # A reply from elsewhere (failover) or without a stored response ends the chain
+            response_id = result.get("response_id")
+            if response_id and result["provider"] == ai_provider.provider_name and result["model"] == model:
+                session.chain = ResponseChain(response_id=response_id, message_count=len(session.messages))
+                session.chain_target = target
+            else:
+                session.chain = None
+                session.chain_target = None
+            result["session_id"] = session_id
+            result["session_messages"] = len(session.messages)
+            return result
             
     except Exception as e:
         return {"error": str(e)}
 
 
+async def _chat_result(
+    ai_provider: AIProviderBase,
+    chat_messages: List[ChatMessage],
+    model: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    stream: bool,
+    hedge_model: Optional[str],
+    ctx: Optional[Context],
+    chain: Optional[ResponseChain] = None
+) -> Dict[str, Any]:
+    """Make a chat request and build the tool result"""
+    response = await provider_manager.chat(
+        ai_provider,
+        messages=chat_messages,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=stream,
+        hedge_model=hedge_model,
+        chain=chain
+    )
+    
+    if not stream:
+        return response.model_dump()
+    
+    # Forward each chunk to the client as it arrives and collect them
+    # for the final result. aclosing() releases the provider's
+    # connection even if this call is cancelled midway.
+    chunks: List[str] = []
+    received = 0
+    first_token_ms = None
+    started = time.perf_counter()
+    async with aclosing(response) as stream_chunks:
+        async for chunk in stream_chunks:
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+            chunks.append(chunk)
+            received += len(chunk)
+            if ctx is not None:
+                await ctx.report_progress(progress=received, message=chunk)
+    
+    # Hedging or failover may have served the stream from another model
+    return {
+        "content": "".join(chunks),
+        "model": response.model,
+        "provider": response.provider.value,
+        "first_token_ms": first_token_ms,
+        "clamped_max_tokens": response.clamped_max_tokens
+    }
+
+
 @mcp.tool()
-async def list_models() -> List[Dict[str, Any]]:
+async def list_models(
+    provider: str = None,
+    feature: str = None,
+    min_context_window: int = None
+) -> List[Dict[str, Any]]:
     """
     List all available AI models from all configured providers
     
+    Args:
+        provider: Only list models from this provider ('openai', 'anthropic', 'google', 'grok')
+        feature: Only list models supporting this feature (e.g. 'vision', 'reasoning')
+        min_context_window: Only list models with at least this many context tokens
+    
     Returns:
         List of model information including ID, name, provider, and capabilities
     """
     try:
-        models = await provider_manager.list_all_models()
-        return [model.model_dump() for model in models]
+        return provider_manager.catalog.list(provider, feature, min_context_window)
     except Exception as e:
         return [{"error": str(e)}]
 
@@ -102,7 +238,8 @@ async def compare(
     prompt: str,
     models: List[str],
     temperature: float = 0.7,
-    max_tokens: int = None
+    max_tokens: int = None,
+    timeout: float = None
 ) -> Dict[str, Any]:
     """
     Compare responses from multiple AI models
@@ -112,40 +249,47 @@ async def compare(
         models: List of model IDs to compare
         temperature: Sampling temperature
         max_tokens: Maximum tokens to generate
+        timeout: Per-model deadline in seconds (defaults to COMPARE_TIMEOUT)
         
     Returns:
-        Comparison results with responses from each model
+        Comparison results with responses from each model. Models that miss
+        the deadline are reported with an error and the rest are returned.
     """
+    current_tool.set("compare")
     try:
         responses = []
         
         # Create messages
         messages = [ChatMessage(role="user", content=prompt)]
         
-        # Run all requests concurrently
-        tasks = []
+        calls = []
         for model in models:
-            provider = provider_manager.get_provider_for_model(model)
+            provider, model_id = provider_manager.resolve_model(model)
             if provider:
-                task = provider.chat(
+                calls.append((model, partial(
+                    provider_manager.chat,
+                    provider,
                     messages=messages,
-                    model=model,
+                    model=model_id,
                     temperature=temperature,
                     max_tokens=max_tokens,
                     stream=False
-                )
-                tasks.append((model, task))
-        
-        # Wait for all responses
-        for model, task in tasks:
-            try:
-                response = await task
-                responses.append(response.model_dump())
-            except Exception as e:
-                responses.append({
-                    "model": model,
-                    "error": str(e)
-                })
+                )))
+            else:
+                calls.append((model, partial(_no_provider, model)))
+        
+        # Run all requests concurrently, each with its own deadline
+        results = await fan_out(calls, timeout=timeout or get_compare_timeout())
+        
+        for result in results:
+            if "result" in result:
+                response = result["result"].model_dump()
+            else:
+                response = {"model": result["key"], "error": result["error"]}
+                if result.get("timed_out"):
+                    response["timed_out"] = True
+            response["latency_ms"] = result["latency_ms"]
+            responses.append(response)
         
         return {
             "prompt": prompt,
@@ -156,6 +300,245 @@ async def compare(
         return {"error": str(e)}
 
 
+def _item_messages(item: Dict[str, Any]) -> List[ChatMessage]:
+    """Get the messages of a batch item given as a prompt or a message list"""
+    if "messages" in item:
+        return [ChatMessage(**msg) for msg in item["messages"]]
+    if "prompt" in item:
+        return [ChatMessage(role="user", content=item["prompt"])]
+    raise ValueError("Batch item needs 'prompt' or 'messages'")
+
+
+async def _batch_item(
+    item: Dict[str, Any],
+    model: str,
+    temperature: float,
+    max_tokens: int
+) -> ChatResponse:
+    """Run a single batch item"""
+    messages = _item_messages(item)
+    model = item.get("model") or model
+    if not model:
+        raise ValueError("No model given for batch item")
+    provider_enum = AIProvider(item["provider"]) if item.get("provider") else None
+    ai_provider, model_id = provider_manager.resolve_model(model, provider_enum)
+    if not ai_provider:
+        raise ValueError(f"No provider found for model: {model}")
+    
+    return await provider_manager.chat(
+        ai_provider,
+        messages=messages,
+        model=model_id,
+        temperature=item.get("temperature", temperature),
+        max_tokens=item.get("max_tokens", max_tokens),
+        stream=False
+    )
+
+
+@mcp.tool()
+async def batch(
+    items: List[Dict[str, Any]],
+    model: str = None,
+    temperature: float = 0.7,
+    max_tokens: int = None,
+    concurrency: int = None,
+    timeout: float = None,
+    ctx: Optional[Context] = None
+) -> Dict[str, Any]:
+    """
+    Run many prompts in one call with bounded concurrency
+    
+    Args:
+        items: List of items, each with either 'prompt' (string) or 'messages'
+            (list of message dicts) and optionally its own 'model', 'provider',
+            'temperature' and 'max_tokens'
+        model: Model ID for items that don't name one
+        temperature: Default sampling temperature
+        max_tokens: Default maximum tokens to generate
+        concurrency: Items in flight at once (defaults to BATCH_CONCURRENCY)
+        timeout: Per-item deadline in seconds (defaults to BATCH_TIMEOUT)
+        
+    Returns:
+        Results in input order plus aggregate throughput and token usage.
+        Each result is also sent as a progress notification when it finishes.
+    """
+    current_tool.set("batch")
+    try:
+        config = get_batch_config()
+        if len(items) > config["max_items"]:
+            return {"error": f"Batch has {len(items)} items, the limit is {config['max_items']}"}
+        concurrency = min(concurrency or config["concurrency"], config["max_concurrency"])
+        
+        calls = [
+            (item.get("model") or model, partial(_batch_item, item, model, temperature, max_tokens))
+            for item in items
+        ]
+        
+        results: List[Dict[str, Any]] = [None] * len(items)
+        completed = 0
+        
+        async def on_result(index: int, result: Dict[str, Any]):
+            nonlocal completed
+            if "result" in result:
+                entry = result["result"].model_dump(mode="json")
+            else:
+                entry = {"model": result["key"], "error": result["error"]}
+                if result.get("timed_out"):
+                    entry["timed_out"] = True
+            entry["index"] = index
+            entry["latency_ms"] = result["latency_ms"]
+            results[index] = entry
+            completed += 1
+            if ctx is not None:
+                await ctx.report_progress(
+                    progress=completed,
+                    total=len(items),
+                    message=json.dumps(entry)
+                )
+        
+        started = time.perf_counter()
+        await fan_out(
+            calls,
+            timeout=timeout or config["timeout"],
+            concurrency=concurrency,
+            on_result=on_result
+        )
+        elapsed = time.perf_counter() - started
+        
+        usage: Dict[str, int] = {}
+        for entry in results:
+            for name, count in (entry.get("usage") or {}).items():
+                usage[name] = usage.get(name, 0) + count
+        succeeded = sum(1 for entry in results if "error" not in entry)
+        
+        return {
+            "results": results,
+            "summary": {
+                "items": len(items),
+                "succeeded": succeeded,
+                "failed": len(items) - succeeded,
+                "concurrency": concurrency,
+                "elapsed_ms": round(elapsed * 1000, 1),
+                "items_per_second": round(len(items) / elapsed, 2) if elapsed else None,
+                "usage": usage,
+                "completion_tokens_per_second": (
+                    round(usage["completion_tokens"] / elapsed, 1)
+                    if elapsed and "completion_tokens" in usage else None
+                )
+            }
+        }
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def batch_submit(
+    items: List[Dict[str, Any]],
+    model: str,
+    provider: str = None,
+    temperature: float = 0.7,
+    max_tokens: int = None,
+    mode: str = "auto"
+) -> Dict[str, Any]:
+    """
+    Submit a large offline job to the provider's batch API
+    
+    Provider batch APIs (OpenAI Batch, Anthropic Message Batches) are cheaper
+    and have higher throughput, but finish within hours rather than seconds.
+    Other providers run the job as concurrent direct calls in the background.
+    
+    Args:
+        items: List of items, each with either 'prompt' (string) or 'messages'
+            (list of message dicts)
+        model: Model ID for all items
+        provider: Optional provider name
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate per item
+        mode: 'auto' (batch API when available), 'native' or 'direct'
+        
+    Returns:
+        The job, including its ID for batch_status and batch_results
+    """
+    current_tool.set("batch_submit")
+    try:
+        provider_enum = AIProvider(provider) if provider else None
+        ai_provider, model_id = provider_manager.resolve_model(model, provider_enum)
+        if not ai_provider:
+            return {"error": f"No provider found for model: {model}"}
+        
+        requests = [
+            BatchRequest(
+                custom_id=batch_custom_id(index),
+                messages=_item_messages(item),
+                model=model_id,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            for index, item in enumerate(items)
+        ]
+        return await batch_jobs.submit(ai_provider, requests, mode)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def batch_status(job_id: str = None) -> Dict[str, Any]:
+    """
+    Get the status of a batch job, or list all jobs
+    
+    Args:
+        job_id: Job ID from batch_submit; omit to list all jobs
+        
+    Returns:
+        Job status ('in_progress', 'completed', 'failed', 'expired',
+        'cancelling', 'cancelled') and request counts
+    """
+    try:
+        if job_id is None:
+            return {"jobs": batch_jobs.list()}
+        return await batch_jobs.status(job_id)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def batch_results(job_id: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """
+    Get a page of a batch job's results in input order
+    
+    Args:
+        job_id: Job ID from batch_submit
+        offset: Index of the first result to return
+        limit: Maximum number of results to return
+        
+    Returns:
+        The job, its results (each with its item 'index') and the offset of
+        the next page
+    """
+    try:
+        return await batch_jobs.results(job_id, offset, limit)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def batch_cancel(job_id: str) -> Dict[str, Any]:
+    """
+    Cancel a running batch job; results finished so far stay available
+    
+    Args:
+        job_id: Job ID from batch_submit
+        
+    Returns:
+        The updated job
+    """
+    try:
+        return await batch_jobs.cancel(job_id)
+    except Exception as e:
+        return {"error": str(e)}
+
+
 @mcp.tool()
 async def analyze(
     content: str,
@@ -175,27 +558,24 @@ async def analyze(
     Returns:
         Analysis results
     """
+    current_tool.set("analyze")
     try:
-        # Create analysis prompt based on type
-        prompts = {
-            "code": f"Analyze this code and provide insights on quality, potential issues, and improvements:\n\n{content}",
-            "text": f"Analyze this text for tone, clarity, structure, and key points:\n\n{content}",
-            "security": f"Analyze this code for security vulnerabilities and provide recommendations:\n\n{content}",
-            "performance": f"Analyze this code for performance issues and optimization opportunities:\n\n{content}",
-            "general": f"Provide a comprehensive analysis of the following:\n\n{content}"
-        }
-        
-        prompt = prompts.get(analysis_type, prompts["general"])
-        messages = [ChatMessage(role="user", content=prompt)]
+        # Static instructions go first so providers can cache the prompt prefix
+        instructions = ANALYSIS_INSTRUCTIONS.get(analysis_type, ANALYSIS_INSTRUCTIONS["general"])
+        messages = [
+            ChatMessage(role="system", content=instructions),
+            ChatMessage(role="user", content=content)
+        ]
         
         # Get provider
         provider_enum = AIProvider(provider) if provider else None
-        ai_provider = provider_manager.get_provider_for_model(model, provider_enum)
+        ai_provider, model = provider_manager.resolve_model(model, provider_enum)
         
         if not ai_provider:
             return {"error": f"No provider found for model: {model}"}
         
-        response = await ai_provider.chat(
+        response = await provider_manager.chat(
+            ai_provider,
             messages=messages,
             model=model,
             temperature=0.3,  # Lower temperature for analysis
@@ -206,7 +586,8 @@ async def analyze(
             "analysis": response.content,
             "type": analysis_type,
             "model": model,
-            "provider": ai_provider.provider_name.value
+            "provider": ai_provider.provider_name.value,
+            "cached": response.cached
         }
         
     except Exception as e:
@@ -236,34 +617,39 @@ async def generate(
     Returns:
         Generated content
     """
+    current_tool.set("generate")
     try:
-        # Enhance prompt based on generation type
-        enhanced_prompt = prompt
+        # Instructions based on generation type go before the request itself,
+        # so providers can cache the prompt prefix
+        instructions = []
         
         if generation_type == "code":
             if language:
-                enhanced_prompt = f"Generate {language} code:\n{prompt}"
+                instructions.append(f"Generate {language} code for the request.")
             if framework:
-                enhanced_prompt += f"\nUse {framework} framework/library."
+                instructions.append(f"Use {framework} framework/library.")
                 
         elif generation_type == "documentation":
-            enhanced_prompt = f"Generate comprehensive documentation for:\n{prompt}"
+            instructions.append("Generate comprehensive documentation for the request.")
             
         elif generation_type == "test":
-            enhanced_prompt = f"Generate test cases for:\n{prompt}"
+            instructions.append("Generate test cases for the request.")
             if language:
-                enhanced_prompt += f"\nUse {language} testing framework."
+                instructions.append(f"Use {language} testing framework.")
         
-        messages = [ChatMessage(role="user", content=enhanced_prompt)]
+        messages = [ChatMessage(role="user", content=prompt)]
+        if instructions:
+            messages.insert(0, ChatMessage(role="system", content="\n".join(instructions)))
         
         # Get provider
         provider_enum = AIProvider(provider) if provider else None
-        ai_provider = provider_manager.get_provider_for_model(model, provider_enum)
+        ai_provider, model = provider_manager.resolve_model(model, provider_enum)
         
         if not ai_provider:
             return {"error": f"No provider found for model: {model}"}
         
-        response = await ai_provider.chat(
+        response = await provider_manager.chat(
+            ai_provider,
             messages=messages,
             model=model,
             temperature=0.7,
@@ -276,15 +662,82 @@ async def generate(
             "model": model,
             "provider": ai_provider.provider_name.value,
             "language": language,
-            "framework": framework
+            "framework": framework,
+            "cached": response.cached
         }
         
     except Exception as e:
         return {"error": str(e)}
 
 
+@mcp.tool()
+async def clear_session(session_id: str) -> Dict[str, Any]:
+    """
+    Delete a chat session's server-side history
+    
+    Args:
+        session_id: Session ID previously passed to chat
+        
+    Returns:
+        Whether the session existed
+    """
+    try:
+        return {"session_id": session_id, "cleared": sessions.clear(session_id)}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def server_stats() -> Dict[str, Any]:
+    """
+    Get server load statistics for tuning limits
+    
+    Returns:
+        Admission control (running/queued/rejected requests), rate limiter
+        queues, response cache, request coalescing, per-provider counters and
+        request metrics (counts, errors by class, latency, time to first
+        token, output tokens per second, retries and in-flight calls) by
+        provider, model and tool
+    """
+    try:
+        return {
+            **provider_manager.get_stats(),
+            "batch_jobs": batch_jobs.stats(),
+            "sessions": sessions.stats(),
+            "metrics": REGISTRY.snapshot()
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _server_import_ms() -> float:
+    """Time a cold import of the server module in a fresh interpreter"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {__package__}.server; print((time.perf_counter() - started) * 1000)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def profile_startup():
+    """Report the cost of importing the server and each configured provider"""
+    print("Startup profile (ms):", file=sys.stderr)
+    print(f"  server modules       {_server_import_ms():8.1f}", file=sys.stderr)
+    
+    timings = provider_manager.preload()
+    for provider, timing in timings.items():
+        print(
+            f"  {provider:<10} import {timing['import_ms']:8.1f}   init {timing['init_ms']:8.1f}",
+            file=sys.stderr
+        )
+
+
 def main():
     """Run the MCP server"""
+    if "--profile-startup" in sys.argv:
+        profile_startup()
+        return
     mcp.run()
 
 
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .models import ChatMessage, ResponseChain
+
+
+class Session:
+    """One conversation's history, in the order it was sent"""
+
+    def __init__(self, session_id: str, messages: Optional[List[ChatMessage]] = None):
+        self.id = session_id
+        self.messages: List[ChatMessage] = messages or []
+        self.updated_at = time.time()
+        # Conversation state stored by the provider, and the "provider:model"
+        # it belongs to
+        self.chain: Optional[ResponseChain] = None
+        self.chain_target: Optional[str] = None
+        # Turns of one conversation are sent one after another
+        self.lock = asyncio.Lock()
+
+    def append(self, messages: List[ChatMessage]):
+        self.messages.extend(messages)
+
+
+class SessionStore:
+    """Server-side chat histories, so clients only send each new turn.
+
+    Sessions live in memory in LRU order and expire after `ttl` seconds
+    without use. With a spill directory, sessions pushed out of memory are
+    written to disk (and read back on their next turn) instead of being
+    dropped, and all sessions are saved there on shutdown.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 3600.0, spill_dir: Optional[str] = None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.spill_dir = os.path.expanduser(spill_dir) if spill_dir else None
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.spilled = 0
+        self.restored = 0
+
+    def _spill_path(self, session_id: str) -> str:
+        # Session IDs come from clients; never use them as file names
+        name = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{name}.json")
+
+    def _expired(self, session: Session) -> bool:
+        return time.time() - session.updated_at > self.ttl
+
+    def get(self, session_id: str) -> Session:
+        """Get a session, creating it if it doesn't exist or has expired"""
+        session = self._sessions.get(session_id)
+        if session is not None and self._expired(session) and not session.lock.locked():
+            self._drop(session_id)
+            self.expired += 1
+            session = None
+        if session is None:
+            session = self._restore(session_id)
+        if session is None:
+            session = Session(session_id)
+            self.created += 1
+        session.updated_at = time.time()
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        self._evict(keep=session_id)
+        return session
+
+    def clear(self, session_id: str) -> bool:
+        """Forget a session; returns whether it existed"""
+        existed = self._sessions.pop(session_id, None) is not None
+        if self.spill_dir:
+            try:
+                os.remove(self._spill_path(session_id))
+                existed = True
+            except FileNotFoundError:
+                pass
+        return existed
+
+    def _drop(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        if self.spill_dir:
+            try:
+                os.remove(self._spill_path(session_id))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, keep: Optional[str] = None):
+        """Expire idle sessions and push the least recently used out of memory.
+
+        `keep` is the session being handed out, which isn't locked yet but
+        is about to be used.
+        """
+        # Sessions are in order of last use, so expired ones are at the front
+        for session_id, session in list(self._sessions.items()):
+            if not self._expired(session):
+                break
+            if not session.lock.locked():
+                self._drop(session_id)
+                self.expired += 1
+
+        # Sessions in the middle of a turn stay in memory
+        idle = (
+            session for session in list(self._sessions.values())
+            if session.id != keep and not session.lock.locked()
+        )
+        while len(self._sessions) > self.max_sessions:
+            session = next(idle, None)
+            if session is None:
+                break
+            del self._sessions[session.id]
+            self.evicted += 1
+            if self.spill_dir:
+                self._spill(session)
+
+    def _spill(self, session: Session):
+        """Write a session to disk as compact [role, content] pairs"""
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = self._spill_path(session.id)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({
+                    "id": session.id,
+                    "updated_at": session.updated_at,
+                    "messages": [[msg.role, msg.content] for msg in session.messages],
+                    "chain": session.chain.model_dump() if session.chain else None,
+                    "chain_target": session.chain_target
+                }, f)
+            os.replace(f"{path}.tmp", path)
+            self.spilled += 1
+        except OSError as e:
+            print(f"Failed to spill session {session.id}: {str(e)}", file=sys.stderr)
+
+    def _restore(self, session_id: str) -> Optional[Session]:
+        """Read a spilled session back into memory"""
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(session_id)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        os.remove(path)
+
+        session = Session(session_id, [
+            ChatMessage.model_construct(role=role, content=content)
+            for role, content in data["messages"]
+        ])
+        session.updated_at = data["updated_at"]
+        if data.get("chain"):
+            session.chain = ResponseChain(**data["chain"])
+            session.chain_target = data.get("chain_target")
+        if self._expired(session):
+            self.expired += 1
+            return None
+        self.restored += 1
+        return session
+
+    def spill_all(self):
+        """Save every session to disk, e.g. on shutdown, and delete expired spills"""
+        if not self.spill_dir:
+            return
+        for session in self._sessions.values():
+            if not self._expired(session):
+                self._spill(session)
+        if not os.path.isdir(self.spill_dir):
+            return
+        for name in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, name)
+            try:
+                if time.time() - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "restored": self.restored
+        }
@@ -0,0 +1,145 @@
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import AIProvider, ChatMessage
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Tokens added per message for role and formatting, and once per request
+# to prime the reply
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+
+# ASCII characters per token for the heuristic, by provider: typical values
+# for English prose and code. Claude's tokenizer splits the same text into
+# noticeably more tokens.
+CHARS_PER_TOKEN = {
+    AIProvider.OPENAI: 4.0,
+    AIProvider.GROK: 4.0,
+    AIProvider.GOOGLE: 4.2,
+    AIProvider.ANTHROPIC: 3.5,
+}
+
+# tiktoken encodings of the GPT-4 and later models
+ENCODINGS = ("o200k_base", "cl100k_base")
+
+TRUNCATION_MARKER = "\n\n[... truncated to fit the model's context window]"
+
+
+class ContextLengthError(ValueError):
+    """Raised before sending a request that can't fit the model's context window"""
+    pass
+
+
+class TokenEstimator:
+    """Fast local prompt token counts.
+
+    OpenAI models are counted exactly with tiktoken once its encodings have
+    been loaded (see load_encodings); everything else, and OpenAI models
+    until then, uses a per-provider character heuristic. Counts are memoized
+    per message content, so conversations and documents sent repeatedly are
+    only counted once.
+    """
+
+    def __init__(self, memo_size: int = 4096):
+        self.memo_size = memo_size
+        # Keyed by (counter, hash(content), len(content)) so the memo never
+        # holds on to large prompts
+        self._memo: OrderedDict[Tuple, int] = OrderedDict()
+        self._encodings: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load_encodings(self):
+        """Load the tiktoken encodings used by current OpenAI models.
+
+        tiktoken downloads encodings on first use (then reads them from its
+        local cache), so this blocks and must run off the event loop.
+        """
+        if tiktoken is None:
+            return
+        for name in ENCODINGS:
+            try:
+                self._encodings[name] = tiktoken.get_encoding(name)
+            except Exception as e:
+                print(
+                    f"tiktoken encoding {name} unavailable, estimating tokens heuristically: {str(e)}",
+                    file=sys.stderr
+                )
+
+    def _encoding(self, model: str) -> Optional[Any]:
+        """Loaded tiktoken encoding for an OpenAI model, or None"""
+        if not self._encodings:
+            return None
+        try:
+            name = tiktoken.encoding_name_for_model(model)
+        except KeyError:
+            # Newer models than tiktoken knows about share o200k_base
+            name = "o200k_base"
+        return self._encodings.get(name)
+
+    def is_exact(self, provider: AIProvider, model: str) -> bool:
+        """Whether counts for this model come from its real tokenizer"""
+        return provider == AIProvider.OPENAI and self._encoding(model) is not None
+
+    def count_text(self, provider: AIProvider, model: str, text: str) -> int:
+        """Token count for one piece of text"""
+        encoding = self._encoding(model) if provider == AIProvider.OPENAI else None
+        counter = encoding.name if encoding else provider.value
+        key = (counter, hash(text), len(text))
+        tokens = self._memo.get(key)
+        if tokens is not None:
+            self._memo.move_to_end(key)
+            self.hits += 1
+            return tokens
+
+        self.misses += 1
+        if encoding is not None:
+            tokens = len(encoding.encode(text, disallowed_special=()))
+        else:
+            tokens = self._heuristic(provider, text)
+        if self.memo_size > 0:
+            self._memo[key] = tokens
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return tokens
+
+    def _heuristic(self, provider: AIProvider, text: str) -> int:
+        # Non-ASCII text (CJK in particular) is close to a token per character
+        ascii_chars = len(text) if text.isascii() else len(text.encode("ascii", "ignore"))
+        other_chars = len(text) - ascii_chars
+        return int(ascii_chars / CHARS_PER_TOKEN.get(provider, 4.0) + other_chars + 0.5)
+
+    def count_messages(self, provider: AIProvider, model: str, messages: List[ChatMessage]) -> int:
+        """Prompt token count for a list of messages"""
+        return REPLY_OVERHEAD + sum(
+            MESSAGE_OVERHEAD + self.count_text(provider, model, msg.content)
+            for msg in messages
+        )
+
+    def truncate(self, provider: AIProvider, model: str, text: str, max_tokens: int) -> str:
+        """Cut text from the end until it fits in max_tokens"""
+        tokens = self.count_text(provider, model, text)
+        if tokens <= max_tokens:
+            return text
+        keep = len(text)
+        while keep > 0:
+            # Shrink proportionally, a little more than needed each round
+            keep = int(keep * max_tokens / tokens * 0.95)
+            truncated = text[:keep] + TRUNCATION_MARKER
+            tokens = self.count_text(provider, model, truncated)
+            if tokens <= max_tokens:
+                return truncated
+        return ""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokenizer": "tiktoken" if self._encodings else "heuristic",
+            "memo_size": len(self._memo),
+            "hits": self.hits,
+            "misses": self.misses
+        }
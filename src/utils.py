@@ -34,38 +34,228 @@ def get_provider_config() -> Dict[AIProvider, Dict[str, str]]:
         if api_key:
             config[provider] = {"api_key": api_key}
             
-            # Add custom base URLs if specified
-            if provider == AIProvider.OPENAI:
-                base_url = os.getenv("OPENAI_BASE_URL")
-                if base_url:
-                    config[provider]["base_url"] = base_url
-            elif provider == AIProvider.GROK:
-                base_url = os.getenv("GROK_BASE_URL")
-                if base_url:
-                    config[provider]["base_url"] = base_url
+            # Add custom base URLs if specified (OPENAI_BASE_URL, GROK_BASE_URL,
+            # ANTHROPIC_BASE_URL; GOOGLE_BASE_URL only affects model discovery)
+            base_url = os.getenv(f"{provider.value.upper()}_BASE_URL")
+            if base_url:
+                config[provider]["base_url"] = base_url
                     
     return config
 
 
-def extract_provider_from_model(model: str) -> Optional[AIProvider]:
-    """Try to determine provider from model name"""
-    model_lower = model.lower()
-    
-    if "gpt" in model_lower or "davinci" in model_lower or "curie" in model_lower:
-        return AIProvider.OPENAI
-    elif "claude" in model_lower:
-        return AIProvider.ANTHROPIC
-    elif "gemini" in model_lower:
-        return AIProvider.GOOGLE
-    elif "grok" in model_lower:
-        return AIProvider.GROK
-        
-    return None
-
-
 def get_retry_config() -> Dict[str, int | float]:
     """Get retry configuration from environment"""
     return {
         "max_retries": int(os.getenv("MAX_RETRIES", "3")),
-        "retry_delay": float(os.getenv("RETRY_DELAY", "1.0"))
-    }
\ No newline at end of file
+        "retry_delay": float(os.getenv("RETRY_DELAY", "1.0")),
+        "retry_max_delay": float(os.getenv("RETRY_MAX_DELAY", "20.0")),
+        "retry_budget": float(os.getenv("RETRY_BUDGET", "60.0"))
+    }
+
+def get_compare_timeout() -> float:
+    """Get per-model deadline (seconds) for the compare tool"""
+    return float(os.getenv("COMPARE_TIMEOUT", "120"))
+
+
+def get_batch_config() -> Dict[str, int | float]:
+    """Get concurrency, size and per-item deadline limits for the batch tool"""
+    return {
+        "concurrency": int(os.getenv("BATCH_CONCURRENCY", "8")),
+        "max_concurrency": int(os.getenv("BATCH_MAX_CONCURRENCY", "32")),
+        "max_items": int(os.getenv("BATCH_MAX_ITEMS", "1000")),
+        "timeout": float(os.getenv("BATCH_TIMEOUT", "120"))
+    }
+
+
+def get_batch_jobs_config() -> Dict[str, str | float]:
+    """Get storage and polling configuration for provider batch jobs"""
+    return {
+        "directory": os.getenv("BATCH_JOBS_DIR", "~/.cache/ai-api-mcp/batches"),
+        "poll_interval": float(os.getenv("BATCH_POLL_INTERVAL", "10")),
+        "max_poll_interval": float(os.getenv("BATCH_MAX_POLL_INTERVAL", "120"))
+    }
+
+
+def get_grok_http_config() -> Dict[str, int | float | bool]:
+    """Get connection pool configuration for the Grok HTTP client"""
+    return {
+        "max_connections": int(os.getenv("GROK_MAX_CONNECTIONS", "100")),
+        "max_keepalive_connections": int(os.getenv("GROK_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        "keepalive_expiry": float(os.getenv("GROK_KEEPALIVE_EXPIRY", "30.0")),
+        "http2": os.getenv("GROK_HTTP2", "true").lower() in ("1", "true", "yes"),
+        "timeout": float(os.getenv("GROK_TIMEOUT", "60.0"))
+    }
+
+
+def get_gemini_config() -> Dict[str, int]:
+    """Get Gemini provider tuning from environment"""
+    return {
+        "stream_buffer_size": int(os.getenv("GEMINI_STREAM_BUFFER_SIZE", "32")),
+        "model_cache_size": int(os.getenv("GEMINI_MODEL_CACHE_SIZE", "32")),
+        "max_workers": int(os.getenv("GEMINI_MAX_WORKERS", "8")),
+        "max_queue": int(os.getenv("GEMINI_MAX_QUEUE", "64")),
+        "context_cache_min_tokens": int(os.getenv("GEMINI_CACHE_MIN_TOKENS", "4096")),
+        "context_cache_ttl": int(os.getenv("GEMINI_CACHE_TTL", "3600")),
+        "context_cache_size": int(os.getenv("GEMINI_CACHE_SIZE", "32"))
+    }
+
+
+def get_openai_config() -> Dict[str, bool]:
+    """Get OpenAI provider options from environment"""
+    return {
+        "responses_api": os.getenv("OPENAI_RESPONSES_API", "true").lower() in ("1", "true", "yes")
+    }
+
+
+def get_prompt_cache_config() -> Dict[str, bool | int]:
+    """Get provider-side prompt caching configuration from environment"""
+    return {
+        "prompt_cache": os.getenv("PROMPT_CACHE", "true").lower() in ("1", "true", "yes"),
+        "prompt_cache_min_tokens": int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+    }
+
+
+def get_preflight_config() -> Dict[str, str | int | float]:
+    """Get context window preflight configuration from environment"""
+    mode = os.getenv("PREFLIGHT_MODE", "reject").lower()
+    if mode not in ("reject", "trim", "off"):
+        raise ValueError(f"PREFLIGHT_MODE must be reject, trim or off, not {mode}")
+    return {
+        "mode": mode,
+        "min_output_tokens": int(os.getenv("PREFLIGHT_MIN_OUTPUT_TOKENS", "256")),
+        # Relative error allowed for estimated (not exactly counted) prompts
+        "margin": float(os.getenv("PREFLIGHT_MARGIN", "0.35")),
+        "memo_size": int(os.getenv("TOKEN_MEMO_SIZE", "4096"))
+    }
+
+
+def get_session_config() -> Dict[str, int | float | Optional[str]]:
+    """Get chat session store configuration from environment"""
+    return {
+        "max_sessions": int(os.getenv("SESSION_MAX", "1000")),
+        "ttl": float(os.getenv("SESSION_TTL", "3600")),
+        "spill_dir": os.getenv("SESSION_SPILL_DIR") or None
+    }
+
+
+def get_metrics_config() -> Dict[str, str | Optional[int]]:
+    """Get Prometheus metrics endpoint configuration from environment"""
+    port = os.getenv("METRICS_PORT")
+    return {
+        "host": os.getenv("METRICS_HOST", "127.0.0.1"),
+        "port": int(port) if port else None
+    }
+
+
+def get_cache_config() -> Dict[str, str | int | float]:
+    """Get response cache configuration from environment"""
+    return {
+        "backend": os.getenv("RESPONSE_CACHE", "off").lower(),
+        "ttl": float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        "max_bytes": int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        "path": os.getenv("RESPONSE_CACHE_PATH", "~/.cache/ai-api-mcp/responses.sqlite3")
+    }
+
+
+def get_coalescing_enabled() -> bool:
+    """Whether identical in-flight requests share a single provider call"""
+    return os.getenv("REQUEST_COALESCING", "true").lower() in ("1", "true", "yes")
+
+
+def get_share_max_temperature() -> float:
+    """Highest temperature at which identical requests may share a response"""
+    return float(os.getenv("SHARE_MAX_TEMPERATURE", "2.0"))
+
+
+def _optional_int(env_var: str) -> Optional[int]:
+    """Read an optional positive integer from the environment"""
+    value = os.getenv(env_var)
+    return int(value) if value and int(value) > 0 else None
+
+
+def get_rate_limit_config() -> Dict[str, object]:
+    """Get client-side rate limits (e.g. OPENAI_RPM, OPENAI_TPM) from environment"""
+    limits = {}
+    for provider in AIProvider:
+        prefix = provider.value.upper()
+        limits[provider] = {
+            "rpm": _optional_int(f"{prefix}_RPM"),
+            "tpm": _optional_int(f"{prefix}_TPM")
+        }
+    return {
+        "limits": limits,
+        "per_model": os.getenv("RATE_LIMIT_PER_MODEL", "false").lower() in ("1", "true", "yes"),
+        "burst_seconds": float(os.getenv("RATE_LIMIT_BURST_SECONDS", "5"))
+    }
+
+
+def get_admission_config() -> Dict[str, object]:
+    """Get global and per-provider concurrency limits from environment"""
+    # 0 disables the global limit
+    max_concurrent = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+    max_queued = int(os.getenv("MAX_QUEUED_REQUESTS", "256"))
+    provider_limits = {}
+    for provider in AIProvider:
+        prefix = provider.value.upper()
+        provider_limits[provider] = {
+            "max_concurrent": _optional_int(f"{prefix}_MAX_CONCURRENT"),
+            "max_queued": _optional_int(f"{prefix}_MAX_QUEUED")
+        }
+    return {
+        "max_concurrent": max_concurrent if max_concurrent > 0 else None,
+        "max_queued": max_queued,
+        "provider_limits": provider_limits
+    }
+
+
+def get_discovery_config() -> Dict[str, str | float | bool]:
+    """Get live model discovery configuration from environment"""
+    return {
+        "enabled": os.getenv("MODEL_DISCOVERY", "false").lower() in ("1", "true", "yes"),
+        "interval": float(os.getenv("MODEL_DISCOVERY_INTERVAL", "3600")),
+        "snapshot_path": os.getenv("MODEL_DISCOVERY_CACHE", "~/.cache/ai-api-mcp/models.json"),
+        "timeout": float(os.getenv("MODEL_DISCOVERY_TIMEOUT", "10"))
+    }
+
+
+def _model_map(env_var: str) -> Dict[str, str]:
+    """Read a model=model,... mapping, e.g. gpt-4o=claude-sonnet-4"""
+    mapping = {}
+    for pair in os.getenv(env_var, "").split(","):
+        if "=" in pair:
+            model, other = pair.split("=", 1)
+            mapping[model.strip()] = other.strip()
+    return mapping
+
+
+def get_hedge_config() -> Dict[str, object]:
+    """Get request hedging configuration from environment"""
+    return {
+        "backups": _model_map("HEDGE_MODELS"),
+        "percentile": float(os.getenv("HEDGE_PERCENTILE", "95")),
+        "min_delay": float(os.getenv("HEDGE_MIN_DELAY", "0.5")),
+        "default_delay": float(os.getenv("HEDGE_DEFAULT_DELAY", "2.0")),
+        "min_samples": int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    }
+
+
+def get_circuit_breaker_config() -> Dict[str, object]:
+    """Get circuit breaker thresholds from environment"""
+    # Slow calls only trip the breaker when a threshold is set
+    slow_call_seconds = os.getenv("CIRCUIT_SLOW_CALL_SECONDS")
+    return {
+        "enabled": os.getenv("CIRCUIT_BREAKER", "true").lower() in ("1", "true", "yes"),
+        "per_model": os.getenv("CIRCUIT_BREAKER_PER_MODEL", "true").lower() in ("1", "true", "yes"),
+        "failure_rate": float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")),
+        "slow_call_rate": float(os.getenv("CIRCUIT_SLOW_CALL_RATE", "0.5")),
+        "slow_call_seconds": float(slow_call_seconds) if slow_call_seconds else None,
+        "min_calls": int(os.getenv("CIRCUIT_MIN_CALLS", "10")),
+        "window": int(os.getenv("CIRCUIT_WINDOW", "20")),
+        "open_seconds": float(os.getenv("CIRCUIT_OPEN_SECONDS", "30")),
+        "half_open_calls": int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "2"))
+    }
+
+
+def get_failover_models() -> Dict[str, str]:
+    """Get equivalent models to fail over to (FAILOVER_MODELS=model=fallback,...)"""
+    return _model_map("FAILOVER_MODELS")
@@ -0,0 +1,83 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+class FakeAPI:
+    """Local HTTP stand-in for provider APIs.
+
+    Routes map (method, path) to a handler taking the recorded request and
+    returning (status, body); dict and list bodies are sent as JSON, str
+    bodies as text. Every request is recorded in `requests`.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Tuple[int, Any]]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def route(self, method: str, path: str, handler: Callable[[Dict[str, Any]], Tuple[int, Any]]):
+        self.routes[(method, path)] = handler
+
+    def json_route(self, method: str, path: str, body: Any, status: int = 200):
+        self.route(method, path, lambda request: (status, body))
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method: str):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                request = {
+                    "method": method,
+                    "path": url.path,
+                    "query": {key: values[-1] for key, values in parse_qs(url.query).items()},
+                    "headers": dict(self.headers),
+                    "body": self.rfile.read(length) if length else b""
+                }
+                api.requests.append(request)
+                handler = api.routes.get((method, url.path))
+                if handler is None:
+                    status, body = 404, {"error": {"message": f"No route for {method} {url.path}"}}
+                else:
+                    status, body = handler(request)
+                if isinstance(body, (dict, list)):
+                    payload, content_type = json.dumps(body).encode("utf-8"), "application/json"
+                else:
+                    payload, content_type = str(body).encode("utf-8"), "text/plain"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        return Handler
+
+
+@pytest.fixture
+def fake_api():
+    api = FakeAPI()
+    yield api
+    api.close()
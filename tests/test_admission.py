@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from src.admission import AdmissionController, OverloadedError
+from src.models import AIProvider, ChatMessage, ChatResponse
+from src.provider_manager import ProviderManager
+from src.providers.base import AIProviderBase
+
+
+def limits(**per_provider):
+    return {provider: per_provider.get(provider.value, {}) for provider in AIProvider}
+
+
+async def test_requests_beyond_the_queue_are_rejected():
+    admission = AdmissionController(max_concurrent=1, max_queued=1, provider_limits=limits())
+    await admission.acquire(AIProvider.OPENAI)
+    queued = asyncio.create_task(admission.acquire(AIProvider.OPENAI))
+    await asyncio.sleep(0)
+
+    with pytest.raises(OverloadedError):
+        await admission.acquire(AIProvider.GROK)
+
+    admission.release(AIProvider.OPENAI)
+    await queued
+    assert admission.stats()["global"] == {
+        "limit": 1, "max_queue": 1, "active": 1, "waiting": 0, "admitted": 2, "rejected": 1
+    }
+
+
+async def test_provider_slot_is_returned_when_the_global_gate_rejects():
+    admission = AdmissionController(
+        max_concurrent=1,
+        max_queued=0,
+        provider_limits=limits(openai={"max_concurrent": 2, "max_queued": 4})
+    )
+    await admission.acquire(AIProvider.OPENAI)
+
+    with pytest.raises(OverloadedError):
+        await admission.acquire(AIProvider.OPENAI)
+
+    assert admission.stats()["providers"]["openai"]["active"] == 1
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    admission = AdmissionController(max_concurrent=1, max_queued=1, provider_limits=limits())
+    await admission.acquire(AIProvider.OPENAI)
+    queued = asyncio.create_task(admission.acquire(AIProvider.OPENAI))
+    await asyncio.sleep(0)
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+
+    assert admission.stats()["global"]["waiting"] == 0
+    admission.release(AIProvider.OPENAI)
+    await admission.acquire(AIProvider.OPENAI)
+
+
+class EchoProvider(AIProviderBase):
+    """Stand-in provider that answers immediately"""
+
+    def __init__(self, name: AIProvider):
+        super().__init__(api_key="test_key")
+        self.name = name
+
+    @property
+    def provider_name(self) -> AIProvider:
+        return self.name
+
+    async def chat(self, messages, model, temperature=0.7, max_tokens=None, stream=False):
+        return ChatResponse(content="ok", model=model, provider=self.name)
+
+    async def list_models(self):
+        return []
+
+    def validate_model(self, model: str) -> bool:
+        return True
+
+
+async def test_rate_limited_requests_do_not_hold_admission_slots(monkeypatch):
+    monkeypatch.setenv("MAX_CONCURRENT_REQUESTS", "1")
+    monkeypatch.setenv("MAX_QUEUED_REQUESTS", "0")
+    monkeypatch.setenv("OPENAI_RPM", "1")
+    monkeypatch.setenv("REQUEST_COALESCING", "false")
+    manager = ProviderManager()
+    openai, grok = EchoProvider(AIProvider.OPENAI), EchoProvider(AIProvider.GROK)
+    messages = [ChatMessage(role="user", content="hello")]
+    await manager.chat(openai, messages, "gpt-4o")
+
+    # Waits about a minute for OpenAI's next request slot
+    limited = asyncio.create_task(manager.chat(openai, messages, "gpt-4o"))
+    await asyncio.sleep(0.01)
+
+    response = await manager.chat(grok, messages, "grok-4")
+
+    assert response.content == "ok"
+    limited.cancel()
@@ -0,0 +1,192 @@
+import json
+
+import pytest
+
+from src.batch_jobs import BatchJobManager, batch_custom_id
+from src.models import AIProvider, BatchRequest, ChatMessage
+from src.providers.anthropic_provider import AnthropicProvider
+from src.providers.openai_provider import OpenAIProvider
+
+
+def make_requests(count: int, model: str):
+    return [
+        BatchRequest(
+            custom_id=batch_custom_id(index),
+            messages=[ChatMessage(role="user", content=f"prompt {index}")],
+            model=model,
+            max_tokens=32
+        )
+        for index in range(count)
+    ]
+
+
+def openai_batch(status: str, completed: int = 0, failed: int = 0, output_file_id=None):
+    return {
+        "id": "batch_1",
+        "object": "batch",
+        "endpoint": "/v1/chat/completions",
+        "input_file_id": "file_in",
+        "completion_window": "24h",
+        "created_at": 0,
+        "status": status,
+        "output_file_id": output_file_id,
+        "error_file_id": None,
+        "request_counts": {"total": 2, "completed": completed, "failed": failed}
+    }
+
+
+def serve_openai_batch(fake_api, batch):
+    fake_api.json_route("POST", "/v1/files", {
+        "id": "file_in", "object": "file", "bytes": 1, "created_at": 0,
+        "filename": "batch.jsonl", "purpose": "batch", "status": "processed"
+    })
+    fake_api.route("POST", "/v1/batches", lambda request: (200, batch))
+    fake_api.route("GET", "/v1/batches/batch_1", lambda request: (200, batch))
+    output = "\n".join([
+        json.dumps({"custom_id": "item-1", "response": {"status_code": 200, "body": {
+            "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "second"}}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6}
+        }}}),
+        json.dumps({"custom_id": "item-0", "response": {"status_code": 400, "body": {
+            "error": {"message": "bad request"}
+        }}}),
+    ])
+    fake_api.route("GET", "/v1/files/file_out/content", lambda request: (200, output))
+
+
+async def test_openai_batch_submit_poll_and_results(fake_api):
+    batch = openai_batch("validating")
+    serve_openai_batch(fake_api, batch)
+    provider = OpenAIProvider(api_key="test_key", base_url=f"{fake_api.url}/v1")
+
+    batch_id = await provider.submit_batch(make_requests(2, "gpt-4o-mini"))
+
+    assert batch_id == "batch_1"
+    upload = fake_api.requests[0]["body"].decode("utf-8")
+    assert '"custom_id": "item-0"' in upload and '"url": "/v1/chat/completions"' in upload
+    assert json.loads(fake_api.requests[1]["body"])["input_file_id"] == "file_in"
+    assert (await provider.get_batch(batch_id))["status"] == "in_progress"
+
+    batch.update(openai_batch("completed", completed=1, failed=1, output_file_id="file_out"))
+    info = await provider.get_batch(batch_id)
+    assert info == {"status": "completed", "counts": {"total": 2, "succeeded": 1, "failed": 1}}
+
+    results = {result.custom_id: result async for result in provider.batch_results(batch_id)}
+    assert results["item-1"].response.content == "second"
+    assert results["item-1"].response.usage["completion_tokens"] == 1
+    assert results["item-0"].error == "bad request"
+    await provider.aclose()
+
+
+def anthropic_batch(fake_api, status: str, succeeded: int = 0, errored: int = 0):
+    return {
+        "id": "msgbatch_1",
+        "type": "message_batch",
+        "processing_status": status,
+        "request_counts": {
+            "processing": 2 - succeeded - errored,
+            "succeeded": succeeded,
+            "errored": errored,
+            "canceled": 0,
+            "expired": 0
+        },
+        "created_at": "2025-01-01T00:00:00Z",
+        "expires_at": "2025-01-02T00:00:00Z",
+        "results_url": f"{fake_api.url}/v1/messages/batches/msgbatch_1/results" if status == "ended" else None
+    }
+
+
+async def test_anthropic_batch_submit_poll_and_results(fake_api):
+    batch = anthropic_batch(fake_api, "in_progress")
+    fake_api.route("POST", "/v1/messages/batches", lambda request: (200, batch))
+    fake_api.route("GET", "/v1/messages/batches/msgbatch_1", lambda request: (200, batch))
+    results = "\n".join([
+        json.dumps({"custom_id": "item-0", "result": {"type": "succeeded", "message": {
+            "id": "msg_1",
+            "type": "message",
+            "role": "assistant",
+            "model": "claude-3-5-haiku-20241022",
+            "content": [{"type": "text", "text": "first"}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": 5, "output_tokens": 1}
+        }}}),
+        json.dumps({"custom_id": "item-1", "result": {"type": "errored", "error": {
+            "type": "error", "error": {"type": "invalid_request_error", "message": "too long"}
+        }}}),
+    ])
+    fake_api.route("GET", "/v1/messages/batches/msgbatch_1/results", lambda request: (200, results))
+    provider = AnthropicProvider(api_key="test_key", base_url=fake_api.url)
+
+    batch_id = await provider.submit_batch(make_requests(2, "claude-3-5-haiku-20241022"))
+
+    submitted = json.loads(fake_api.requests[0]["body"])["requests"]
+    assert [request["custom_id"] for request in submitted] == ["item-0", "item-1"]
+    assert submitted[0]["params"]["max_tokens"] == 32
+    assert (await provider.get_batch(batch_id))["status"] == "in_progress"
+
+    batch.update(anthropic_batch(fake_api, "ended", succeeded=1, errored=1))
+    info = await provider.get_batch(batch_id)
+    assert info == {"status": "completed", "counts": {"total": 2, "succeeded": 1, "failed": 1}}
+
+    results = {result.custom_id: result async for result in provider.batch_results(batch_id)}
+    assert results["item-0"].response.content == "first"
+    assert results["item-1"].error == "too long"
+    await provider.aclose()
+
+
+class _Providers:
+    """The part of ProviderManager BatchJobManager uses"""
+
+    def __init__(self, provider):
+        self.provider = provider
+
+    def get_provider(self, name: AIProvider):
+        return self.provider if name == self.provider.provider_name else None
+
+
+async def test_native_job_is_polled_and_results_downloaded_in_order(fake_api, tmp_path):
+    batch = openai_batch("in_progress")
+    serve_openai_batch(fake_api, batch)
+    provider = OpenAIProvider(api_key="test_key", base_url=f"{fake_api.url}/v1")
+    jobs = BatchJobManager(_Providers(provider), directory=str(tmp_path), poll_interval=0.0)
+
+    job = await jobs.submit(provider, make_requests(2, "gpt-4o-mini"))
+    assert job["mode"] == "native"
+    assert (await jobs.status(job["id"]))["status"] == "in_progress"
+
+    batch.update(openai_batch("completed", completed=1, failed=1, output_file_id="file_out"))
+    page = await jobs.results(job["id"])
+
+    assert page["job"]["status"] == "completed"
+    assert page["job"]["counts"] == {"total": 2, "succeeded": 1, "failed": 1}
+    assert [entry["index"] for entry in page["results"]] == [0, 1]
+    assert page["results"][0]["error"] == "bad request"
+    assert page["results"][1]["content"] == "second"
+
+    # A restarted server reads the finished job back from disk
+    restarted = BatchJobManager(_Providers(provider), directory=str(tmp_path))
+    assert (await restarted.results(job["id"]))["available"] == 2
+    await provider.aclose()
+
+
+async def test_failed_submit_leaves_no_job_behind(fake_api, tmp_path):
+    fake_api.json_route("POST", "/v1/files", {"error": {"message": "invalid file"}}, status=400)
+    provider = OpenAIProvider(api_key="test_key", base_url=f"{fake_api.url}/v1")
+    jobs = BatchJobManager(_Providers(provider), directory=str(tmp_path))
+
+    with pytest.raises(Exception):
+        await jobs.submit(provider, make_requests(2, "gpt-4o-mini"))
+
+    assert list(tmp_path.iterdir()) == []
+    await provider.aclose()
+
+
+@pytest.mark.parametrize("job_id", ["..", "../job_0123456789abcdef", "job_0123456789abcdef/..", "job.json"])
+async def test_job_ids_outside_the_generated_format_are_rejected(tmp_path, job_id):
+    (tmp_path / "jobs").mkdir()
+    (tmp_path / "job.json").write_text('{"id": "outside"}')
+    jobs = BatchJobManager(_Providers(None), directory=str(tmp_path / "jobs"))
+
+    with pytest.raises(ValueError, match="Unknown batch job"):
+        await jobs.status(job_id)
@@ -0,0 +1,83 @@
+import pytest
+
+from src.cache import MemoryCacheBackend, ResponseCache, SQLiteCacheBackend, make_cache_key
+from src.models import AIProvider, ChatMessage, ChatResponse
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_bytes: int = 1024):
+        if request.param == "memory":
+            return MemoryCacheBackend(max_bytes)
+        return SQLiteCacheBackend(str(tmp_path / "responses.sqlite3"), max_bytes)
+    return make
+
+
+def response(content: str) -> ChatResponse:
+    return ChatResponse(content=content, model="gpt-4o", provider=AIProvider.OPENAI)
+
+
+def test_key_covers_every_request_field():
+    messages = [ChatMessage(role="user", content="hello")]
+    key = make_cache_key(AIProvider.OPENAI, "gpt-4o", messages, 0.7, None)
+
+    assert key == make_cache_key(AIProvider.OPENAI, "gpt-4o", list(messages), 0.7, None)
+    assert len({
+        key,
+        make_cache_key(AIProvider.GROK, "gpt-4o", messages, 0.7, None),
+        make_cache_key(AIProvider.OPENAI, "gpt-4o-mini", messages, 0.7, None),
+        make_cache_key(AIProvider.OPENAI, "gpt-4o", [ChatMessage(role="system", content="hello")], 0.7, None),
+        make_cache_key(AIProvider.OPENAI, "gpt-4o", messages, 0.0, None),
+        make_cache_key(AIProvider.OPENAI, "gpt-4o", messages, 0.7, 100),
+    }) == 6
+
+
+async def test_hit_is_marked_cached(make_backend):
+    cache = ResponseCache(make_backend(), ttl=60)
+
+    assert await cache.get("key") is None
+    await cache.set("key", response("stored"))
+    hit = await cache.get("key")
+
+    assert hit.content == "stored" and hit.cached
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_expired_entries_are_misses(make_backend):
+    backend = make_backend()
+    backend.set("key", "value", ttl=-1)
+
+    assert backend.get("key") is None
+    assert backend.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(make_backend):
+    backend = make_backend(max_bytes=10)
+    backend.set("a", "aaaa", ttl=60)
+    backend.set("b", "bbbb", ttl=60)
+    assert backend.get("a") == "aaaa"
+
+    backend.set("c", "cccc", ttl=60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == "aaaa" and backend.get("c") == "cccc"
+    assert backend.stats()["entries"] == 2 and backend.stats()["bytes"] == 8
+    assert backend.stats()["evictions"] == 1
+
+
+def test_replacing_an_entry_keeps_the_totals(make_backend):
+    backend = make_backend()
+    backend.set("key", "short", ttl=60)
+    backend.set("key", "much longer", ttl=60)
+
+    assert backend.stats()["entries"] == 1 and backend.stats()["bytes"] == len("much longer")
+
+
+def test_sqlite_totals_survive_a_restart(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    SQLiteCacheBackend(path, 1024).set("key", "value", ttl=60)
+
+    reopened = SQLiteCacheBackend(path, 1024)
+
+    assert reopened.get("key") == "value"
+    assert reopened.stats()["entries"] == 1 and reopened.stats()["bytes"] == 5
@@ -0,0 +1,86 @@
+import httpx
+import pytest
+
+from src.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def http_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com/v1/chat")
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=httpx.Response(status, request=request))
+
+
+def record(breaker: CircuitBreaker, error=None, duration: float = 0.1):
+    probe = breaker.before_call()
+    breaker.record(error, duration, probe)
+
+
+def test_opens_once_failure_rate_is_reached():
+    breaker = CircuitBreaker("openai:gpt-4o", failure_rate=0.5, min_calls=4, window=10)
+    record(breaker, http_error(503))
+    record(breaker, http_error(503))
+    record(breaker)
+    assert breaker.state == CLOSED
+
+    record(breaker)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_client_errors_do_not_count_as_failures():
+    breaker = CircuitBreaker("openai:gpt-4o", min_calls=2, window=4)
+
+    for _ in range(4):
+        record(breaker, http_error(400))
+
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_only_trip_when_a_threshold_is_set():
+    default = CircuitBreaker("grok:grok-4", min_calls=2)
+    with_threshold = CircuitBreaker("grok:grok-4", min_calls=2, slow_call_seconds=30.0)
+
+    for breaker in (default, with_threshold):
+        for _ in range(2):
+            record(breaker, duration=90.0)
+
+    assert default.state == CLOSED
+    assert with_threshold.state == OPEN
+
+
+def test_successful_probes_close_the_circuit():
+    breaker = CircuitBreaker("openai:gpt-4o", min_calls=1, open_seconds=0.0, half_open_calls=2)
+    record(breaker, http_error(500))
+    assert breaker.state == OPEN
+
+    first = breaker.before_call()
+    second = breaker.before_call()
+    assert breaker.state == HALF_OPEN and first and second
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record(None, 0.1, first)
+    breaker.record(None, 0.1, second)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("openai:gpt-4o", min_calls=1, open_seconds=0.0)
+    record(breaker, http_error(500))
+
+    record(breaker, http_error(500))
+
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 2
+
+
+def test_abandoned_probe_frees_its_slot():
+    breaker = CircuitBreaker("openai:gpt-4o", min_calls=1, open_seconds=0.0, half_open_calls=1)
+    record(breaker, http_error(500))
+    probe = breaker.before_call()
+
+    breaker.abandon(probe)
+
+    assert breaker.before_call() is True
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from src.coalesce import SingleFlight
+from src.models import AIProvider, ChatMessage, ChatResponse
+from src.provider_manager import ProviderManager
+from src.providers.base import AIProviderBase
+
+
+async def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 4, "abandoned": 0}
+
+
+async def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_call_continues_while_any_caller_waits():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def fetch():
+        started.set()
+        await asyncio.sleep(0.1)
+        return "result"
+
+    first = asyncio.create_task(flight.do("key", fetch))
+    second = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+    first.cancel()
+
+    assert await second == "result"
+    assert flight.stats()["abandoned"] == 0
+
+
+async def test_call_is_cancelled_when_every_caller_leaves():
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(flight.do("key", slow), timeout=0.05)
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert flight.stats()["in_flight"] == 0
+    assert flight.stats()["abandoned"] == 1
+
+
+async def test_abandoned_key_starts_a_new_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(flight.do("key", fetch), timeout=0.01)
+
+    assert await flight.do("key", fetch) == 2
+
+
+class SlowProvider(AIProviderBase):
+    """OpenAI stand-in that counts calls"""
+
+    def __init__(self):
+        super().__init__(api_key="test_key")
+        self.calls = 0
+
+    @property
+    def provider_name(self) -> AIProvider:
+        return AIProvider.OPENAI
+
+    async def chat(self, messages, model, temperature=0.7, max_tokens=None, stream=False):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return ChatResponse(content="ok", model=model, provider=AIProvider.OPENAI)
+
+    async def list_models(self):
+        return []
+
+    def validate_model(self, model: str) -> bool:
+        return True
+
+
+@pytest.mark.parametrize("share_max_temperature, calls", [("2.0", 1), ("0", 3)])
+async def test_manager_shares_requests_up_to_the_temperature_limit(monkeypatch, share_max_temperature, calls):
+    monkeypatch.setenv("REQUEST_COALESCING", "true")
+    monkeypatch.setenv("SHARE_MAX_TEMPERATURE", share_max_temperature)
+    manager = ProviderManager()
+    provider = SlowProvider()
+    messages = [ChatMessage(role="user", content="hello")]
+
+    await asyncio.gather(*(manager.chat(provider, messages, "gpt-4o", temperature=0.7) for _ in range(3)))
+
+    assert provider.calls == calls
@@ -0,0 +1,113 @@
+from src.discovery import ModelDiscovery, merge_catalogs
+from src.models import AIProvider
+
+
+def make_discovery(fake_api, tmp_path, providers):
+    base_urls = {
+        AIProvider.OPENAI: f"{fake_api.url}/v1",
+        AIProvider.GROK: f"{fake_api.url}/grok/v1",
+        AIProvider.ANTHROPIC: f"{fake_api.url}/v1",
+        AIProvider.GOOGLE: f"{fake_api.url}/v1beta",
+    }
+    config = {provider: {"api_key": "test_key", "base_url": base_urls[provider]} for provider in providers}
+    return ModelDiscovery(config, snapshot_path=str(tmp_path / "models.json"), timeout=5.0)
+
+
+async def test_openai_lists_only_chat_models(fake_api, tmp_path):
+    fake_api.json_route("GET", "/v1/models", {"data": [
+        {"id": "gpt-4o"},
+        {"id": "o3-mini"},
+        {"id": "text-embedding-3-small"},
+        {"id": "gpt-4o-realtime-preview"},
+        {"id": "whisper-1"},
+    ]})
+    discovery = make_discovery(fake_api, tmp_path, [AIProvider.OPENAI])
+
+    discovered = await discovery.fetch_all()
+
+    assert set(discovered[AIProvider.OPENAI]) == {"gpt-4o", "o3-mini"}
+    assert fake_api.requests[0]["headers"]["Authorization"] == "Bearer test_key"
+
+
+async def test_anthropic_follows_pages(fake_api, tmp_path):
+    def models(request):
+        if request["query"].get("after_id") == "claude-b":
+            return 200, {"data": [{"id": "claude-c"}], "has_more": False}
+        return 200, {
+            "data": [{"id": "claude-a", "display_name": "Claude A"}, {"id": "claude-b"}],
+            "has_more": True,
+            "last_id": "claude-b"
+        }
+
+    fake_api.route("GET", "/v1/models", models)
+    discovery = make_discovery(fake_api, tmp_path, [AIProvider.ANTHROPIC])
+
+    discovered = await discovery.fetch_all()
+
+    assert set(discovered[AIProvider.ANTHROPIC]) == {"claude-a", "claude-b", "claude-c"}
+    assert discovered[AIProvider.ANTHROPIC]["claude-a"]["name"] == "Claude A"
+    assert fake_api.requests[0]["headers"]["x-api-key"] == "test_key"
+
+
+async def test_gemini_keeps_generate_content_models_with_limits(fake_api, tmp_path):
+    fake_api.json_route("GET", "/v1beta/models", {"models": [
+        {
+            "name": "models/gemini-2.5-pro",
+            "displayName": "Gemini 2.5 Pro",
+            "inputTokenLimit": 1048576,
+            "outputTokenLimit": 65536,
+            "supportedGenerationMethods": ["generateContent", "countTokens"]
+        },
+        {"name": "models/text-embedding-004", "supportedGenerationMethods": ["embedContent"]},
+    ]})
+    discovery = make_discovery(fake_api, tmp_path, [AIProvider.GOOGLE])
+
+    discovered = await discovery.fetch_all()
+
+    assert discovered[AIProvider.GOOGLE] == {
+        "gemini-2.5-pro": {
+            "name": "Gemini 2.5 Pro",
+            "context_window": 1048576,
+            "max_output_tokens": 65536,
+            "features": ["chat"]
+        }
+    }
+
+
+async def test_failed_provider_is_reported_and_others_still_load(fake_api, tmp_path):
+    fake_api.json_route("GET", "/v1/models", {"data": [{"id": "gpt-4o"}]})
+    fake_api.json_route("GET", "/grok/v1/models", {"error": "boom"}, status=500)
+    discovery = make_discovery(fake_api, tmp_path, [AIProvider.OPENAI, AIProvider.GROK])
+
+    discovered = await discovery.fetch_all()
+
+    assert set(discovered) == {AIProvider.OPENAI}
+    assert "grok" in discovery.stats()["errors"]
+
+
+async def test_refresh_persists_snapshot_and_keeps_lists_of_failed_providers(fake_api, tmp_path):
+    fake_api.json_route("GET", "/v1/models", {"data": [{"id": "gpt-4o"}]})
+    fake_api.json_route("GET", "/grok/v1/models", {"data": [{"id": "grok-4"}]})
+    discovery = make_discovery(fake_api, tmp_path, [AIProvider.OPENAI, AIProvider.GROK])
+    await discovery.refresh()
+
+    fake_api.json_route("GET", "/grok/v1/models", {"error": "down"}, status=503)
+    discovered = await discovery.refresh()
+
+    assert set(discovered[AIProvider.GROK]) == {"grok-4"}
+    restarted = make_discovery(fake_api, tmp_path, [AIProvider.OPENAI, AIProvider.GROK])
+    assert set(restarted.load_snapshot()) == {AIProvider.OPENAI, AIProvider.GROK}
+    assert restarted.last_refresh is not None
+
+
+def test_static_catalog_metadata_wins_over_discovered():
+    static = {AIProvider.OPENAI: {"gpt-4o": {"name": "GPT-4o", "context_window": 128000}}}
+    discovered = {AIProvider.OPENAI: {
+        "gpt-4o": {"name": "gpt-4o", "features": ["chat"]},
+        "gpt-5": {"name": "gpt-5", "features": ["chat"]},
+    }}
+
+    merged = merge_catalogs(static, discovered)
+
+    assert merged[AIProvider.OPENAI]["gpt-4o"]["context_window"] == 128000
+    assert "gpt-5" in merged[AIProvider.OPENAI]
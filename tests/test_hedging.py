@@ -0,0 +1,100 @@
+import asyncio
+from collections import deque
+
+import pytest
+
+from src.hedging import Hedger
+
+
+def responder(value, delay: float, log=None):
+    async def call():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(f"{value} cancelled")
+            raise
+        return value
+    return call
+
+
+def streamer(chunks, delay: float):
+    async def stream():
+        await asyncio.sleep(delay)
+        for chunk in chunks:
+            yield chunk
+    return stream
+
+
+async def test_fast_primary_is_not_hedged():
+    hedger = Hedger(default_delay=0.2)
+    backup_calls = []
+
+    async def backup():
+        backup_calls.append(1)
+        return "backup"
+
+    assert await hedger.race("openai:gpt-4o", responder("primary", 0.0), backup) == "primary"
+    assert backup_calls == []
+    assert hedger.stats()["openai:gpt-4o"]["hedged"] == 0
+
+
+async def test_backup_wins_against_slow_primary_which_is_cancelled():
+    hedger = Hedger(default_delay=0.05)
+    log = []
+
+    result = await hedger.race("openai:gpt-4o", responder("primary", 5.0, log), responder("backup", 0.0))
+
+    assert result == "backup"
+    await asyncio.sleep(0)
+    assert log == ["primary cancelled"]
+    assert hedger.stats()["openai:gpt-4o"]["hedge_wins"] == 1
+
+
+async def test_failing_backup_falls_back_to_primary():
+    hedger = Hedger(default_delay=0.01)
+
+    async def broken():
+        raise RuntimeError("backup down")
+
+    assert await hedger.race("key", responder("primary", 0.05), broken) == "primary"
+
+
+async def test_every_call_failing_raises_the_primary_error():
+    hedger = Hedger(default_delay=0.01)
+
+    async def primary():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("primary down")
+
+    async def backup():
+        raise ValueError("backup down")
+
+    with pytest.raises(RuntimeError, match="primary down"):
+        await hedger.race("key", primary, backup)
+
+
+async def test_stream_reports_the_winner():
+    hedger = Hedger(default_delay=0.05)
+    winners = []
+
+    stream = hedger.race_stream(
+        "grok:grok-4",
+        streamer(["slow"], 5.0),
+        streamer(["fast ", "backup"], 0.0),
+        on_winner=winners.append
+    )
+
+    assert [chunk async for chunk in stream] == ["fast ", "backup"]
+    assert winners == [1]
+
+
+def test_delay_follows_latency_percentile():
+    hedger = Hedger(percentile=90, min_delay=0.1, default_delay=2.0, min_samples=10)
+    assert hedger.delay("key") == 2.0
+
+    hedger._latencies["key"] = deque([0.2] * 9 + [3.0])
+    assert hedger.delay("key") == 3.0
+
+    hedger._latencies["key"].extend([0.01] * 90)
+    assert hedger.delay("key") == 0.2
@@ -0,0 +1,32 @@
+from src import metrics
+from src.metrics import Counter
+from src.provider_manager import ProviderManager
+from src.providers.openai_provider import OpenAIProvider
+
+
+def test_model_label_is_the_catalog_id():
+    manager = ProviderManager()
+    provider = OpenAIProvider(api_key="test_key")
+
+    names = ["gpt-4o", "gpt-4o-2099-01-01", "gpt-4o-client-made-this-up"]
+
+    assert {manager._metric_labels(provider, name)["model"] for name in names} == {"gpt-4o"}
+    assert manager._metric_labels(provider, "not-a-model")["model"] == "other"
+
+
+def test_counter_keeps_one_series_per_label_set():
+    counter = Counter("test_total", "Test", ("provider", "model"))
+
+    counter.inc(provider="openai", model="gpt-4o")
+    counter.inc(2, provider="openai", model="gpt-4o")
+    counter.inc(provider="grok", model="grok-4")
+
+    assert counter.snapshot() == [
+        {"provider": "openai", "model": "gpt-4o", "value": 3.0},
+        {"provider": "grok", "model": "grok-4", "value": 1.0},
+    ]
+
+
+def test_error_classes():
+    assert metrics.error_class(TimeoutError()) == "network"
+    assert metrics.error_class(ValueError("bad")) == "other"
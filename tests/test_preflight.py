@@ -0,0 +1,99 @@
+import pytest
+
+from src.models import AIProvider, ChatMessage, ChatResponse
+from src.provider_manager import ProviderManager
+from src.providers.base import AIProviderBase
+from src.tokens import ContextLengthError
+
+
+class RecordingProvider(AIProviderBase):
+    """OpenAI stand-in that records the max_tokens it is sent"""
+
+    def __init__(self):
+        super().__init__(api_key="test_key")
+        self.sent = []
+
+    @property
+    def provider_name(self) -> AIProvider:
+        return AIProvider.OPENAI
+
+    async def chat(self, messages, model, temperature=0.7, max_tokens=None, stream=False):
+        self.sent.append((messages, max_tokens))
+        return ChatResponse(content="ok", model=model, provider=AIProvider.OPENAI)
+
+    async def list_models(self):
+        return []
+
+    def validate_model(self, model: str) -> bool:
+        return True
+
+
+def prompt(tokens: int):
+    # The OpenAI heuristic counts four ASCII characters per token
+    return [ChatMessage(role="user", content="x" * (tokens * 4))]
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("PREFLIGHT_MODE", "reject")
+    monkeypatch.delenv("PREFLIGHT_MARGIN", raising=False)
+    monkeypatch.delenv("PREFLIGHT_MIN_OUTPUT_TOKENS", raising=False)
+    return ProviderManager()
+
+
+async def test_max_tokens_that_fits_is_sent_unchanged(manager):
+    provider = RecordingProvider()
+
+    response = await manager.chat(provider, prompt(100_000), "gpt-4o", max_tokens=8000)
+
+    assert provider.sent[0][1] == 8000
+    assert response.clamped_max_tokens is None
+    assert manager.preflight_counts["clamped"] == 0
+
+
+async def test_max_tokens_is_clamped_to_the_room_left_and_reported(manager):
+    provider = RecordingProvider()
+
+    response = await manager.chat(provider, prompt(120_000), "gpt-4o", max_tokens=10_000)
+
+    room = 128_000 - manager.token_estimator.count_messages(AIProvider.OPENAI, "gpt-4o", prompt(120_000))
+    assert provider.sent[0][1] == room
+    assert response.clamped_max_tokens == room
+    assert manager.preflight_counts["clamped"] == 1
+
+
+def test_max_tokens_is_clamped_to_the_output_limit(manager):
+    messages, max_tokens = manager._preflight(RecordingProvider(), prompt(10), "gpt-4o", 50_000)
+
+    assert max_tokens == 16384
+
+
+def test_default_max_tokens_is_left_to_the_provider(manager):
+    messages, max_tokens = manager._preflight(RecordingProvider(), prompt(127_000), "gpt-4o", None)
+
+    assert max_tokens is None
+
+
+def test_estimated_prompt_is_only_rejected_beyond_the_margin(manager):
+    provider = RecordingProvider()
+    manager._preflight(provider, prompt(150_000), "gpt-4o", None)
+
+    with pytest.raises(ContextLengthError):
+        manager._preflight(provider, prompt(200_000), "gpt-4o", None)
+    assert manager.preflight_counts["rejected"] == 1
+
+
+def test_trim_drops_the_oldest_turns_first(manager):
+    manager.preflight_mode = "trim"
+    old = "o" * 400_000
+    messages = [
+        ChatMessage(role="system", content="Be brief."),
+        ChatMessage(role="user", content=old),
+        ChatMessage(role="assistant", content=old),
+        ChatMessage(role="user", content="latest question"),
+    ]
+
+    trimmed, _ = manager._preflight(RecordingProvider(), messages, "gpt-4o", None)
+
+    assert [msg.content for msg in trimmed] == ["Be brief.", "latest question"]
+    assert manager.preflight_counts["trimmed"] == 1
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from src.models import AIProvider
+from src.rate_limit import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.monotonic that tests advance by hand"""
+    now = [1000.0]
+    monkeypatch.setattr("src.rate_limit.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_bucket_holds_burst_seconds_of_quota(clock):
+    bucket = TokenBucket(600, burst_seconds=5.0)
+
+    assert bucket.capacity == 50
+    bucket.consume(50)
+    assert bucket.wait_time(1) == pytest.approx(0.1)
+
+    clock[0] += 60
+    assert bucket.wait_time(50) == 0.0
+    assert bucket.tokens == bucket.capacity
+
+
+def test_request_larger_than_the_bucket_leaves_it_in_debt(clock):
+    bucket = TokenBucket(60_000, burst_seconds=1.0)
+
+    # The request only waits for a full bucket...
+    assert bucket.wait_time(3000) == 0.0
+    bucket.consume(3000)
+
+    # ...and the requests after it wait out the rest
+    assert bucket.wait_time(1) == pytest.approx(2.001)
+
+
+def test_small_limits_still_admit_one_request(clock):
+    bucket = TokenBucket(1, burst_seconds=5.0)
+
+    assert bucket.capacity == 1
+    assert bucket.wait_time(1) == 0.0
+
+
+def tpm_limiter(tpm: int, per_model: bool = False) -> RateLimiter:
+    limits = {AIProvider.OPENAI: {"rpm": None, "tpm": tpm}}
+    return RateLimiter(limits, per_model=per_model, burst_seconds=1.0)
+
+
+async def test_unlimited_provider_never_waits():
+    limiter = tpm_limiter(60)
+
+    assert await limiter.acquire(AIProvider.GROK, "grok-4", 10_000) == 0.0
+    assert limiter.stats() == {}
+
+
+async def test_requests_queue_for_tokens():
+    # 6000 tokens a second, in a bucket of 6000
+    limiter = tpm_limiter(360_000)
+
+    assert await limiter.acquire(AIProvider.OPENAI, "gpt-4o", 6000) < 0.01
+    waited = await limiter.acquire(AIProvider.OPENAI, "gpt-4o", 300)
+
+    assert waited == pytest.approx(0.05, abs=0.04)
+    assert limiter.stats()["openai"]["acquired"] == 2
+
+
+async def test_waiters_are_served_in_order():
+    limiter = tpm_limiter(360_000)
+    await limiter.acquire(AIProvider.OPENAI, "gpt-4o", 6000)
+    order = []
+
+    async def request(name: str, tokens: int):
+        await limiter.acquire(AIProvider.OPENAI, "gpt-4o", tokens)
+        order.append(name)
+
+    await asyncio.gather(request("large", 120), request("small", 6))
+
+    assert order == ["large", "small"]
+
+
+async def test_per_model_buckets():
+    limiter = tpm_limiter(60, per_model=True)
+
+    await limiter.acquire(AIProvider.OPENAI, "gpt-4o", 1)
+    await limiter.acquire(AIProvider.OPENAI, "gpt-4o-mini", 1)
+
+    assert set(limiter.stats()) == {"openai/gpt-4o", "openai/gpt-4o-mini"}
@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.retry import call_with_retry, get_retry_after, get_status_code, is_retryable
+
+
+def http_error(status: int, headers=None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com/v1/chat")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+def wrapped(error: BaseException) -> Exception:
+    """Wrap an error the way providers do"""
+    try:
+        raise Exception(f"Provider API error: {str(error)}") from error
+    except Exception as e:
+        return e
+
+
+@pytest.mark.parametrize("status, retryable", [
+    (429, True), (500, True), (503, True), (529, True),
+    (400, False), (401, False), (404, False),
+])
+def test_status_codes(status, retryable):
+    assert is_retryable(http_error(status)) is retryable
+
+
+def test_status_code_found_through_wrapping():
+    error = wrapped(http_error(429))
+
+    assert get_status_code(error) == 429
+    assert is_retryable(error)
+
+
+@pytest.mark.parametrize("error", [
+    asyncio.TimeoutError(),
+    ConnectionResetError(),
+    httpx.ReadTimeout("timed out"),
+    httpx.ConnectError("refused"),
+])
+def test_transport_failures_are_retryable(error):
+    assert is_retryable(wrapped(error))
+
+
+def test_other_errors_are_not_retryable():
+    assert not is_retryable(ValueError("bad input"))
+    assert get_status_code(ValueError("bad input")) is None
+
+
+def test_retry_after_headers():
+    assert get_retry_after(wrapped(http_error(429, {"retry-after": "7"}))) == 7.0
+    assert get_retry_after(http_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert get_retry_after(http_error(429)) is None
+
+
+async def test_call_with_retry_retries_transient_errors_only():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise http_error(503)
+        return "ok"
+
+    assert await call_with_retry(flaky, max_retries=3, base_delay=0.0, max_delay=0.0) == "ok"
+    assert len(calls) == 3
+
+    async def bad_request():
+        calls.append(1)
+        raise http_error(400)
+
+    calls.clear()
+    with pytest.raises(httpx.HTTPStatusError):
+        await call_with_retry(bad_request, max_retries=3, base_delay=0.0, max_delay=0.0)
+    assert len(calls) == 1
+
+
+async def test_call_with_retry_gives_up_after_max_retries():
+    calls = []
+
+    async def down():
+        calls.append(1)
+        raise http_error(500)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await call_with_retry(down, max_retries=2, base_delay=0.0, max_delay=0.0)
+    assert len(calls) == 3
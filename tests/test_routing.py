@@ -0,0 +1,53 @@
+import pytest
+
+from src.models import AIProvider
+from src.routing import ModelRouter, Route
+
+CATALOGS = {
+    AIProvider.OPENAI: {"gpt-4o": {}, "gpt-4o-mini": {}, "o3": {}},
+    AIProvider.ANTHROPIC: {"claude-sonnet-4-20250514": {}, "claude-3-5-sonnet-20240620": {}, "claude-3-5-sonnet-20241022": {}},
+    AIProvider.GROK: {"grok-4-0709": {}},
+}
+
+
+@pytest.fixture
+def router():
+    return ModelRouter(CATALOGS)
+
+
+@pytest.mark.parametrize("model, expected", [
+    ("gpt-4o", Route(AIProvider.OPENAI, "gpt-4o", "gpt-4o")),
+    ("GPT-4o-Mini", Route(AIProvider.OPENAI, "gpt-4o-mini", "gpt-4o-mini")),
+    ("o3", Route(AIProvider.OPENAI, "o3", "o3")),
+])
+def test_exact_ids_ignore_case(router, model, expected):
+    assert router.resolve(model) == expected
+
+
+@pytest.mark.parametrize("alias, model", [
+    ("claude-sonnet-4", "claude-sonnet-4-20250514"),
+    ("claude-sonnet-4-latest", "claude-sonnet-4-20250514"),
+    ("grok-4", "grok-4-0709"),
+    # Aliases point at the newest snapshot
+    ("claude-3-5-sonnet", "claude-3-5-sonnet-20241022"),
+])
+def test_aliases_resolve_to_the_snapshot(router, alias, model):
+    route = router.resolve(alias)
+
+    assert route.model == model and route.catalog_id == model
+
+
+def test_unknown_snapshots_keep_their_name_and_use_the_longest_prefix(router):
+    assert router.resolve("gpt-4o-mini-2024-07-18") == Route(AIProvider.OPENAI, "gpt-4o-mini-2024-07-18", "gpt-4o-mini")
+    assert router.resolve("gpt-4o-2024-11-20").catalog_id == "gpt-4o"
+
+
+@pytest.mark.parametrize("model", ["gpt-4omni", "o3x", "llama-3", ""])
+def test_unknown_models_do_not_resolve(router, model):
+    assert router.resolve(model) is None
+
+
+def test_rebuild_picks_up_new_models(router):
+    router.rebuild({**CATALOGS, AIProvider.GOOGLE: {"gemini-2.5-pro": {}}})
+
+    assert router.resolve("gemini-2.5-pro").provider == AIProvider.GOOGLE
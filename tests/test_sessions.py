@@ -0,0 +1,95 @@
+import time
+
+from src.models import ChatMessage, ResponseChain
+from src.sessions import SessionStore
+
+
+def turn(text: str):
+    return [ChatMessage(role="user", content=text), ChatMessage(role="assistant", content=f"re: {text}")]
+
+
+def test_get_creates_and_returns_the_same_session():
+    store = SessionStore()
+    session = store.get("s1")
+    session.append(turn("hello"))
+
+    assert store.get("s1") is session
+    assert len(store.get("s1").messages) == 2
+    assert store.stats()["created"] == 1
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(ttl=60)
+    store.get("s1").append(turn("hello"))
+    store.get("s1").updated_at = time.time() - 120
+
+    assert store.get("s1").messages == []
+    assert store.stats()["expired"] == 1
+
+
+def test_least_recently_used_sessions_are_evicted():
+    store = SessionStore(max_sessions=2)
+    store.get("a")
+    store.get("b")
+    store.get("a")
+
+    store.get("c")
+
+    assert set(store._sessions) == {"a", "c"}
+    assert store.stats()["evicted"] == 1
+
+
+async def test_sessions_mid_turn_are_not_evicted():
+    store = SessionStore(max_sessions=1)
+    busy = store.get("busy")
+    async with busy.lock:
+        store.get("other")
+        assert "busy" in store._sessions
+
+
+async def test_new_session_is_kept_when_all_others_are_busy():
+    store = SessionStore(max_sessions=1)
+    busy = store.get("busy")
+    async with busy.lock:
+        session = store.get("new")
+        session.append(turn("hello"))
+
+        assert store.get("new") is session
+        assert len(store.get("new").messages) == 2
+
+
+def test_evicted_sessions_spill_to_disk_and_come_back(tmp_path):
+    store = SessionStore(max_sessions=1, spill_dir=str(tmp_path))
+    session = store.get("a")
+    session.append(turn("hello"))
+    session.chain = ResponseChain(response_id="resp_1", message_count=2)
+    session.chain_target = "openai:gpt-4.1"
+
+    store.get("b")
+    assert "a" not in store._sessions
+    assert len(list(tmp_path.iterdir())) == 1
+
+    restored = store.get("a")
+    assert [msg.content for msg in restored.messages] == ["hello", "re: hello"]
+    assert restored.chain.response_id == "resp_1"
+    assert restored.chain_target == "openai:gpt-4.1"
+    assert store.stats()["restored"] == 1
+
+
+def test_spill_all_persists_sessions_for_the_next_start(tmp_path):
+    store = SessionStore(spill_dir=str(tmp_path))
+    store.get("a").append(turn("hello"))
+    store.spill_all()
+
+    restarted = SessionStore(spill_dir=str(tmp_path))
+    assert len(restarted.get("a").messages) == 2
+
+
+def test_clear_forgets_memory_and_disk(tmp_path):
+    store = SessionStore(max_sessions=1, spill_dir=str(tmp_path))
+    store.get("a").append(turn("hello"))
+    store.get("b")
+
+    assert store.clear("a") is True
+    assert store.clear("a") is False
+    assert store.get("a").messages == []